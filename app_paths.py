@@ -0,0 +1,14 @@
+import os
+import sys
+
+
+def get_config_dir():
+    """Per-user folder for the scheduler's settings and caches, created on first use"""
+    if sys.platform == 'win32':
+        base = os.environ.get('APPDATA') or os.path.expanduser('~')
+        path = os.path.join(base, 'OBS-Scheduler')
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+        path = os.path.join(base, 'obs-scheduler')
+    os.makedirs(path, exist_ok=True)
+    return path
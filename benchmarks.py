@@ -0,0 +1,511 @@
+"""Time the scheduler's hot paths on synthetic playlists and write the results as JSON
+
+    python benchmarks.py --sizes 10 1000 100000 --output bench.json
+    python benchmarks.py --output new.json --compare old.json
+
+Everything runs without OBS, ffprobe or a display: probing uses a stub prober
+and everything that talks to OBS goes over a real WebSocket to
+fake_obs_server, whose latency and fault injection are set with --obs-latency,
+--obs-drop-rate and --obs-fail-rate. update_timeline needs Tk and is reported
+as skipped when no display is available.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import obsws_python as obs
+
+from fake_obs_server import FakeOBSServer
+from media_probe import ProbeJob
+from multi_channel import MultiChannelScheduler
+from obs_connection import parse_endpoints
+from obs_scenes import provision_scenes, video_scene_name
+from playlist_store import PlaylistStore, schedule_document
+from playout_engine import PlayoutEngine
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+MULTI_CHANNELS = 16
+LOOKUPS_PER_RUN = 1000
+EDIT_BLOCK = 100
+
+
+class Skipped(Exception):
+    pass
+
+
+# Fault injection for the fake OBS, set from the command line
+OBS_OPTIONS = {}
+SWITCHES_PER_RUN = 100
+CUT_CLIP_LENGTH = 0.25
+
+
+def fake_obs(**overrides):
+    return FakeOBSServer(**dict(OBS_OPTIONS, **overrides)).start()
+
+
+@contextlib.contextmanager
+def faults_paused(server):
+    """Set up fixtures on the fake OBS without dropped or failed requests"""
+    drop_rate, fail_rate = server.drop_rate, server.fail_rate
+    server.drop_rate = server.fail_rate = 0.0
+    try:
+        yield
+    finally:
+        server.drop_rate, server.fail_rate = drop_rate, fail_rate
+
+
+def synthetic_playlist(size, seed=0):
+    """A playlist of size clips between 10 seconds and 30 minutes, drawn from a 500-file library"""
+    rng = random.Random(seed)
+    library = [f"D:/Broadcast/Library/Show_{k:04d}_master.mp4" for k in range(500)]
+    return PlaylistStore((rng.choice(library), rng.uniform(10, 1800)) for _ in range(size))
+
+
+def live_engine(videos):
+    """An engine that is on air without a controller thread, so calls are timed on their own"""
+    engine = PlayoutEngine(videos, {})
+    engine.broadcasting = True
+    engine.broadcast_start_time = time.monotonic()
+    return engine
+
+
+@contextlib.contextmanager
+def temporary_config_dir():
+    """Point get_config_dir at a throwaway folder so a benchmark never touches the user's settings"""
+    names = ('APPDATA', 'XDG_CONFIG_HOME')
+    saved = {name: os.environ.get(name) for name in names}
+    with tempfile.TemporaryDirectory() as path:
+        os.environ.update({name: path for name in names})
+        try:
+            yield path
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+def time_runs(func, repeat, ops=1):
+    """Run func repeat times; returns seconds per operation for each run"""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        runs.append((time.perf_counter() - started) / ops)
+    return runs
+
+
+def bench_get_video_at_time(size, repeat):
+    videos = synthetic_playlist(size)
+    engine = live_engine(videos)
+    rng = random.Random(1)
+    times = [rng.uniform(0, videos.schedule.total) for _ in range(LOOKUPS_PER_RUN)]
+
+    def run():
+        for t in times:
+            engine.get_video_at_time(t)
+    return time_runs(run, repeat, LOOKUPS_PER_RUN)
+
+
+def bench_skip_to_next(size, repeat):
+    videos = synthetic_playlist(size)
+    engine = live_engine(videos)
+
+    skips = max(1, min(size - 1, LOOKUPS_PER_RUN))
+
+    def run():
+        engine.manual_time_offset = 0
+        for _ in range(skips):
+            engine.skip_to_next()
+    return time_runs(run, repeat, skips)
+
+
+def bench_jump_to_video(size, repeat):
+    videos = synthetic_playlist(size)
+    engine = live_engine(videos)
+    rng = random.Random(2)
+    targets = [rng.randrange(size) for _ in range(LOOKUPS_PER_RUN)]
+
+    def run():
+        for index in targets:
+            engine.jump_to(index)
+    return time_runs(run, repeat, LOOKUPS_PER_RUN)
+
+
+def bench_process_files(size, repeat):
+    """ProbeJob plus in-order inserts into the store: the pipeline behind Add Videos"""
+    files = list(synthetic_playlist(size).paths)
+
+    def run():
+        videos = PlaylistStore()
+        job = ProbeJob(files, prober=lambda filepath: 60.0)
+        job.start()
+        while not job.finished:
+            ready = job.take_ready()
+            if ready:
+                videos.insert(len(videos), ready)
+            else:
+                time.sleep(0.001)
+    return time_runs(run, repeat)
+
+
+def bench_playlist_edits(size, repeat):
+    """Insert, delete and move 100-row blocks mid-playlist; also reports the store's memory"""
+    videos = synthetic_playlist(size)
+    block = list(zip(synthetic_playlist(EDIT_BLOCK, seed=3).paths, [60.0] * EDIT_BLOCK))
+    middle = size // 2
+    moved = min(EDIT_BLOCK, size // 2)
+
+    def run():
+        videos.insert(middle, block)
+        videos.delete_range(middle, middle + EDIT_BLOCK)
+        videos.move_range(0, moved, size - moved)
+        videos.move_range(size - moved, size, 0)
+    return {'runs': time_runs(run, repeat, 4), 'memory_bytes': videos.memory_usage()}
+
+
+def bench_export_playlist(size, repeat):
+    videos = synthetic_playlist(size)
+
+    def run():
+        json.dumps(schedule_document(videos, "06:00:00", 'per_scene'), indent=2)
+    return time_runs(run, repeat)
+
+
+def bench_setup_obs_scenes(size, repeat):
+    videos = synthetic_playlist(size)[:]
+    runs = []
+    failed = 0
+    for _ in range(repeat):
+        server = fake_obs()
+        try:
+            client = obs.ReqClient(**server.obs_settings)
+            started = time.perf_counter()
+            report = provision_scenes(client, videos)
+            runs.append(time.perf_counter() - started)
+            failed += len(report.failed)
+            client.disconnect()
+        finally:
+            server.stop()
+    return {'runs': runs, 'failed_scenes': failed}
+
+
+def bench_connect_obs(repeat):
+    """ReqClient handshake, Identify and GetVersion, as connect_obs does"""
+    server = fake_obs(password='benchmark')
+    try:
+        def run():
+            client = obs.ReqClient(**server.obs_settings)
+            client.get_version()
+            client.disconnect()
+        return time_runs(run, repeat)
+    finally:
+        server.stop()
+
+
+def bench_switch_latency(repeat):
+    """Round trip of SetCurrentProgramScene, the request behind every cut"""
+    server = fake_obs()
+    runs = []
+    errors = 0
+    try:
+        with faults_paused(server):
+            client = obs.ReqClient(**server.obs_settings)
+            for name in ('Bench_A', 'Bench_B'):
+                client.create_scene(name)
+        for k in range(repeat * SWITCHES_PER_RUN):
+            started = time.perf_counter()
+            try:
+                client.set_current_program_scene('Bench_A' if k % 2 else 'Bench_B')
+            except Exception:
+                errors += 1
+                # A dropped request leaves the client waiting on the next reply, so start over
+                client = obs.ReqClient(**server.obs_settings)
+                continue
+            runs.append(time.perf_counter() - started)
+        client.disconnect()
+    finally:
+        server.stop()
+    return {'runs': runs, 'errors': errors}
+
+
+def bench_broadcast_cuts(repeat):
+    """How far each cut lands from its deadline, seen from the OBS side"""
+    clips = 8
+    server = fake_obs()
+    errors = []
+    try:
+        videos = PlaylistStore((f"D:/Broadcast/Cut_{k}.mp4", CUT_CLIP_LENGTH) for k in range(clips))
+        engine = PlayoutEngine(videos, server.obs_settings)
+        with faults_paused(server):
+            engine.connect()
+            provision_scenes(engine.obs_client, videos[:])
+        scenes = [video_scene_name(video.filepath) for video in videos]
+        for _ in range(repeat):
+            del server.program_changes[:]
+            engine.start(0.0)
+            time.sleep(CUT_CLIP_LENGTH * clips + 0.2)
+            started = engine.broadcast_start_time
+            engine.stop()
+            for at, scene_name in server.program_changes:
+                if scene_name in scenes and scenes.index(scene_name) > 0:
+                    deadline = started + videos.schedule.start_of(scenes.index(scene_name))
+                    errors.append(abs(at - deadline))
+        engine.disconnect()
+    finally:
+        server.stop()
+    return errors
+
+
+def bench_obs_reconnect(repeat):
+    """Time from the OBS socket dropping mid-broadcast to the scheduled clip being back on program"""
+    server = fake_obs()
+    runs = []
+    try:
+        videos = PlaylistStore([("D:/Broadcast/Long.mp4", 3600.0)])
+        engine = PlayoutEngine(videos, server.obs_settings)
+        with faults_paused(server):
+            engine.connect()
+            provision_scenes(engine.obs_client, videos[:])
+        engine.start(0.0)
+        time.sleep(0.2)
+        for _ in range(repeat):
+            changes = len(server.program_changes)
+            dropped = time.monotonic()
+            server.drop_clients()
+            deadline = dropped + 10.0
+            while len(server.program_changes) == changes and time.monotonic() < deadline:
+                time.sleep(0.002)
+            if len(server.program_changes) > changes:
+                runs.append(time.monotonic() - dropped)
+        engine.stop()
+        engine.disconnect()
+    finally:
+        server.stop()
+    return {'runs': runs, 'failed': repeat - len(runs)}
+
+
+def bench_multi_channel_cuts(repeat):
+    """Cut error across MULTI_CHANNELS channels sharing one timer, each with its own fake OBS"""
+    clips = 8
+    servers = [fake_obs() for _ in range(MULTI_CHANNELS)]
+    errors = []
+    try:
+        playlists = []
+        for k, server in enumerate(servers):
+            spec = {'name': f"ch{k+1}", 'endpoints': parse_endpoints(f"{server.host}:{server.port}")}
+            videos = PlaylistStore((f"D:/Broadcast/Ch{k}_Cut_{j}.mp4", CUT_CLIP_LENGTH) for j in range(clips))
+            playlists.append((spec, videos, '00:00:00', 'per_scene', None))
+        for _ in range(repeat):
+            scheduler = MultiChannelScheduler(playlists)
+            with contextlib.ExitStack() as paused:
+                for server in servers:
+                    paused.enter_context(faults_paused(server))
+                scheduler.connect_all()
+                scheduler.provision_all()
+            for server in servers:
+                del server.program_changes[:]
+            runner = threading.Thread(target=scheduler.run, kwargs={'preroll_lead': 0.0})
+            runner.start()
+            time.sleep(CUT_CLIP_LENGTH * clips + 0.5)
+            scheduler.stopped.set()
+            runner.join()
+            for (spec, videos, _, _, _), server in zip(playlists, servers):
+                started = scheduler.channels[spec['name']].broadcast_start_time
+                scenes = [video_scene_name(video.filepath) for video in videos]
+                for at, scene_name in server.program_changes:
+                    if scene_name in scenes and scenes.index(scene_name) > 0:
+                        errors.append(abs(at - (started + videos.schedule.start_of(scenes.index(scene_name)))))
+    finally:
+        for server in servers:
+            server.stop()
+    return errors
+
+
+def bench_update_timeline(size, repeat):
+    """Full update_timeline on the real window; needs a display"""
+    import tkinter as tk
+    from tkinterdnd2 import TkinterDnD
+    from scheduler_app import PlaylistScheduler
+
+    try:
+        root = TkinterDnD.Tk()
+    except tk.TclError as e:
+        raise Skipped(f"no display ({e})")
+    app = None
+    try:
+        with temporary_config_dir():
+            app = PlaylistScheduler(root, journal=False)
+            playlist = synthetic_playlist(size)
+            app.videos.insert(0, zip(playlist.paths, playlist.durations))
+            root.update()
+
+            def run():
+                # Move the first row to the end so every run re-times a changed playlist
+                app.videos.move_range(0, 1, size - 1)
+                app.update_timeline()
+                root.update_idletasks()
+            return time_runs(run, repeat)
+    finally:
+        if app is not None:
+            if app.metrics_writer:
+                app.metrics_writer.stop()
+            if app.probe_cache:
+                app.probe_cache.close()
+        root.destroy()
+
+
+BENCHMARKS = {
+    'get_video_at_time': bench_get_video_at_time,
+    'skip_to_next': bench_skip_to_next,
+    'jump_to_video': bench_jump_to_video,
+    'update_timeline': bench_update_timeline,
+    'process_files': bench_process_files,
+    'playlist_edits': bench_playlist_edits,
+    'export_playlist': bench_export_playlist,
+    'setup_obs_scenes': bench_setup_obs_scenes,
+}
+
+# These do not depend on playlist length and run once per invocation
+FIXED_BENCHMARKS = {
+    'connect_obs': bench_connect_obs,
+    'switch_latency': bench_switch_latency,
+    'broadcast_cuts': bench_broadcast_cuts,
+    'obs_reconnect': bench_obs_reconnect,
+    'multi_channel_cuts': bench_multi_channel_cuts,
+}
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5)
+        return result.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_one(name, size, repeat):
+    """Run one benchmark and summarise it; size is None for the fixed benchmarks"""
+    label = f"  {name:<18} {size if size is not None else '-':>7}"
+    try:
+        # The code under test logs every scene and cut; keep that out of the timings
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            if size is None:
+                runs = FIXED_BENCHMARKS[name](repeat)
+            else:
+                runs = BENCHMARKS[name](size, repeat)
+    except Skipped as e:
+        print(f"{label}  skipped: {e}", file=sys.stderr)
+        return {'name': name, 'size': size, 'skipped': str(e)}
+
+    extra = {}
+    if isinstance(runs, dict):
+        extra = runs
+        runs = extra.pop('runs')
+    if not runs:
+        print(f"{label}  no successful runs {extra}", file=sys.stderr)
+        return dict({'name': name, 'size': size, 'runs': 0}, **extra)
+    result = dict({
+        'name': name,
+        'size': size,
+        'median_s': statistics.median(runs),
+        'min_s': min(runs),
+        'max_s': max(runs),
+        'runs': len(runs),
+    }, **extra)
+    notes = ''.join(f"  {key}={value}" for key, value in extra.items())
+    print(f"{label}  median {result['median_s']*1000:10.4f} ms{notes}", file=sys.stderr)
+    return result
+
+
+def run_benchmarks(names, sizes, repeat):
+    results = []
+    for name in names:
+        if name in FIXED_BENCHMARKS:
+            results.append(run_one(name, None, repeat))
+            continue
+        for size in sizes:
+            results.append(run_one(name, size, repeat))
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    """Print median ratios against an earlier results file; returns the number of regressions"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['name'], r['size']): r for r in json.load(f)['results'] if 'median_s' in r}
+    regressions = 0
+    for result in results:
+        old = baseline.get((result['name'], result['size']))
+        if 'median_s' not in result or not old or not old['median_s']:
+            continue
+        ratio = result['median_s'] / old['median_s']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  ⚠️ slower'
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = '  faster'
+        print(f"  {result['name']:<18} {result['size']:>7}  x{ratio:6.2f}{flag}", file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scheduler's hot paths")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--only', nargs='+', choices=sorted(list(BENCHMARKS) + list(FIXED_BENCHMARKS)),
+                        help="run only these benchmarks")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="results JSON from an earlier commit to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="ratio change reported as a regression")
+    parser.add_argument('--obs-latency', type=float, default=0.0, help="fake OBS response latency in seconds")
+    parser.add_argument('--obs-jitter', type=float, default=0.0, help="extra random fake OBS latency, up to this")
+    parser.add_argument('--obs-drop-rate', type=float, default=0.0, help="fraction of requests fake OBS ignores")
+    parser.add_argument('--obs-fail-rate', type=float, default=0.0, help="fraction of requests fake OBS fails")
+    args = parser.parse_args(argv)
+
+    # obsws_python logs a traceback for every failed request; injected faults make that noise
+    logging.getLogger('obsws_python').setLevel(logging.CRITICAL)
+    OBS_OPTIONS.update(latency=args.obs_latency, jitter=args.obs_jitter, drop_rate=args.obs_drop_rate,
+                       fail_rate=args.obs_fail_rate, media_duration=lambda filepath: 3600.0)
+
+    names = args.only or list(BENCHMARKS) + list(FIXED_BENCHMARKS)
+    print(f"Benchmarking {', '.join(names)} at sizes {args.sizes}", file=sys.stderr)
+    results = run_benchmarks(names, args.sizes, args.repeat)
+
+    document = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'fake_obs': {key: value for key, value in OBS_OPTIONS.items() if key != 'media_duration'},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        print(f"Compared with {args.compare}:", file=sys.stderr)
+        if compare(results, args.compare, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,311 @@
+"""Crash-safe record of the playlist and the broadcast, replayed on the next start
+
+Every playlist edit and every playout event (start, cut, re-base, stop) is
+appended to a JSON-lines file. Appends only queue the line, so the GUI and
+the broadcast thread never wait on the disk; a writer thread flushes and
+fsyncs whatever has queued every SYNC_INTERVAL, so a crash or power cut
+loses at most that much. Replaying the file rebuilds the playlist with its
+probed durations and, if a broadcast was live, the point it had reached:
+each position record pairs the wall clock with the schedule position, so
+the broadcast picks up where the clock says it should be now. Compaction
+rewrites the file as one snapshot line once enough records pile up.
+"""
+import json
+import os
+import threading
+import time
+
+from app_paths import get_config_dir
+from playlist_store import PlaylistStore, RepeatBlock
+
+# Seconds between fsyncs; also the most a crash can lose
+SYNC_INTERVAL = 0.5
+
+# Records appended since the last snapshot before the file is compacted
+COMPACT_AFTER = 5000
+
+
+def encode_row(row, duration):
+    if type(row) is RepeatBlock:
+        return {'repeat': row.to_dict(), 'duration': duration}
+    return {'filepath': row, 'duration': duration}
+
+
+def decode_row(data):
+    if 'repeat' in data:
+        return RepeatBlock.from_dict(data['repeat']), float(data['duration'])
+    return data['filepath'], float(data['duration'])
+
+
+class JournaledPlaylist(PlaylistStore):
+    """A PlaylistStore that appends each edit to a journal after applying it"""
+
+    def __init__(self, journal=None, items=(), start_time=0):
+        self.journal = None
+        super().__init__(items, start_time)
+        self.journal = journal
+
+    def log(self, op, **fields):
+        if self.journal:
+            self.journal.append(op, **fields)
+
+    def insert(self, position, items):
+        items = list(items)
+        if not items:
+            return
+        super().insert(position, items)
+        self.log('insert', position=position, rows=[encode_row(row, duration) for row, duration in items])
+
+    def delete(self, indices):
+        indices = list(indices)
+        if not indices:
+            return
+        super().delete(indices)
+        self.log('delete', indices=indices)
+
+    def delete_range(self, start, stop):
+        if start >= stop:
+            return
+        super().delete_range(start, stop)
+        self.log('delete_range', start=start, stop=stop)
+
+    def move_range(self, start, stop, to):
+        super().move_range(start, stop, to)
+        self.log('move_range', start=start, stop=stop, to=to)
+
+    def swap(self, i, j):
+        super().swap(i, j)
+        self.log('swap', i=i, j=j)
+
+    def set_duration(self, filepath, duration):
+        positions = super().set_duration(filepath, duration)
+        if positions:
+            self.log('set_duration', filepath=filepath, duration=duration)
+        return positions
+
+    def set_start_time(self, start_time):
+        if start_time != self.start_time:
+            super().set_start_time(start_time)
+            self.log('set_start_time', start_time=start_time)
+
+    def clear(self):
+        super().clear()
+        self.log('clear')
+
+    def rows(self):
+        return [encode_row(row, duration) for row, duration in zip(self.paths, self.schedule.durations)]
+
+
+class BroadcastJournal:
+    """The journal file, its writer thread, and the state replayed from it
+
+    After open() the playlist attribute holds the replayed JournaledPlaylist;
+    use it as the application's playlist so later edits are journaled too.
+    broadcast is the settings of a broadcast that never logged a stop (None
+    if it stopped cleanly), position the last (wall clock, schedule position)
+    pair and scenes the playout mode OBS scenes were last set up for.
+    """
+
+    def __init__(self, path, sync_interval=SYNC_INTERVAL, compact_after=COMPACT_AFTER):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.compact_after = compact_after
+        self.playlist = JournaledPlaylist()
+        self.broadcast = None
+        self.position = None
+        self.scenes = None
+        self.pending = []
+        self.since_compact = 0
+        # pending and the playout state are guarded by buffer_lock; the file by file_lock
+        self.buffer_lock = threading.Lock()
+        self.file_lock = threading.Lock()
+        self.file = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def open(self):
+        """Replay the file, rewrite it compacted, and start the writer thread"""
+        replayed = self.replay()
+        self.compact()
+        self.playlist.journal = self
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return replayed
+
+    def close(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        self.sync()
+        with self.file_lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    # --- replay -------------------------------------------------------
+
+    def replay(self):
+        """Apply every record in the file; returns how many were applied"""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return 0
+        applied = 0
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by the crash; everything before it is good
+                    print(f"⚠️ Journal ends in a partial record after {applied} records")
+                    break
+                try:
+                    self.apply(record)
+                except (KeyError, IndexError, TypeError, ValueError) as e:
+                    print(f"⚠️ Skipped journal record {record.get('op')}: {e}")
+                    continue
+                applied += 1
+        return applied
+
+    def apply(self, record):
+        op = record['op']
+        playlist = self.playlist
+        if op == 'snapshot':
+            playlist.clear()
+            playlist.insert(0, [decode_row(row) for row in record['rows']])
+            playlist.set_start_time(record['start_time'])
+            self.broadcast = record.get('broadcast')
+            self.position = record.get('position')
+            self.scenes = record.get('scenes')
+        elif op == 'insert':
+            playlist.insert(record['position'], [decode_row(row) for row in record['rows']])
+        elif op == 'delete':
+            playlist.delete(record['indices'])
+        elif op == 'delete_range':
+            playlist.delete_range(record['start'], record['stop'])
+        elif op == 'move_range':
+            playlist.move_range(record['start'], record['stop'], record['to'])
+        elif op == 'swap':
+            playlist.swap(record['i'], record['j'])
+        elif op == 'set_duration':
+            playlist.set_duration(record['filepath'], record['duration'])
+        elif op == 'set_start_time':
+            playlist.set_start_time(record['start_time'])
+        elif op == 'clear':
+            playlist.clear()
+        else:
+            self.apply_playout(record)
+
+    def apply_playout(self, record):
+        op = record['op']
+        if op == 'start':
+            self.broadcast = record['settings']
+            self.position = {'wall': record['wall'], 'elapsed': record['elapsed'], 'index': -1}
+        elif op == 'position':
+            self.position = {'wall': record['wall'], 'elapsed': record['elapsed'], 'index': record['index']}
+        elif op == 'stop':
+            self.broadcast = None
+            self.position = None
+        elif op == 'scenes':
+            self.scenes = record['mode']
+        else:
+            raise ValueError(f"unknown op {op}")
+
+    def resume_point(self):
+        """(start_offset, settings) to carry on an interrupted broadcast from now, or None
+
+        settings are PlayoutEngine.start() keyword arguments. An anchored
+        broadcast gets its anchor moved by any skips and jumps made while it
+        ran, so it stays where the last cut put it on the wall clock.
+        """
+        with self.buffer_lock:
+            broadcast, position = self.broadcast, self.position
+        if broadcast is None or position is None or not len(self.playlist):
+            return None
+        top = position['wall'] - position['elapsed']
+        settings = dict(broadcast)
+        if settings.get('anchor') is not None:
+            settings['anchor'] = top
+        return time.time() - top, settings
+
+    # --- recording ----------------------------------------------------
+
+    def append(self, op, **fields):
+        """Queue a record; the writer thread makes it durable within sync_interval"""
+        record = {'op': op, **fields}
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self.buffer_lock:
+            if op in ('start', 'position', 'stop', 'scenes'):
+                self.apply_playout(record)
+            self.pending.append(line)
+
+    def broadcast_started(self, settings, elapsed):
+        self.append('start', settings=settings, wall=time.time(), elapsed=elapsed)
+
+    def record_position(self, index, elapsed):
+        self.append('position', index=index, wall=time.time(), elapsed=elapsed)
+
+    def broadcast_stopped(self):
+        self.append('stop', wall=time.time())
+
+    def scenes_ready(self, mode):
+        self.append('scenes', mode=mode)
+
+    # --- writing ------------------------------------------------------
+
+    def run(self):
+        while not self.stopped.wait(self.sync_interval):
+            try:
+                self.sync()
+            except OSError as e:
+                print(f"⚠️ Could not write the broadcast journal: {e}")
+
+    def sync(self):
+        """Write and fsync everything queued so far"""
+        with self.file_lock:
+            with self.buffer_lock:
+                lines, self.pending = self.pending, []
+            if not lines or self.file is None:
+                return
+            self.file.write(''.join(lines).encode('utf-8'))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.since_compact += len(lines)
+
+    def needs_compaction(self):
+        return self.since_compact + len(self.pending) >= self.compact_after
+
+    def compact(self):
+        """Replace the file with one snapshot of the current state
+
+        Call it from the thread that edits the playlist, so no edit can land
+        between reading the rows and dropping the queued records they cover.
+        """
+        rows = self.playlist.rows()
+        start_time = self.playlist.start_time
+        temp_path = self.path + '.tmp'
+        with self.file_lock:
+            with self.buffer_lock:
+                self.pending = []
+                snapshot = {'op': 'snapshot', 'rows': rows, 'start_time': start_time, 'broadcast': self.broadcast,
+                            'position': self.position, 'scenes': self.scenes}
+            with open(temp_path, 'wb') as f:
+                f.write((json.dumps(snapshot, separators=(',', ':')) + '\n').encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            if self.file:
+                self.file.close()
+            os.replace(temp_path, self.path)
+            self.file = open(self.path, 'ab')
+            self.since_compact = 0
+
+
+def open_broadcast_journal(path=None):
+    """Open and replay the journal, or return None if the config folder is not writable"""
+    journal = BroadcastJournal(path or os.path.join(get_config_dir(), 'broadcast_journal.jsonl'))
+    try:
+        journal.open()
+    except OSError as e:
+        print(f"⚠️ Broadcast journal disabled: {e}")
+        return None
+    return journal
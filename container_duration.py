@@ -0,0 +1,313 @@
+"""Read a video's duration straight from its container header, without ffprobe
+
+Covers MP4/MOV (moov/mvhd), Matroska/WebM (Segment Info) and FLV
+(onMetaData). Only box and element headers are read while seeking towards
+the one that carries the duration, so even a moov atom at the end of a
+multi-gigabyte file costs a few small reads. Every reader returns None
+when it cannot find a trustworthy duration, and the caller falls back to
+ffprobe.
+"""
+import struct
+
+MP4_TOP_LEVEL = {b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pnot', b'uuid', b'meta', b'styp'}
+EBML_MAGIC = b'\x1a\x45\xdf\xa3'
+
+# Matroska element IDs
+MKV_SEGMENT = 0x18538067
+MKV_SEEK_HEAD = 0x114D9B74
+MKV_SEEK = 0x4DBB
+MKV_SEEK_ID = 0x53AB
+MKV_SEEK_POSITION = 0x53AC
+MKV_INFO = 0x1549A966
+MKV_TIMESTAMP_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_CLUSTER = 0x1F43B675
+
+# Bigger metadata blocks than this are not a header worth parsing
+MAX_HEADER_BYTES = 1 << 20
+
+
+class ContainerError(Exception):
+    pass
+
+
+def read_exact(f, count):
+    data = f.read(count)
+    if len(data) != count:
+        raise ContainerError("truncated file")
+    return data
+
+
+def read_duration(filepath):
+    """Return (duration in seconds, container name) from the header, or None if it cannot be read"""
+    try:
+        with open(filepath, 'rb') as f:
+            head = f.read(12)
+            f.seek(0)
+            if head[:3] == b'FLV':
+                container, duration = 'flv', flv_duration(f)
+            elif head[:4] == EBML_MAGIC:
+                container, duration = 'matroska', matroska_duration(f)
+            elif head[4:8] in MP4_TOP_LEVEL:
+                container, duration = 'mp4', mp4_duration(f)
+            else:
+                return None
+    except (OSError, ContainerError, struct.error, ValueError, IndexError):
+        return None
+    if duration is None or not 0 < duration < 10 * 24 * 3600:
+        return None
+    return duration, container
+
+
+# --- MP4 / MOV ---------------------------------------------------------
+
+def mp4_boxes(f, start, end):
+    """Yield (type, payload offset, payload size) for each box between start and end"""
+    offset = start
+    while end is None or offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', read_exact(f, 8))[0]
+            header_size = 16
+        elif size == 0:
+            f.seek(0, 2)
+            size = f.tell() - offset
+        if size < header_size:
+            raise ContainerError(f"bad {box_type!r} box size")
+        yield box_type, offset + header_size, size - header_size
+        offset += size
+
+
+def mp4_duration(f):
+    for box_type, offset, size in mp4_boxes(f, 0, None):
+        if box_type == b'moov':
+            return moov_duration(f, offset, offset + size)
+    return None
+
+
+def moov_duration(f, start, end):
+    movie_timescale = None
+    for box_type, offset, size in mp4_boxes(f, start, end):
+        if box_type == b'mvhd':
+            f.seek(offset)
+            version = read_exact(f, 4)[0]
+            if version == 1:
+                _, _, timescale, length = struct.unpack('>QQIQ', read_exact(f, 28))
+                unknown = 0xFFFFFFFFFFFFFFFF
+            else:
+                _, _, timescale, length = struct.unpack('>IIII', read_exact(f, 16))
+                unknown = 0xFFFFFFFF
+            if timescale and length not in (0, unknown):
+                return length / timescale
+            movie_timescale = timescale
+        elif box_type == b'mvex' and movie_timescale:
+            # Fragmented MP4: the movie length lives in mvex/mehd, in mvhd's timescale
+            for child_type, child_offset, _ in mp4_boxes(f, offset, offset + size):
+                if child_type == b'mehd':
+                    f.seek(child_offset)
+                    version = read_exact(f, 4)[0]
+                    length = struct.unpack('>Q' if version == 1 else '>I', read_exact(f, 8 if version == 1 else 4))[0]
+                    return length / movie_timescale if length else None
+    return None
+
+
+# --- Matroska / WebM ---------------------------------------------------
+
+def ebml_id(f):
+    first = read_exact(f, 1)[0]
+    length = 1
+    mask = 0x80
+    while length <= 4 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 4:
+        raise ContainerError("bad element id")
+    value = first
+    for byte in read_exact(f, length - 1):
+        value = (value << 8) | byte
+    return value
+
+
+def ebml_size(f):
+    """Element data size, or None for the 'unknown size' marker"""
+    first = read_exact(f, 1)[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ContainerError("bad element size")
+    value = first & (mask - 1)
+    all_ones = value == mask - 1
+    for byte in read_exact(f, length - 1):
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    return None if all_ones else value
+
+
+def ebml_elements(f, start, end):
+    """Yield (id, data offset, data size) for each element between start and end"""
+    offset = start
+    while end is None or offset < end:
+        f.seek(offset)
+        try:
+            element_id = ebml_id(f)
+            size = ebml_size(f)
+        except ContainerError:
+            return
+        data_offset = f.tell()
+        yield element_id, data_offset, size
+        if size is None:
+            return
+        offset = data_offset + size
+
+
+def ebml_uint(f, offset, size):
+    f.seek(offset)
+    return int.from_bytes(read_exact(f, size), 'big')
+
+
+def ebml_float(f, offset, size):
+    f.seek(offset)
+    if size == 4:
+        return struct.unpack('>f', read_exact(f, 4))[0]
+    if size == 8:
+        return struct.unpack('>d', read_exact(f, 8))[0]
+    raise ContainerError("bad float size")
+
+
+def matroska_duration(f):
+    for element_id, offset, size in ebml_elements(f, 0, None):
+        if element_id == MKV_SEGMENT:
+            return segment_duration(f, offset, None if size is None else offset + size)
+    return None
+
+
+def segment_duration(f, segment_start, segment_end):
+    info_position = None
+    for element_id, offset, size in ebml_elements(f, segment_start, segment_end):
+        if element_id == MKV_INFO and size is not None:
+            return info_duration(f, offset, offset + size)
+        if element_id == MKV_SEEK_HEAD and size is not None:
+            info_position = seek_head_info(f, offset, offset + size)
+        elif element_id == MKV_CLUSTER or size is None:
+            # Media data starts here; Info, if it exists, is wherever SeekHead says
+            break
+    if info_position is None:
+        return None
+    f.seek(segment_start + info_position)
+    if ebml_id(f) != MKV_INFO:
+        return None
+    size = ebml_size(f)
+    if size is None:
+        return None
+    offset = f.tell()
+    return info_duration(f, offset, offset + size)
+
+
+def seek_head_info(f, start, end):
+    for element_id, offset, size in ebml_elements(f, start, end):
+        if element_id != MKV_SEEK or size is None:
+            continue
+        target = position = None
+        for child_id, child_offset, child_size in ebml_elements(f, offset, offset + size):
+            if child_id == MKV_SEEK_ID:
+                target = ebml_uint(f, child_offset, child_size)
+            elif child_id == MKV_SEEK_POSITION:
+                position = ebml_uint(f, child_offset, child_size)
+        if target == MKV_INFO and position is not None:
+            return position
+    return None
+
+
+def info_duration(f, start, end):
+    timestamp_scale = 1000000
+    duration = None
+    for element_id, offset, size in ebml_elements(f, start, end):
+        if element_id == MKV_TIMESTAMP_SCALE:
+            timestamp_scale = ebml_uint(f, offset, size)
+        elif element_id == MKV_DURATION:
+            duration = ebml_float(f, offset, size)
+    if duration is None:
+        return None
+    return duration * timestamp_scale / 1e9
+
+
+# --- FLV ---------------------------------------------------------------
+
+def flv_duration(f):
+    header = read_exact(f, 9)
+    data_offset = struct.unpack('>I', header[5:9])[0]
+    # Skip PreviousTagSize0 and look for the script tag that carries onMetaData
+    f.seek(data_offset + 4)
+    for _ in range(8):
+        tag = f.read(11)
+        if len(tag) < 11:
+            return None
+        tag_type = tag[0] & 0x1F
+        data_size = int.from_bytes(tag[1:4], 'big')
+        if tag_type == 18 and data_size <= MAX_HEADER_BYTES:
+            data = read_exact(f, data_size)
+            metadata = amf_script_data(data)
+            if metadata is not None:
+                duration = metadata.get('duration')
+                return float(duration) if isinstance(duration, (int, float)) else None
+        else:
+            f.seek(data_size, 1)
+        f.seek(4, 1)
+    return None
+
+
+def amf_script_data(data):
+    """The onMetaData properties from an FLV script tag, or None if it is some other message"""
+    name, offset = amf_value(data, 0)
+    if name != 'onMetaData':
+        return None
+    value, _ = amf_value(data, offset)
+    return value if isinstance(value, dict) else None
+
+
+def amf_value(data, offset):
+    """Decode one AMF0 value; returns (value, offset after it)"""
+    marker = data[offset]
+    offset += 1
+    if marker == 0x00:
+        return struct.unpack_from('>d', data, offset)[0], offset + 8
+    if marker == 0x01:
+        return bool(data[offset]), offset + 1
+    if marker == 0x02:
+        length = struct.unpack_from('>H', data, offset)[0]
+        return data[offset + 2:offset + 2 + length].decode('utf-8', 'replace'), offset + 2 + length
+    if marker in (0x03, 0x08):
+        if marker == 0x08:
+            offset += 4
+        properties = {}
+        while offset + 3 <= len(data):
+            length = struct.unpack_from('>H', data, offset)[0]
+            if length == 0 and data[offset + 2] == 0x09:
+                return properties, offset + 3
+            key = data[offset + 2:offset + 2 + length].decode('utf-8', 'replace')
+            properties[key], offset = amf_value(data, offset + 2 + length)
+        return properties, offset
+    if marker in (0x05, 0x06):
+        return None, offset
+    if marker == 0x0A:
+        count = struct.unpack_from('>I', data, offset)[0]
+        offset += 4
+        items = []
+        for _ in range(count):
+            item, offset = amf_value(data, offset)
+            items.append(item)
+        return items, offset
+    if marker == 0x0B:
+        return struct.unpack_from('>d', data, offset)[0], offset + 10
+    if marker == 0x0C:
+        length = struct.unpack_from('>I', data, offset)[0]
+        return data[offset + 4:offset + 4 + length].decode('utf-8', 'replace'), offset + 4 + length
+    raise ContainerError(f"unsupported AMF0 marker {marker:#x}")
@@ -0,0 +1,609 @@
+"""A local stand-in for OBS that speaks enough WebSocket v5 to drive the scheduler
+
+    python fake_obs_server.py --port 4455 --password Abcd!234 --latency 0.02 --fail-rate 0.05
+
+It keeps scenes, inputs and the program scene in memory, "plays" media inputs
+on program for a configurable duration and sends MediaInputPlaybackStarted /
+MediaInputPlaybackEnded events. Response latency, dropped requests and failed
+requests can be injected so connect_obs, setup_obs_scenes and the broadcast
+loop can be measured on any machine. Only the Python standard library is used.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# EventSubscription.MediaInputs
+MEDIA_INPUT_EVENTS = 1 << 8
+
+# RequestStatus codes used by OBS
+SUCCESS = 100
+MISSING_REQUEST_FIELD = 300
+UNKNOWN_REQUEST_TYPE = 204
+RESOURCE_NOT_FOUND = 600
+RESOURCE_ALREADY_EXISTS = 601
+REQUEST_PROCESSING_FAILED = 702
+
+MEDIA_STATE_NONE = 'OBS_MEDIA_STATE_NONE'
+MEDIA_STATE_PLAYING = 'OBS_MEDIA_STATE_PLAYING'
+MEDIA_STATE_STOPPED = 'OBS_MEDIA_STATE_STOPPED'
+MEDIA_STATE_ENDED = 'OBS_MEDIA_STATE_ENDED'
+
+
+class RequestFailed(Exception):
+    def __init__(self, code, comment):
+        super().__init__(comment)
+        self.code = code
+        self.comment = comment
+
+
+class MediaInput:
+    """Playback state of one ffmpeg_source input"""
+
+    def __init__(self):
+        self.state = MEDIA_STATE_NONE
+        self.duration = 0.0
+        self.started_at = None
+        self.cursor = 0.0
+        self.timer = None
+        self.frozen = False
+
+    def position(self):
+        if self.state == MEDIA_STATE_PLAYING and not self.frozen:
+            return min(self.cursor + time.monotonic() - self.started_at, self.duration)
+        return self.cursor
+
+
+class ClientConnection(socketserver.BaseRequestHandler):
+    """One WebSocket client: handshake, Hello/Identify, then requests until it closes"""
+
+    def setup(self):
+        self.send_lock = threading.Lock()
+        self.identified = False
+        self.subscriptions = 0
+        self.buffer = b''
+
+    def handle(self):
+        fake = self.server.fake
+        if not self.handshake():
+            return
+        challenge = base64.b64encode(os.urandom(32)).decode()
+        salt = base64.b64encode(os.urandom(32)).decode()
+        hello = {'obsWebSocketVersion': fake.websocket_version, 'rpcVersion': 1}
+        if fake.password:
+            hello['authentication'] = {'challenge': challenge, 'salt': salt}
+        self.send_message({'op': 0, 'd': hello})
+
+        fake.add_client(self)
+        try:
+            while True:
+                message = self.read_message()
+                if message is None:
+                    return
+                op = message.get('op')
+                data = message.get('d', {})
+                if op == 1:
+                    if fake.password and data.get('authentication') != auth_response(fake.password, salt, challenge):
+                        self.send_close(4009, "Authentication failed.")
+                        return
+                    self.identified = True
+                    self.subscriptions = data.get('eventSubscriptions', 0) or 0
+                    self.send_message({'op': 2, 'd': {'negotiatedRpcVersion': 1}})
+                elif op == 3:
+                    self.subscriptions = data.get('eventSubscriptions', self.subscriptions) or 0
+                elif not self.identified:
+                    self.send_close(4007, "Not identified.")
+                    return
+                elif op == 6:
+                    if fake.delay_or_drop():
+                        self.send_message({'op': 7, 'd': fake.handle_request(data)})
+                elif op == 8:
+                    if fake.delay_or_drop():
+                        results = fake.handle_batch(data)
+                        self.send_message({'op': 9, 'd': {'requestId': data.get('requestId'), 'results': results}})
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            fake.remove_client(self)
+
+    # --- RFC 6455 framing ---------------------------------------------
+
+    def recv_exact(self, count):
+        while len(self.buffer) < count:
+            chunk = self.request.recv(65536)
+            if not chunk:
+                raise ConnectionError("client went away")
+            self.buffer += chunk
+        data, self.buffer = self.buffer[:count], self.buffer[count:]
+        return data
+
+    def handshake(self):
+        while b'\r\n\r\n' not in self.buffer:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return False
+            self.buffer += chunk
+        head, self.buffer = self.buffer.split(b'\r\n\r\n', 1)
+        headers = {}
+        for line in head.decode('latin-1').split('\r\n')[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get('sec-websocket-key')
+        if not key:
+            self.request.sendall(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return False
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        response = ("HTTP/1.1 101 Switching Protocols\r\n"
+                    "Upgrade: websocket\r\n"
+                    "Connection: Upgrade\r\n"
+                    f"Sec-WebSocket-Accept: {accept}\r\n")
+        if 'obswebsocket.json' in headers.get('sec-websocket-protocol', ''):
+            response += "Sec-WebSocket-Protocol: obswebsocket.json\r\n"
+        self.request.sendall((response + "\r\n").encode())
+        return True
+
+    def read_frame(self):
+        first, second = self.recv_exact(2)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', self.recv_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self.recv_exact(8))[0]
+        mask = self.recv_exact(4) if second & 0x80 else None
+        payload = self.recv_exact(length)
+        if mask and length:
+            # XOR the whole payload at once; a byte loop is far too slow for big batches
+            key = (mask * (length // 4 + 1))[:length]
+            payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+        return bool(first & 0x80), opcode, payload
+
+    def read_message(self):
+        """Next text message as JSON, answering pings; None once the client closes"""
+        parts = []
+        while True:
+            fin, opcode, payload = self.read_frame()
+            if opcode == 0x8:
+                self.send_frame(0x8, payload[:2])
+                return None
+            if opcode == 0x9:
+                self.send_frame(0xA, payload)
+                continue
+            if opcode == 0xA:
+                continue
+            parts.append(payload)
+            if fin:
+                return json.loads(b''.join(parts).decode('utf-8'))
+
+    def send_frame(self, opcode, payload):
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([length])
+        elif length < 1 << 16:
+            header += bytes([126]) + struct.pack('!H', length)
+        else:
+            header += bytes([127]) + struct.pack('!Q', length)
+        with self.send_lock:
+            self.request.sendall(header + payload)
+
+    def send_message(self, message):
+        self.send_frame(0x1, json.dumps(message).encode('utf-8'))
+
+    def send_close(self, code, reason):
+        try:
+            self.send_frame(0x8, struct.pack('!H', code) + reason.encode('utf-8'))
+        except OSError:
+            pass
+
+
+class FakeOBSServer:
+    """In-memory OBS with WebSocket v5 request handling and fault injection
+
+    latency and jitter delay every response (a batch counts as one message),
+    drop_rate silently swallows a request or batch, fail_rate answers a request
+    with an error, and fail_requests always fails the named request types.
+    media_duration maps a local_file path to how long it plays, in seconds.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, password='', latency=0.0, jitter=0.0, drop_rate=0.0,
+                 fail_rate=0.0, fail_requests=(), media_duration=None, seed=None):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.fail_rate = fail_rate
+        self.fail_requests = set(fail_requests)
+        self.media_duration = media_duration or (lambda filepath: 60.0)
+        self.random = random.Random(seed)
+        self.websocket_version = '5.0.0-fake'
+
+        self.lock = threading.RLock()
+        self.scenes = {}
+        self.inputs = {}
+        self.media = {}
+        self.program_scene = None
+        self.clients = set()
+        self.next_item_id = 1
+
+        self.request_count = 0
+        self.dropped = 0
+        self.failed = 0
+        self.program_changes = []
+        self.server = None
+        self.thread = None
+
+    # --- lifecycle ------------------------------------------------------
+
+    def start(self):
+        """Listen in a background thread; port 0 picks a free port"""
+        self.server = socketserver.ThreadingTCPServer((self.host, self.port), ClientConnection, bind_and_activate=False)
+        self.server.daemon_threads = True
+        self.server.allow_reuse_address = True
+        self.server.server_bind()
+        self.server.server_activate()
+        self.server.fake = self
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.lock:
+            for media in self.media.values():
+                if media.timer:
+                    media.timer.cancel()
+        self.drop_clients()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def obs_settings(self):
+        """Keyword arguments for obsws_python clients pointed at this server"""
+        return {'host': self.host, 'port': self.port, 'password': self.password, 'timeout': 3}
+
+    def add_client(self, client):
+        with self.lock:
+            self.clients.add(client)
+
+    def remove_client(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    # --- fault injection ------------------------------------------------
+
+    def drop_clients(self):
+        """Cut every client's socket, as OBS restarting or a network blip would; the server keeps listening"""
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        return len(clients)
+
+    def freeze_media(self):
+        """Stick every playing input on its current frame, still reporting PLAYING, until it is restarted"""
+        with self.lock:
+            frozen = [name for name, media in self.media.items() if media.state == MEDIA_STATE_PLAYING]
+            for name in frozen:
+                media = self.media[name]
+                media.cursor = media.position()
+                media.frozen = True
+                if media.timer:
+                    media.timer.cancel()
+                    media.timer = None
+        return frozen
+
+    def delay_or_drop(self):
+        """Apply response latency; False if this message should get no answer"""
+        with self.lock:
+            drop = self.random.random() < self.drop_rate
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if drop:
+                self.dropped += 1
+        if delay > 0:
+            time.sleep(delay)
+        return not drop
+
+    # --- requests -------------------------------------------------------
+
+    def handle_batch(self, batch):
+        results = []
+        for request in batch.get('requests', []):
+            result = self.handle_request(request)
+            results.append(result)
+            if batch.get('haltOnFailure') and not result['requestStatus']['result']:
+                break
+        return results
+
+    def handle_request(self, request):
+        request_type = request.get('requestType')
+        response = {'requestType': request_type, 'requestId': request.get('requestId')}
+        with self.lock:
+            self.request_count += 1
+            injected = request_type in self.fail_requests or self.random.random() < self.fail_rate
+            if injected:
+                self.failed += 1
+        if injected:
+            response['requestStatus'] = {'result': False, 'code': REQUEST_PROCESSING_FAILED,
+                                         'comment': "Injected failure."}
+            return response
+
+        handler = getattr(self, 'request_' + (request_type or ''), None)
+        if handler is None:
+            response['requestStatus'] = {'result': False, 'code': UNKNOWN_REQUEST_TYPE,
+                                         'comment': f"Your request type `{request_type}` is not valid."}
+            return response
+        try:
+            with self.lock:
+                data = handler(request.get('requestData') or {})
+        except RequestFailed as e:
+            response['requestStatus'] = {'result': False, 'code': e.code, 'comment': e.comment}
+            return response
+        response['requestStatus'] = {'result': True, 'code': SUCCESS}
+        if data is not None:
+            response['responseData'] = data
+        return response
+
+    def field(self, data, name):
+        if name not in data:
+            raise RequestFailed(MISSING_REQUEST_FIELD, f"Your request is missing the `{name}` field.")
+        return data[name]
+
+    def scene(self, name):
+        if name not in self.scenes:
+            raise RequestFailed(RESOURCE_NOT_FOUND, f"No source was found by the name of `{name}`.")
+        return self.scenes[name]
+
+    def input(self, name):
+        if name not in self.inputs:
+            raise RequestFailed(RESOURCE_NOT_FOUND, f"No source was found by the name of `{name}`.")
+        return self.inputs[name]
+
+    def request_GetVersion(self, data):
+        return {'obsVersion': '30.0.0-fake', 'obsWebSocketVersion': self.websocket_version, 'rpcVersion': 1,
+                'availableRequests': sorted(name[len('request_'):] for name in dir(self)
+                                            if name.startswith('request_')),
+                'supportedImageFormats': [], 'platform': 'fake', 'platformDescription': 'fake_obs_server'}
+
+    def request_GetSceneList(self, data):
+        scenes = [{'sceneIndex': i, 'sceneName': name} for i, name in enumerate(reversed(list(self.scenes)))]
+        return {'currentProgramSceneName': self.program_scene, 'currentPreviewSceneName': None, 'scenes': scenes}
+
+    def request_CreateScene(self, data):
+        name = self.field(data, 'sceneName')
+        if name in self.scenes or name in self.inputs:
+            raise RequestFailed(RESOURCE_ALREADY_EXISTS, "A source already exists by that scene name.")
+        self.scenes[name] = []
+        if self.program_scene is None:
+            self.program_scene = name
+        return None
+
+    def request_RemoveScene(self, data):
+        name = self.field(data, 'sceneName')
+        self.scene(name)
+        del self.scenes[name]
+        if self.program_scene == name:
+            self.program_scene = next(iter(self.scenes), None)
+            self.activate(self.program_scene)
+        return None
+
+    def request_CreateInput(self, data):
+        scene_name = self.field(data, 'sceneName')
+        name = self.field(data, 'inputName')
+        scene = self.scene(scene_name)
+        if name in self.inputs or name in self.scenes:
+            raise RequestFailed(RESOURCE_ALREADY_EXISTS, "A source already exists by that input name.")
+        self.inputs[name] = {'inputKind': self.field(data, 'inputKind'),
+                             'inputSettings': dict(data.get('inputSettings') or {})}
+        if self.inputs[name]['inputKind'] == 'ffmpeg_source':
+            self.media[name] = MediaInput()
+        scene.append(name)
+        item_id = self.next_item_id
+        self.next_item_id += 1
+        if scene_name == self.program_scene:
+            self.start_media(name)
+        return {'inputUuid': f'fake-{item_id}', 'sceneItemId': item_id}
+
+    def request_CreateSceneItem(self, data):
+        scene = self.scene(self.field(data, 'sceneName'))
+        source = self.field(data, 'sourceName')
+        self.input(source)
+        scene.append(source)
+        item_id = self.next_item_id
+        self.next_item_id += 1
+        return {'sceneItemId': item_id}
+
+    def request_RemoveInput(self, data):
+        name = self.field(data, 'inputName')
+        self.input(name)
+        self.stop_media(name)
+        del self.inputs[name]
+        self.media.pop(name, None)
+        for scene in self.scenes.values():
+            while name in scene:
+                scene.remove(name)
+        return None
+
+    def request_GetInputSettings(self, data):
+        source = self.input(self.field(data, 'inputName'))
+        return {'inputKind': source['inputKind'], 'inputSettings': dict(source['inputSettings'])}
+
+    def request_SetInputSettings(self, data):
+        name = self.field(data, 'inputName')
+        source = self.input(name)
+        settings = self.field(data, 'inputSettings')
+        if data.get('overlay', True):
+            source['inputSettings'].update(settings)
+        else:
+            source['inputSettings'] = dict(settings)
+        if name in self.media and 'local_file' in settings and name in self.scenes.get(self.program_scene, ()):
+            self.start_media(name)
+        return None
+
+    def request_GetCurrentProgramScene(self, data):
+        return {'currentProgramSceneName': self.program_scene, 'sceneName': self.program_scene}
+
+    def request_SetCurrentProgramScene(self, data):
+        name = self.field(data, 'sceneName')
+        self.scene(name)
+        self.program_changes.append((time.monotonic(), name))
+        if name != self.program_scene:
+            for input_name in self.scenes.get(self.program_scene, ()):
+                self.stop_media(input_name)
+            self.program_scene = name
+            self.activate(name)
+        return None
+
+    def request_GetMediaInputStatus(self, data):
+        name = self.field(data, 'inputName')
+        self.input(name)
+        media = self.media.get(name)
+        if media is None or media.state == MEDIA_STATE_NONE:
+            return {'mediaState': MEDIA_STATE_NONE, 'mediaDuration': None, 'mediaCursor': None}
+        return {'mediaState': media.state, 'mediaDuration': int(media.duration * 1000),
+                'mediaCursor': int(media.position() * 1000)}
+
+    def request_SetMediaInputCursor(self, data):
+        name = self.field(data, 'inputName')
+        self.input(name)
+        media = self.media.get(name)
+        if media is None:
+            raise RequestFailed(REQUEST_PROCESSING_FAILED, "The specified input is not a media input.")
+        media.cursor = max(0.0, min(self.field(data, 'mediaCursor') / 1000, media.duration))
+        if media.state == MEDIA_STATE_PLAYING:
+            media.started_at = time.monotonic()
+            self.schedule_end(name, media)
+        return None
+
+    def request_TriggerMediaInputAction(self, data):
+        name = self.field(data, 'inputName')
+        action = self.field(data, 'mediaAction')
+        self.input(name)
+        if name not in self.media:
+            raise RequestFailed(REQUEST_PROCESSING_FAILED, "The specified input is not a media input.")
+        if action == 'OBS_WEBSOCKET_MEDIA_INPUT_ACTION_RESTART':
+            self.start_media(name)
+        elif action == 'OBS_WEBSOCKET_MEDIA_INPUT_ACTION_STOP':
+            self.stop_media(name)
+        return None
+
+    # --- media playback -------------------------------------------------
+
+    def activate(self, scene_name):
+        for input_name in self.scenes.get(scene_name, ()):
+            if input_name in self.media:
+                self.start_media(input_name)
+
+    def start_media(self, name):
+        """Play an input from the top, the way restart_on_activate does in OBS"""
+        media = self.media[name]
+        local_file = self.inputs[name]['inputSettings'].get('local_file')
+        if media.timer:
+            media.timer.cancel()
+        if not local_file:
+            media.state = MEDIA_STATE_NONE
+            return
+        media.duration = float(self.media_duration(local_file))
+        media.cursor = 0.0
+        media.started_at = time.monotonic()
+        media.state = MEDIA_STATE_PLAYING
+        media.frozen = False
+        self.emit('MediaInputPlaybackStarted', {'inputName': name})
+        self.schedule_end(name, media)
+
+    def stop_media(self, name):
+        media = self.media.get(name)
+        if media and media.state == MEDIA_STATE_PLAYING:
+            media.cursor = media.position()
+            media.state = MEDIA_STATE_STOPPED
+            if media.timer:
+                media.timer.cancel()
+                media.timer = None
+
+    def schedule_end(self, name, media):
+        if media.timer:
+            media.timer.cancel()
+        media.timer = threading.Timer(max(media.duration - media.cursor, 0.0), self.media_ended, args=(name, media))
+        media.timer.daemon = True
+        media.timer.start()
+
+    def media_ended(self, name, media):
+        with self.lock:
+            if self.media.get(name) is not media or media.state != MEDIA_STATE_PLAYING:
+                return
+            media.cursor = media.duration
+            media.state = MEDIA_STATE_ENDED
+            media.timer = None
+            self.emit('MediaInputPlaybackEnded', {'inputName': name})
+
+    def emit(self, event_type, event_data, intent=MEDIA_INPUT_EVENTS):
+        """Send an event to every identified client subscribed to its category"""
+        message = {'op': 5, 'd': {'eventType': event_type, 'eventIntent': intent, 'eventData': event_data}}
+        for client in list(self.clients):
+            if client.identified and client.subscriptions & intent:
+                try:
+                    client.send_message(message)
+                except OSError:
+                    pass
+
+
+def auth_response(password, salt, challenge):
+    """The authentication string a client must send for this password, salt and challenge"""
+    secret = base64.b64encode(hashlib.sha256((password + salt).encode()).digest())
+    return base64.b64encode(hashlib.sha256(secret + challenge.encode()).digest()).decode()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local OBS WebSocket v5 stand-in for testing the scheduler")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4455)
+    parser.add_argument('--password', default='')
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="up to this many extra seconds per response")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="fraction of requests never answered")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="fraction of requests answered with an error")
+    parser.add_argument('--fail-request', action='append', default=[], help="request type that always fails")
+    parser.add_argument('--media-duration', type=float, default=60.0, help="seconds every media file plays for")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    server = FakeOBSServer(args.host, args.port, args.password, latency=args.latency, jitter=args.jitter,
+                           drop_rate=args.drop_rate, fail_rate=args.fail_rate, fail_requests=args.fail_request,
+                           media_duration=lambda filepath: args.media_duration, seed=args.seed)
+    server.start()
+    print(f"🧪 Fake OBS listening on ws://{args.host}:{server.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(f"Requests: {server.request_count}, dropped: {server.dropped}, failed: {server.failed}, "
+              f"scenes: {len(server.scenes)}, program changes: {len(server.program_changes)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
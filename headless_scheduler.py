@@ -0,0 +1,304 @@
+"""Run an exported schedule against OBS without the Tk window
+
+    python headless_scheduler.py schedule.json --password secret --control-port 4460
+
+Operators steer a running broadcast with signals (SIGUSR1 skip, SIGUSR2
+emergency, SIGINT/SIGTERM stop) or by sending one-line commands to the
+localhost control port: skip, jump N, emergency, status, stop.
+"""
+import argparse
+import json
+import signal
+import socketserver
+import threading
+
+from broadcast_journal import BroadcastJournal
+from media_check import PreflightJob, playlist_risks
+from media_watchdog import STALL_THRESHOLD, WATCHDOG_INTERVAL
+from obs_connection import parse_endpoints
+from obs_scenes import PLAYOUT_AB, PLAYOUT_PER_SCENE, provision_scenes
+from playlist_store import PlaylistStore, RepeatBlock
+from playout_engine import PlayoutEngine, anchor_timestamp, time_to_seconds
+from playout_metrics import MetricsFileWriter, start_metrics_server
+from preroll import PREROLL_LEAD
+from probe_cache import open_probe_cache
+
+
+def load_schedule(path):
+    """Read a schedule written by Export Playlist; returns (PlaylistStore, start_time, playout_mode, anchor)
+
+    anchor is (start_date, timezone) for schedules exported with wall-clock anchoring, else None.
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    start_time = data.get('start_time', '00:00:00')
+    rows = []
+    for entry in data.get('videos', []):
+        if 'repeat' in entry:
+            rows.append((RepeatBlock.from_dict(entry['repeat']), 0.0))
+        else:
+            rows.append((entry['filepath'], float(entry['duration'])))
+    videos = PlaylistStore(rows, start_time=time_to_seconds(start_time))
+    anchor = (data['start_date'], data.get('timezone', '')) if data.get('start_date') else None
+    return videos, start_time, data.get('playout_mode', PLAYOUT_PER_SCENE), anchor
+
+
+def preflight(videos):
+    """Check every file in the schedule and print the risky rows; returns how many were flagged"""
+    cache = open_probe_cache()
+    try:
+        files = [videos.filepath(i) for i in range(len(videos)) if not videos.is_repeat(i)]
+        reports = PreflightJob(files, cache=cache).run()
+    finally:
+        if cache:
+            cache.close()
+    if any(report is None for report in reports.values()):
+        print("⚠️ Pre-flight skipped: ffprobe not found")
+        return 0
+    flagged = playlist_risks(videos, reports)
+    for i, filename, risks in flagged:
+        print(f"   ⚠️ #{i + 1} {filename}: {'; '.join(risks)}")
+    print(f"🩺 Pre-flight: {len(reports)} files checked, {len(flagged)} risky rows")
+    return len(flagged)
+
+
+class ControlHandler(socketserver.StreamRequestHandler):
+    """One command per line; every command gets a one-line reply"""
+
+    def handle(self):
+        for line in self.rfile:
+            reply = self.server.scheduler.command(line.decode('utf-8', 'replace').strip())
+            self.wfile.write((reply + '\n').encode('utf-8'))
+
+
+class ControlServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port, scheduler):
+        self.scheduler = scheduler
+        super().__init__(('127.0.0.1', port), ControlHandler)
+
+
+def engine_command(engine, parts):
+    """Run skip, jump N, emergency or status against one engine and return the reply text"""
+    name = parts[0].lower()
+    try:
+        if name == 'skip':
+            engine.skip_to_next()
+        elif name == 'jump':
+            index = int(parts[1]) - 1
+            if not 0 <= index < len(engine.videos):
+                return f'error no video #{parts[1]}'
+            engine.jump_to(index)
+        elif name == 'emergency':
+            engine.emergency_scene()
+        elif name == 'status':
+            return json.dumps(engine.status())
+        else:
+            return f'error unknown command {name}'
+    except Exception as e:
+        return f'error {e}'
+    return 'ok'
+
+
+class SchedulerServices:
+    """Signals, the control port and metrics output around a scheduler's command()
+
+    Subclasses implement command(line) and set self.stopped when a stop is requested.
+    """
+
+    def __init__(self):
+        self.stopped = threading.Event()
+        self.control_server = None
+        self.metrics_server = None
+        self.metrics_writer = None
+
+    def command(self, line):
+        raise NotImplementedError
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGINT, lambda signum, frame: self.stopped.set())
+        if hasattr(signal, 'SIGTERM'):
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stopped.set())
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.command('skip'))
+        if hasattr(signal, 'SIGUSR2'):
+            signal.signal(signal.SIGUSR2, lambda signum, frame: self.command('emergency'))
+
+    def start_control_server(self, port):
+        self.control_server = ControlServer(port, self)
+        threading.Thread(target=self.control_server.serve_forever, daemon=True).start()
+        print(f"🎛 Control port listening on 127.0.0.1:{self.control_server.server_address[1]}")
+
+    def start_metrics(self, port=None, path=None):
+        if port is not None:
+            self.metrics_server = start_metrics_server(port)
+            print(f"📈 Metrics on http://127.0.0.1:{self.metrics_server.server_address[1]}/metrics")
+        if path:
+            self.metrics_writer = MetricsFileWriter(path).start()
+            print(f"📈 Writing metrics to {path}")
+
+    def stop_services(self):
+        """Close the control port and the metrics server and writer"""
+        if self.control_server:
+            self.control_server.shutdown()
+            self.control_server.server_close()
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+        if self.metrics_writer:
+            self.metrics_writer.stop()
+
+
+class HeadlessScheduler(SchedulerServices):
+    """Owns a PlayoutEngine and turns signals and control commands into engine calls"""
+
+    def __init__(self, videos, obs_settings):
+        super().__init__()
+        self.videos = videos
+        self.engine = PlayoutEngine(self.videos, obs_settings)
+        self.journal = None
+
+    def use_journal(self, journal):
+        """Journal playout events; journal.playlist must be the playlist being played"""
+        self.journal = journal
+        self.engine.journal = journal
+
+    def command(self, line):
+        """Run one control command and return the reply text"""
+        parts = line.split()
+        if not parts:
+            return 'error empty command'
+        if parts[0].lower() == 'stop':
+            self.stopped.set()
+            return 'ok'
+        return engine_command(self.engine, parts)
+
+    def run(self, start_offset, playout_mode, precise_timing=True, event_switching=False, anchor=None,
+            preroll_lead=PREROLL_LEAD, watchdog_interval=WATCHDOG_INTERVAL, stall_threshold=STALL_THRESHOLD):
+        """Broadcast until stopped by a signal or the stop command"""
+        self.engine.start(start_offset, precise_timing=precise_timing, playout_mode=playout_mode,
+                          event_switching=event_switching, anchor=anchor, preroll_lead=preroll_lead,
+                          watchdog_interval=watchdog_interval, stall_threshold=stall_threshold)
+        print(f"🔴 Broadcasting {len(self.videos)} videos from {self.engine.manual_time_offset:.0f}s")
+        # Short waits keep the main thread responsive to signals on Windows
+        while not self.stopped.wait(0.5):
+            if self.journal and self.journal.needs_compaction():
+                self.journal.compact()
+        self.shutdown()
+
+    def shutdown(self):
+        self.engine.stop()
+        self.stop_services()
+        self.engine.disconnect()
+        if self.journal:
+            self.journal.close()
+        print("Broadcast stopped")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play an exported OBS schedule without the GUI")
+    parser.add_argument('schedule', help="schedule JSON written by Export Playlist")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4455)
+    parser.add_argument('--password', default='')
+    parser.add_argument('--fallback', action='append', default=[], metavar='HOST:PORT',
+                        help="another OBS to try if --host does not answer (repeatable; same password)")
+    parser.add_argument('--start', help="start position HH:MM:SS (default: the schedule's start time)")
+    parser.add_argument('--mode', choices=[PLAYOUT_PER_SCENE, PLAYOUT_AB],
+                        help="playout mode (default: the schedule's mode)")
+    parser.add_argument('--setup', action='store_true', help="create the OBS scenes before starting")
+    parser.add_argument('--control-port', type=int, help="listen for control commands on this localhost port")
+    parser.add_argument('--metrics-port', type=int, help="serve Prometheus metrics on this localhost port")
+    parser.add_argument('--metrics-file', help="rewrite this file with metrics every 10s (.prom for Prometheus text)")
+    parser.add_argument('--date', help="anchor the schedule to the wall clock on this YYYY-MM-DD date "
+                                       "(default: the schedule's date, if it was exported anchored)")
+    parser.add_argument('--timezone', help="IANA timezone for --date, e.g. Europe/London (default: local time)")
+    parser.add_argument('--no-precise', action='store_true', help="poll every 0.5s instead of the deadline timer")
+    parser.add_argument('--preroll', type=float, default=PREROLL_LEAD, metavar='SECONDS',
+                        help=f"warm up each clip this long before its cut, 0 to disable (default: {PREROLL_LEAD:g})")
+    parser.add_argument('--event-switching', action='store_true', help="advance on OBS media-end events")
+    parser.add_argument('--watchdog-interval', type=float, default=WATCHDOG_INTERVAL, metavar='SECONDS',
+                        help=f"sample the on-air clip this often, 0 to disable (default: {WATCHDOG_INTERVAL:g})")
+    parser.add_argument('--stall-threshold', type=float, default=STALL_THRESHOLD, metavar='SECONDS',
+                        help=f"fail over to Emergency_Scene after playback is stuck this long "
+                             f"(default: {STALL_THRESHOLD:g})")
+    parser.add_argument('--journal', metavar='PATH',
+                        help="journal playout here and, after a crash, resume where the broadcast had got to")
+    parser.add_argument('--preflight', action='store_true',
+                        help="probe and test-decode every file first and list the ones that may not play")
+    args = parser.parse_args(argv)
+
+    videos, start_time, playout_mode, anchor = load_schedule(args.schedule)
+    if not videos:
+        parser.error("schedule has no videos")
+    playout_mode = args.mode or playout_mode
+    anchor_time = None
+    if args.date or anchor:
+        date, timezone = anchor or (None, '')
+        try:
+            anchor_time = anchor_timestamp(args.date or date, args.start or start_time,
+                                           args.timezone if args.timezone is not None else timezone)
+        except ValueError as e:
+            parser.error(f"bad anchor date, time or timezone: {e}")
+
+    journal = resume = None
+    if args.journal:
+        journal = BroadcastJournal(args.journal)
+        try:
+            journal.open()
+        except OSError as e:
+            parser.error(f"cannot open journal: {e}")
+        resume = journal.resume_point()
+        if resume:
+            print(f"📒 Resuming the interrupted broadcast of {len(journal.playlist)} videos from {args.journal}")
+        else:
+            journal.playlist.clear()
+            journal.playlist.insert(0, zip(videos.paths, videos.durations))
+            journal.playlist.set_start_time(videos.start_time)
+            journal.compact()
+        videos = journal.playlist
+
+    if args.preflight:
+        preflight(videos)
+
+    try:
+        obs_settings = parse_endpoints(','.join([f"{args.host}:{args.port}"] + args.fallback), args.password)
+    except ValueError as e:
+        parser.error(str(e))
+    scheduler = HeadlessScheduler(videos, obs_settings)
+    if journal:
+        scheduler.use_journal(journal)
+    try:
+        version_info = scheduler.engine.connect()
+    except Exception as e:
+        print(f"❌ Could not connect to OBS at {args.host}:{args.port}: {e}")
+        return 1
+    print(f"✅ Connected to OBS {version_info.obs_version}")
+
+    if args.setup:
+        report = provision_scenes(scheduler.engine.obs_client, videos, mode=playout_mode)
+        print(f"📊 OBS setup: {len(report.created)} created, {len(report.removed)} removed, "
+              f"{report.kept} unchanged, {len(report.failed)} failed "
+              f"in {report.elapsed:.1f}s")
+        for scene_name, error in report.failed:
+            print(f"   ❌ {scene_name}: {error}")
+
+    scheduler.install_signal_handlers()
+    if args.control_port is not None:
+        scheduler.start_control_server(args.control_port)
+    scheduler.start_metrics(args.metrics_port, args.metrics_file)
+    if resume:
+        start_offset, settings = journal.resume_point() or resume
+        scheduler.run(start_offset, **settings)
+        return 0
+    scheduler.run(time_to_seconds(args.start or start_time), playout_mode,
+                  precise_timing=not args.no_precise, event_switching=args.event_switching, anchor=anchor_time,
+                  preroll_lead=max(args.preroll, 0.0), watchdog_interval=max(args.watchdog_interval, 0.0),
+                  stall_threshold=args.stall_threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
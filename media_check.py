@@ -0,0 +1,228 @@
+"""Pre-flight checks: find scheduled files that will not play before they go to air
+
+get_video_duration() only needs a duration, and when a file is broken it
+falls back to a guess, so a truncated file or a codec OBS cannot decode
+used to surface only at the cut. check_media() runs ffprobe over the
+streams and has ffmpeg decode the first and the last second of the file,
+which is where truncation and broken headers show up. Reports describe
+the file alone, so they are kept in the probe cache next to the duration
+and a file is only decoded again once its size or mtime changes.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from fractions import Fraction
+
+from media_probe import ProbeJob, get_ffprobe_path
+from playout_metrics import metrics
+
+# Seconds decoded at each end of the file
+DECODE_SECONDS = 1.0
+
+# A scheduled duration further than this from the file's own is a guess or a stale probe
+DURATION_TOLERANCE = 1.0
+
+# Codecs the OBS media source plays without surprises
+COMMON_VIDEO_CODECS = {'h264', 'hevc', 'vp8', 'vp9', 'av1', 'mpeg2video', 'mpeg4', 'prores', 'mjpeg'}
+
+# Bumped when the report format changes so older cached reports are redone
+REPORT_VERSION = 1
+
+
+def get_ffmpeg_path():
+    """Locate ffmpeg, preferring the copy bundled into the EXE"""
+    if getattr(sys, 'frozen', False):
+        return os.path.join(sys._MEIPASS, 'ffmpeg.exe')
+    return 'ffmpeg'
+
+
+def probe_streams(filepath):
+    """ffprobe the format and streams; returns the parsed JSON or None if the file cannot be read
+
+    Raises FileNotFoundError if ffprobe itself is missing.
+    """
+    cmd = [get_ffprobe_path(), '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', filepath]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+    except subprocess.TimeoutExpired:
+        return None
+    if result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)
+    except ValueError:
+        return None
+
+
+def decode_error(filepath, from_end=False, seconds=DECODE_SECONDS):
+    """Decode a second at the start (or end) of a file; returns the first error line or None
+
+    Raises FileNotFoundError if ffmpeg itself is missing.
+    """
+    seek = ['-sseof', f'-{seconds:g}'] if from_end else []
+    # One decoder thread per file; the parallelism comes from checking several files at once
+    cmd = [get_ffmpeg_path(), '-nostdin', '-hide_banner', '-v', 'error', '-threads', '1', *seek,
+           '-i', filepath, '-t', f'{seconds:g}', '-map', '0:v:0?', '-map', '0:a:0?', '-f', 'null', '-']
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=20)
+    except subprocess.TimeoutExpired:
+        return "decode took over 20s"
+    lines = [line for line in result.stderr.splitlines() if line.strip()]
+    if result.returncode != 0 or lines:
+        return lines[0] if lines else f"ffmpeg exited with {result.returncode}"
+    return None
+
+
+def frame_rate(stream):
+    """Frames per second from an ffprobe stream, or None"""
+    for key in ('avg_frame_rate', 'r_frame_rate'):
+        try:
+            rate = Fraction(stream.get(key, '0/0'))
+        except (ValueError, ZeroDivisionError):
+            continue
+        if rate > 0:
+            return round(float(rate), 3)
+    return None
+
+
+def check_media(filepath):
+    """Inspect one file; returns a report dict, or None if ffprobe is not installed
+
+    The report has the video codec, resolution, frame rate, audio codec and
+    duration, plus 'problems' (it will not play properly) and 'warnings'
+    (it will play, but check it).
+    """
+    started = time.monotonic()
+    report = {'version': REPORT_VERSION, 'video_codec': None, 'width': None, 'height': None, 'fps': None,
+              'audio_codec': None, 'duration': None, 'problems': [], 'warnings': []}
+    if not os.path.isfile(filepath):
+        report['problems'].append("file not found")
+        return report
+    try:
+        info = probe_streams(filepath)
+    except FileNotFoundError:
+        return None
+    if info is None:
+        report['problems'].append("ffprobe cannot read the file")
+        return report
+
+    try:
+        report['duration'] = float(info.get('format', {})['duration'])
+    except (KeyError, TypeError, ValueError):
+        report['warnings'].append("no duration in the container")
+    streams = info.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'
+                  and not s.get('disposition', {}).get('attached_pic')), None)
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+    if video is None:
+        report['problems'].append("no video stream")
+    else:
+        report['video_codec'] = video.get('codec_name')
+        report['width'] = video.get('width')
+        report['height'] = video.get('height')
+        report['fps'] = frame_rate(video)
+        if report['video_codec'] not in COMMON_VIDEO_CODECS:
+            report['warnings'].append(f"uncommon video codec {report['video_codec']}")
+        if not report['width'] or not report['height']:
+            report['problems'].append("video stream has no resolution")
+    if audio is None:
+        report['warnings'].append("no audio")
+    else:
+        report['audio_codec'] = audio.get('codec_name')
+
+    try:
+        for from_end, where in ((False, 'first'), (True, 'last')):
+            error = decode_error(filepath, from_end=from_end)
+            if error:
+                report['problems'].append(f"{where} second does not decode: {error}")
+    except FileNotFoundError:
+        report['warnings'].append("ffmpeg not found - decode not checked")
+    except OSError as e:
+        report['warnings'].append(f"ffmpeg did not run - decode not checked: {e}")
+
+    metrics.preflight_check.observe(time.monotonic() - started)
+    return report
+
+
+def cached_check(filepath, cache=None):
+    """check_media() through the probe cache: unchanged files are never decoded twice"""
+    cached = cache.get(filepath) if cache is not None else None
+    if cached is not None:
+        report = cached[1].get('preflight')
+        if report and report.get('version') == REPORT_VERSION:
+            return report
+    report = check_media(filepath)
+    if cache is not None and report is not None and report['duration'] is not None:
+        duration, metadata = cached if cached is not None else (report['duration'], {})
+        cache.put(filepath, duration, {**metadata, 'preflight': report})
+    return report
+
+
+def preflight_risks(report, scheduled_duration=None):
+    """Problems with one playlist entry, given its file's report; empty when it is safe to air"""
+    if report is None:
+        return []
+    risks = list(report['problems'])
+    duration = report.get('duration')
+    if duration is not None and scheduled_duration is not None \
+            and abs(duration - scheduled_duration) > DURATION_TOLERANCE:
+        risks.append(f"scheduled for {scheduled_duration:.1f}s but the file runs {duration:.1f}s")
+    return risks
+
+
+def describe(report):
+    """One-line summary like 'h264 1920x1080 25fps, aac'"""
+    if report is None:
+        return "not checked"
+    if report['video_codec'] is None:
+        return "no video"
+    text = f"{report['video_codec']} {report['width']}x{report['height']}"
+    if report['fps']:
+        text += f" {report['fps']:g}fps"
+    return text + (f", {report['audio_codec']}" if report['audio_codec'] else ", no audio")
+
+
+def playlist_risks(videos, reports):
+    """[(row index, filename, risks)] for every playlist row whose file is risky to air"""
+    flagged = []
+    for i in range(len(videos)):
+        filepath = videos.filepath(i)
+        if filepath is None:
+            continue
+        risks = preflight_risks(reports.get(filepath), videos.duration(i))
+        if risks:
+            flagged.append((i, videos.filename(i), risks))
+    return flagged
+
+
+class PreflightJob(ProbeJob):
+    """Check each distinct file of a playlist once, in parallel
+
+    A day's playlist repeats the same clips many times, so only the unique
+    paths are checked; results come back in order through take_ready() like
+    any other ProbeJob and collect in self.reports.
+    """
+
+    def __init__(self, files, cache=None, max_workers=None):
+        super().__init__(dict.fromkeys(files), prober=lambda filepath: cached_check(filepath, cache),
+                         max_workers=max_workers)
+        self.reports = {}
+
+    def failed(self, filepath, error):
+        # Not cached, so the file is checked again on the next run
+        return {'version': REPORT_VERSION, 'video_codec': None, 'width': None, 'height': None, 'fps': None,
+                'audio_codec': None, 'duration': None, 'problems': [f"check failed: {error}"], 'warnings': []}
+
+    def take_ready(self):
+        ready = super().take_ready()
+        self.reports.update(ready)
+        return ready
+
+    def run(self):
+        """Check everything on the calling thread's pool and wait; returns {filepath: report}"""
+        self.start()
+        self.executor.shutdown(wait=True)
+        self.take_ready()
+        return self.reports
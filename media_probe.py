@@ -0,0 +1,138 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from container_duration import read_duration
+from playout_metrics import metrics
+
+
+def get_ffprobe_path():
+    """Locate ffprobe, preferring the copy bundled into the EXE"""
+    if getattr(sys, 'frozen', False):
+        return os.path.join(sys._MEIPASS, 'ffprobe.exe')
+    return 'ffprobe'
+
+
+def probe_media(filepath):
+    """Run ffprobe on a file; returns (duration, metadata) or None if it cannot be read"""
+    try:
+        cmd = [get_ffprobe_path(), '-v', 'quiet', '-print_format', 'json', '-show_format', filepath]
+        started = time.monotonic()
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+        metrics.ffprobe.observe(time.monotonic() - started)
+        if result.returncode != 0:
+            return None
+        fmt = json.loads(result.stdout)['format']
+        metadata = {key: fmt[key] for key in ('format_name', 'bit_rate', 'nb_streams') if key in fmt}
+        return float(fmt['duration']), metadata
+    except:
+        return None
+
+
+def read_container_duration(filepath):
+    """Duration from the container header; (duration, metadata) or None if ffprobe is needed"""
+    started = time.monotonic()
+    header = read_duration(filepath)
+    metrics.header_parse.observe(time.monotonic() - started)
+    if header is None:
+        return None
+    duration, container = header
+    return duration, {'format_name': container, 'source': 'header'}
+
+
+def get_video_duration(filepath, cache=None):
+    """Get video duration: probe cache, then the container header, then ffprobe"""
+    if cache is not None:
+        cached = cache.get(filepath)
+        if cached is not None:
+            return cached[0]
+
+    probed = read_container_duration(filepath) or probe_media(filepath)
+    if probed is not None:
+        if cache is not None:
+            cache.put(filepath, *probed)
+        return probed[0]
+
+    # Guesses are never cached so the file is probed again next time
+    return guess_duration(filepath)
+
+
+def guess_duration(filepath):
+    """Rough duration from the file size, for files nothing could read"""
+    try:
+        return max(os.path.getsize(filepath) / (1024 * 1024 * 2), 30)
+    except:
+        return 60
+
+
+def default_worker_count():
+    """One ffprobe worker per CPU core"""
+    return max(1, os.cpu_count() or 1)
+
+
+class ProbeJob:
+    """Probe a batch of files on a worker pool and hand results back in request order
+
+    Workers only fill in self.results; the UI thread calls take_ready() to collect
+    the finished files that are next in line, so the playlist order never depends
+    on which ffprobe happens to return first.
+    """
+
+    def __init__(self, files, prober=get_video_duration, max_workers=None):
+        self.files = list(files)
+        self.prober = prober
+        self.max_workers = max_workers or default_worker_count()
+        self.results = {}
+        self.lock = threading.Lock()
+        self.next_index = 0
+        self.done_count = 0
+        self.cancelled = False
+        self.executor = None
+
+    def start(self):
+        """Queue every file on the worker pool and return immediately"""
+        workers = max(1, min(self.max_workers, len(self.files)))
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ffprobe')
+        for i, filepath in enumerate(self.files):
+            self.executor.submit(self._probe, i, filepath)
+        self.executor.shutdown(wait=False)
+
+    def _probe(self, i, filepath):
+        if self.cancelled:
+            return
+        try:
+            duration = self.prober(filepath)
+        except Exception as e:
+            # A result must land for every file or take_ready() stalls on this one forever
+            print(f"⚠️ Could not probe {os.path.basename(filepath)}: {e}")
+            duration = self.failed(filepath, e)
+        with self.lock:
+            self.results[i] = duration
+            self.done_count += 1
+
+    def failed(self, filepath, error):
+        """Result to hand back for a file whose prober raised"""
+        return guess_duration(filepath)
+
+    def take_ready(self):
+        """Return (filepath, duration) pairs that are finished and next in request order"""
+        ready = []
+        with self.lock:
+            while self.next_index in self.results:
+                ready.append((self.files[self.next_index], self.results.pop(self.next_index)))
+                self.next_index += 1
+        return ready
+
+    def cancel(self):
+        """Drop every probe that has not started yet"""
+        self.cancelled = True
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def finished(self):
+        return self.cancelled or self.next_index >= len(self.files)
@@ -0,0 +1,134 @@
+"""Fail over to Emergency_Scene when the on-air clip stops playing
+
+The scheduler only ever tells OBS what to show; until now nothing noticed
+when a Media_NNN source froze on a frame, stopped early or when OBS stopped
+answering. The watchdog samples GetMediaInputStatus for the on-air input at
+a low, configurable rate. When the cursor has not moved for the stall
+threshold it puts Emergency_Scene on program and then recovers to
+the next clip: right away for a free-running schedule, or at the next
+clip's scheduled time when the broadcast is anchored to the wall clock, so
+the rest of the day stays on time.
+"""
+import threading
+import time
+
+from playout_metrics import metrics
+from preroll import MEDIA_STATE_PLAYING
+
+# Seconds between samples of the on-air input
+WATCHDOG_INTERVAL = 1.0
+
+# Seconds without playback advancing before failing over
+STALL_THRESHOLD = 3.0
+
+
+class MediaWatchdog:
+    """Stall detection and automatic failover for one PlayoutEngine
+
+    Runs on its own daemon thread and only reads the engine's on-air state;
+    the cuts it causes go through emergency_scene() and skip_to_next() like
+    an operator's would.
+    """
+
+    def __init__(self, engine, interval=WATCHDOG_INTERVAL, threshold=STALL_THRESHOLD):
+        self.engine = engine
+        self.interval = interval
+        self.threshold = max(threshold, interval)
+        self.stopped = threading.Event()
+        self.thread = None
+        self.cut_at = None
+        self.cursor = None
+        self.progress_at = None
+        self.failed_over_at = None
+        self.failovers = 0
+        self.last_event = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Watchdog error: {e}")
+
+    def check(self):
+        """Take one sample and fail over if playback has been stuck for the threshold"""
+        engine = self.engine
+        if not engine.broadcasting:
+            return
+        now = time.monotonic()
+        if engine.last_cut_at != self.cut_at:
+            # A scheduled cut, skip, jump or re-sync: watch the new clip from scratch
+            if self.failed_over_at is not None:
+                print(f"✅ Back on schedule {engine.last_cut_at - self.failed_over_at:.1f}s after the failover")
+            self.cut_at = engine.last_cut_at
+            self.cursor = None
+            self.progress_at = now
+            self.failed_over_at = None
+        if self.failed_over_at is not None:
+            return
+
+        input_name = engine.on_air_input_name()
+        if input_name is None or engine.playing.slot_at(engine.get_elapsed()) is None:
+            # Before the first clip or after the last one, nothing is meant to be playing
+            self.progress_at = now
+            return
+        state, cursor = self.sample(input_name)
+        if state == MEDIA_STATE_PLAYING and (cursor is None or cursor != self.cursor):
+            self.progress_at = now
+        self.cursor = cursor
+        if now - self.progress_at >= self.threshold:
+            self.fail_over(input_name, state or 'not answering', now)
+
+    def sample(self, input_name):
+        """(media state, cursor in ms) of an input; (None, None) if OBS did not answer"""
+        try:
+            status = self.engine.obs_client.get_media_input_status(input_name)
+        except Exception:
+            return None, None
+        return status.media_state, status.media_cursor
+
+    def fail_over(self, input_name, state, detected_at):
+        """Put Emergency_Scene on air, log how long it took, then head for the next clip"""
+        stalled = detected_at - self.progress_at
+        sent = time.monotonic()
+        try:
+            self.engine.emergency_scene()
+            failed = None
+        except Exception as e:
+            failed = e
+        switched = time.monotonic() - sent
+        self.failed_over_at = detected_at
+        self.failovers += 1
+        metrics.watchdog_detection.observe(stalled)
+        metrics.watchdog_failover.observe(switched)
+        self.last_event = {'time': time.time(), 'input': input_name, 'state': state, 'stalled': stalled,
+                           'failover': switched, 'error': str(failed) if failed else None}
+        if failed:
+            print(f"❌ {input_name} stuck ({state}) for {stalled:.1f}s and the failover failed: {failed}")
+        else:
+            print(f"🐕 {input_name} stuck ({state}) for {stalled:.1f}s - "
+                  f"Emergency Scene on air in {switched*1000:.0f} ms")
+        self.recover()
+
+    def recover(self):
+        """Free-running schedules skip ahead; anchored ones wait for the next scheduled cut"""
+        engine = self.engine
+        if engine.anchor is None:
+            print("⏭ Watchdog recovering to the next clip")
+            engine.skip_to_next()
+            return
+        elapsed = engine.get_elapsed()
+        slot = engine.playing.slot_at(elapsed)
+        if slot and slot.end < engine.playing.schedule.total:
+            print(f"⏸ Holding Emergency Scene for {slot.end - elapsed:.0f}s until the next clip is due")
+
+    def status(self):
+        return {'failovers': self.failovers, 'last': self.last_event}
@@ -0,0 +1,452 @@
+"""Drive several OBS instances from one process, one schedule per channel
+
+    python multi_channel.py channels.json --setup --control-port 4460
+
+channels.json lists the channels, each bound to its own OBS:
+
+    {"channels": [
+        {"name": "news", "schedule": "news.json", "address": "127.0.0.1:4455", "password": "secret"},
+        {"name": "music", "folder": "D:/Music Videos", "address": "10.0.0.3:4455, 10.0.0.4:4455",
+         "start": "06:00:00", "date": "2026-10-18", "timezone": "Europe/London", "mode": "ab"}
+    ]}
+
+A channel plays a schedule written by Export Playlist, or every video
+under a folder. start, date, timezone and mode override the schedule's
+own. Each channel is a PlayoutEngine with its own ObsConnection, but no
+channel sleeps on a timer of its own: one SharedTimer thread keeps every
+channel's next wake-up in a heap and, when one falls due, wakes that
+channel's thread to talk to OBS. A slow or dead OBS only ever holds up
+its own channel, and an OBS that is not up yet is dialled in the
+background. Files that need probing are probed once for all channels,
+through the shared probe cache.
+
+Control commands are those of headless_scheduler.py, optionally prefixed
+with a channel name ("news skip"); without one they go to every channel.
+"""
+import argparse
+import heapq
+import itertools
+import json
+import sys
+import threading
+import time
+
+from headless_scheduler import SchedulerServices, engine_command, load_schedule
+from media_probe import ProbeJob, get_video_duration
+from obs_connection import parse_endpoints
+from obs_scenes import PLAYOUT_AB, PLAYOUT_PER_SCENE, provision_scenes
+from playlist_store import PlaylistStore
+from playout_engine import PlayoutEngine, anchor_timestamp, time_to_seconds
+from playout_metrics import metrics
+from media_watchdog import STALL_THRESHOLD, WATCHDOG_INTERVAL
+from preroll import PREROLL_LEAD
+from probe_cache import open_probe_cache
+from watch_folder import scan_videos
+
+
+class SharedTimer:
+    """One heap of wake-up times for every channel, served by a single thread
+
+    schedule() replaces a channel's pending wake-up. When one falls due the
+    timer only calls channel.timer_fired(), so the OBS requests run on
+    the channel's own thread and a channel stuck on a slow link cannot hold
+    up anyone else's deadline. The last SPIN_WINDOW before a deadline is
+    slept in short steps, as the single-channel deadline timer does.
+    """
+
+    SPIN_WINDOW = 0.002
+
+    def __init__(self):
+        self.heap = []
+        self.due = {}
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True, name='shared-timer')
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+    def schedule(self, channel, at):
+        """Wake channel at monotonic time at, instead of whenever it was due before"""
+        with self.condition:
+            entry = (at, next(self.counter), channel)
+            self.due[channel] = entry[1]
+            heapq.heappush(self.heap, entry)
+            if self.heap[0] is entry:
+                self.condition.notify()
+
+    def cancel(self, channel):
+        with self.condition:
+            self.due.pop(channel, None)
+
+    def run(self):
+        while True:
+            fire = []
+            with self.condition:
+                if self.stopped:
+                    return
+                now = time.monotonic()
+                while self.heap and (self.heap[0][0] <= now or self.due.get(self.heap[0][2]) != self.heap[0][1]):
+                    _, seq, channel = heapq.heappop(self.heap)
+                    if self.due.get(channel) == seq:
+                        del self.due[channel]
+                        fire.append(channel)
+                if not fire:
+                    if not self.heap:
+                        self.condition.wait()
+                        continue
+                    remaining = self.heap[0][0] - now
+                    if remaining > self.SPIN_WINDOW:
+                        self.condition.wait(remaining - self.SPIN_WINDOW)
+                        continue
+            for channel in fire:
+                channel.timer_fired()
+            if not fire:
+                time.sleep(min(remaining, 0.0005))
+
+
+class Channel(PlayoutEngine):
+    """A PlayoutEngine whose thread waits on the shared timer instead of running its own deadline loop
+
+    Each wake-up runs step(): adopt edits, cut if a boundary has come, then
+    book the next wake-up for the cut, the pre-roll before it or a drift
+    check, whichever is first. The cut timing itself (boundaries, cut_lead
+    tuning, pre-roll and drift wake-ups) is PlayoutEngine's, shared with
+    deadline_controller.
+    """
+
+    def __init__(self, name, videos, obs_settings, timer):
+        super().__init__(videos, obs_settings)
+        self.name = name
+        self.timer = timer
+        self.wake_at = None
+        self.woken = False
+        self.boundary = None
+        self.fired_boundary = None
+        self.warmed_boundary = None
+
+    def connect(self, retry=False):
+        version_info = super().connect(retry)
+        self.obs_client.thread.channel_name = self.name
+        return version_info
+
+    def start(self, start_offset, playout_mode=PLAYOUT_PER_SCENE, anchor=None, preroll_lead=PREROLL_LEAD,
+              watchdog_interval=WATCHDOG_INTERVAL, stall_threshold=STALL_THRESHOLD):
+        self.boundary = self.fired_boundary = self.warmed_boundary = None
+        super().start(start_offset, precise_timing=True, playout_mode=playout_mode, anchor=anchor,
+                      preroll_lead=preroll_lead, watchdog_interval=watchdog_interval, stall_threshold=stall_threshold)
+        self.broadcast_thread.channel_name = self.name
+        self.preroller.thread.channel_name = self.name
+        if self.watchdog:
+            self.watchdog.thread.channel_name = self.name
+        self.wake_controller()
+
+    def stop(self):
+        self.timer.cancel(self)
+        super().stop()
+
+    def wake_controller(self):
+        """An edit, skip, jump or reconnect: step now, and forget which boundary was just cut"""
+        self.woken = True
+        super().wake_controller()
+
+    def timer_fired(self):
+        """Shared timer thread: the booked wake-up is due"""
+        metrics.wake_jitter.observe(time.monotonic() - self.wake_at)
+        self.schedule_changed.set()
+
+    def broadcast_controller(self):
+        """Channel thread: one step() each time the shared timer, an edit or a reconnect wakes it"""
+        while True:
+            self.schedule_changed.wait()
+            self.schedule_changed.clear()
+            if not self.broadcasting:
+                return
+            try:
+                if self.woken:
+                    self.woken = False
+                    self.fired_boundary = self.warmed_boundary = None
+                self.step()
+            except Exception as e:
+                print(f"Broadcast controller error: {e}")
+                self.book(time.monotonic() + 1)
+
+    def book(self, at):
+        self.wake_at = at
+        self.timer.schedule(self, at)
+
+    def step(self):
+        if self.snapshot is not self.playing:
+            self.adopt_snapshot()
+        if self.resync_needed:
+            self.resync_on_air()
+        self.correct_drift()
+        playlist = self.playing
+
+        deadline = None
+        if self.boundary is not None:
+            deadline = self.deadline_of(self.boundary)
+            if time.monotonic() >= deadline - self.cut_lead:
+                # Woken for this cut, a little early on purpose: the boundary is now
+                self.fired_boundary = self.boundary
+            else:
+                deadline = None
+
+        elapsed = self.schedule_position(self.fired_boundary)
+        slot = playlist.slot_at(elapsed)
+        if self.is_new_airing(slot):
+            if deadline is not None and self.current_slot is not None:
+                self.timed_cut(slot, deadline)
+            else:
+                self.cut_to(slot, elapsed)
+            self.prepare_next(slot)
+
+        self.boundary = self.next_boundary(slot, elapsed)
+        if self.boundary is None:
+            return
+        deadline = self.deadline_of(self.boundary)
+        warm_at = self.warm_time(self.boundary, deadline, self.warmed_boundary)
+        if warm_at is not None and time.monotonic() >= warm_at:
+            self.warm_up(playlist.slot_at(self.boundary))
+            self.warmed_boundary = self.boundary
+            warm_at = None
+        self.book(self.next_wake(deadline - self.cut_lead, warm_at))
+
+    def status(self):
+        return dict(super().status(), channel=self.name)
+
+
+class ChannelOutput:
+    """stdout that labels each line with the channel whose thread printed it"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def write(self, text):
+        name = getattr(threading.current_thread(), 'channel_name', None)
+        if name is None:
+            return self.stream.write(text)
+        pieces = []
+        for line in text.splitlines(keepends=True):
+            if getattr(self.local, 'line_start', True):
+                pieces.append(f"[{name}] ")
+            pieces.append(line)
+            self.local.line_start = line.endswith('\n')
+        with self.lock:
+            self.stream.write(''.join(pieces))
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def load_channel_specs(path):
+    """The channel list from a channels.json file; raises ValueError if it is malformed"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    specs = data.get('channels') if isinstance(data, dict) else data
+    if not specs:
+        raise ValueError("no channels listed")
+    names = set()
+    for k, spec in enumerate(specs):
+        spec.setdefault('name', f"ch{k+1}")
+        if spec['name'] in names:
+            raise ValueError(f"channel name {spec['name']!r} is used twice")
+        names.add(spec['name'])
+        if ('schedule' in spec) == ('folder' in spec):
+            raise ValueError(f"channel {spec['name']!r} needs exactly one of schedule or folder")
+        if spec.get('mode', PLAYOUT_PER_SCENE) not in (PLAYOUT_PER_SCENE, PLAYOUT_AB):
+            raise ValueError(f"channel {spec['name']!r} has unknown mode {spec['mode']!r}")
+        spec['endpoints'] = parse_endpoints(spec.get('address', '127.0.0.1:4455'), spec.get('password', ''))
+    return specs
+
+
+def probe_durations(files, cache):
+    """Durations for every distinct file, each probed once on one worker pool for all channels"""
+    unique = list(dict.fromkeys(files))
+    durations = {}
+    if not unique:
+        return durations
+    print(f"🔍 Probing {len(unique)} files")
+    job = ProbeJob(unique, prober=lambda filepath: get_video_duration(filepath, cache))
+    job.start()
+    while not job.finished:
+        durations.update(job.take_ready())
+        time.sleep(0.05)
+    durations.update(job.take_ready())
+    return durations
+
+
+def load_playlists(specs, cache):
+    """Build each channel's PlaylistStore; returns [(spec, videos, start_time, mode, anchor)]"""
+    loaded = []
+    for spec in specs:
+        if 'schedule' in spec:
+            videos, start_time, mode, anchor = load_schedule(spec['schedule'])
+            rows = list(zip(videos.paths, videos.durations))
+        else:
+            start_time, mode, anchor = '00:00:00', PLAYOUT_PER_SCENE, None
+            rows = [(filepath, 0.0) for filepath in scan_videos(spec['folder'])]
+        loaded.append([spec, rows, start_time, mode, anchor])
+
+    # Clips with no known duration, from folders or hand-written schedules, are probed together
+    durations = probe_durations([row for _, rows, _, _, _ in loaded for row, duration in rows
+                                 if isinstance(row, str) and duration <= 0], cache)
+
+    playlists = []
+    for spec, rows, start_time, mode, anchor in loaded:
+        start_time = spec.get('start', start_time)
+        rows = [(row, durations.get(row, duration) if isinstance(row, str) and duration <= 0 else duration)
+                for row, duration in rows]
+        videos = PlaylistStore(rows, start_time=time_to_seconds(start_time))
+        if spec.get('date'):
+            anchor = (spec['date'], spec.get('timezone', ''))
+        playlists.append((spec, videos, start_time, spec.get('mode', mode), anchor))
+    return playlists
+
+
+class MultiChannelScheduler(SchedulerServices):
+    """N channels on one shared timer, steered with signals and control commands like HeadlessScheduler"""
+
+    def __init__(self, playlists):
+        super().__init__()
+        self.timer = SharedTimer()
+        self.playlists = playlists
+        self.channels = {spec['name']: Channel(spec['name'], videos, spec['endpoints'], self.timer)
+                         for spec, videos, _, _, _ in playlists}
+
+    def command(self, line):
+        """Run one control command, for one channel if it starts with a channel name, else for all"""
+        parts = line.split()
+        targets = list(self.channels.values())
+        if parts and parts[0] in self.channels:
+            targets = [self.channels[parts.pop(0)]]
+        if not parts:
+            return 'error empty command'
+        name = parts[0].lower()
+        if name == 'stop':
+            self.stopped.set()
+            return 'ok'
+        if name == 'status':
+            return json.dumps({channel.name: channel.status() for channel in targets})
+        replies = [engine_command(channel, parts) for channel in targets]
+        errors = [f"{channel.name}: {reply}" for channel, reply in zip(targets, replies) if reply != 'ok']
+        return '; '.join(errors) if errors else 'ok'
+
+    def connect_all(self):
+        """Dial every channel's OBS at once; ones that do not answer keep retrying in the background"""
+        threads = []
+        for channel in self.channels.values():
+            thread = threading.Thread(target=channel.connect, args=(True,), daemon=True)
+            thread.channel_name = channel.name
+            threads.append(thread)
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        up = sum(channel.obs_client.state == 'connected' for channel in self.channels.values())
+        print(f"✅ {up} of {len(self.channels)} channels connected to OBS")
+
+    def provision_all(self):
+        """Sync each connected channel's scenes, all channels in parallel"""
+        def provision(spec, videos, mode):
+            channel = self.channels[spec['name']]
+            threading.current_thread().channel_name = channel.name
+            if channel.obs_client.state != 'connected':
+                print(f"⚠️ {spec['name']}: OBS not connected, scene setup skipped")
+                return
+            try:
+                report = provision_scenes(channel.obs_client, videos, mode=mode)
+            except Exception as e:
+                print(f"❌ {spec['name']}: scene setup failed: {e}")
+                return
+            print(f"📊 {spec['name']}: {len(report.created)} created, {len(report.removed)} removed, "
+                  f"{report.kept} unchanged, {len(report.failed)} failed in {report.elapsed:.1f}s")
+
+        threads = [threading.Thread(target=provision, args=(spec, videos, mode), daemon=True)
+                   for spec, videos, _, mode, _ in self.playlists]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run(self, preroll_lead=PREROLL_LEAD, watchdog_interval=WATCHDOG_INTERVAL, stall_threshold=STALL_THRESHOLD):
+        """Broadcast every channel until stopped by a signal or the stop command"""
+        self.timer.start()
+        for spec, videos, start_time, mode, anchor in self.playlists:
+            anchor_time = anchor_timestamp(anchor[0], start_time, anchor[1]) if anchor else None
+            self.channels[spec['name']].start(time_to_seconds(start_time), playout_mode=mode, anchor=anchor_time,
+                                              preroll_lead=preroll_lead, watchdog_interval=watchdog_interval,
+                                              stall_threshold=stall_threshold)
+        print(f"🔴 Broadcasting {len(self.channels)} channels")
+        while not self.stopped.wait(0.5):
+            pass
+        self.shutdown()
+
+    def shutdown(self):
+        for channel in self.channels.values():
+            channel.stop()
+        self.timer.stop()
+        self.stop_services()
+        for channel in self.channels.values():
+            channel.disconnect()
+        print("Broadcast stopped")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play one schedule per OBS instance from a single process")
+    parser.add_argument('channels', help="channels.json listing each channel's schedule or folder and OBS address")
+    parser.add_argument('--setup', action='store_true', help="sync every channel's OBS scenes before starting")
+    parser.add_argument('--control-port', type=int, help="listen for control commands on this localhost port")
+    parser.add_argument('--metrics-port', type=int, help="serve Prometheus metrics on this localhost port")
+    parser.add_argument('--metrics-file', help="rewrite this file with metrics every 10s (.prom for Prometheus text)")
+    parser.add_argument('--preroll', type=float, default=PREROLL_LEAD, metavar='SECONDS',
+                        help=f"warm up each clip this long before its cut, 0 to disable (default: {PREROLL_LEAD:g})")
+    parser.add_argument('--watchdog-interval', type=float, default=WATCHDOG_INTERVAL, metavar='SECONDS',
+                        help=f"sample each on-air clip this often, 0 to disable (default: {WATCHDOG_INTERVAL:g})")
+    parser.add_argument('--stall-threshold', type=float, default=STALL_THRESHOLD, metavar='SECONDS',
+                        help=f"fail over to Emergency_Scene after playback is stuck this long "
+                             f"(default: {STALL_THRESHOLD:g})")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = load_channel_specs(args.channels)
+        playlists = load_playlists(specs, open_probe_cache())
+        for spec, videos, start_time, _, anchor in playlists:
+            if not videos:
+                raise ValueError(f"channel {spec['name']!r} has no videos")
+            if anchor:
+                anchor_timestamp(anchor[0], start_time, anchor[1])
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"bad channel list: {e}")
+
+    sys.stdout = ChannelOutput(sys.stdout)
+    scheduler = MultiChannelScheduler(playlists)
+    scheduler.connect_all()
+    if args.setup:
+        scheduler.provision_all()
+
+    scheduler.install_signal_handlers()
+    if args.control_port is not None:
+        scheduler.start_control_server(args.control_port)
+    scheduler.start_metrics(args.metrics_port, args.metrics_file)
+    scheduler.run(preroll_lead=max(args.preroll, 0.0), watchdog_interval=max(args.watchdog_interval, 0.0),
+                  stall_threshold=args.stall_threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
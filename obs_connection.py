@@ -0,0 +1,294 @@
+import json
+import select
+import socket
+import threading
+import time
+import uuid
+
+import obsws_python as obs
+from obsws_python.error import OBSSDKRequestError
+
+from playout_metrics import metrics
+
+# RequestBatchExecutionType.SerialRealtime: requests run in order, as fast as OBS can
+SERIAL_REALTIME = 0
+
+
+def send_request_batch(client, requests, halt_on_failure=False, timeout=30):
+    """Send (request_type, request_data) pairs to OBS as one WebSocket v5 RequestBatch
+
+    Returns one result per request, in order, each with the usual
+    requestStatus {result, code, comment} block. The socket timeout is
+    raised for the duration of the batch because OBS answers only once
+    the whole batch has run.
+    """
+    if isinstance(client, ObsConnection):
+        return client.run(send_request_batch, requests, halt_on_failure, timeout)
+    ws = client.base_client.ws
+    batch_id = uuid.uuid4().hex
+    batch = []
+    for k, (request_type, request_data) in enumerate(requests):
+        request = {'requestType': request_type, 'requestId': str(k)}
+        if request_data:
+            request['requestData'] = request_data
+        batch.append(request)
+
+    payload = {
+        'op': 8,
+        'd': {
+            'requestId': batch_id,
+            'haltOnFailure': halt_on_failure,
+            'executionType': SERIAL_REALTIME,
+            'requests': batch,
+        },
+    }
+
+    previous_timeout = ws.gettimeout()
+    ws.settimeout(timeout)
+    try:
+        ws.send(json.dumps(payload))
+        while True:
+            response = json.loads(ws.recv())
+            if response.get('op') == 9 and response['d'].get('requestId') == batch_id:
+                return response['d'].get('results', [])
+    finally:
+        ws.settimeout(previous_timeout)
+
+
+def request_error(result):
+    """Readable error for a failed batch result, or None if it succeeded"""
+    status = result.get('requestStatus', {})
+    if status.get('result'):
+        return None
+    comment = status.get('comment') or 'no details'
+    return f"{result.get('requestType', 'Request')} failed ({status.get('code')}): {comment}"
+
+
+def parse_endpoints(text, password='', timeout=3):
+    """ReqClient settings for a comma-separated list of host[:port] addresses, in the order given"""
+    endpoints = []
+    for address in text.split(','):
+        address = address.strip()
+        if not address:
+            continue
+        host, _, port = address.rpartition(':') if ':' in address else (address, '', '4455')
+        if not host or not port.isdigit() or not 0 < int(port) < 65536:
+            raise ValueError(f"bad OBS address {address!r}, expected host:port")
+        endpoints.append({'host': host, 'port': int(port), 'password': password, 'timeout': timeout})
+    if not endpoints:
+        raise ValueError("no OBS address given")
+    return endpoints
+
+
+class ObsConnection:
+    """A self-healing OBS request client shared by the broadcast thread, scene setup and the UI
+
+    endpoints is a ReqClient settings dict or a list of them, tried in
+    order; later ones borrow the first one's password and timeout if they
+    leave them out. Requests go through run(), which serialises use of the
+    one socket (obsws_python clients are not thread safe) and treats any
+    failure other than an OBS error reply as a dead link. Attribute access
+    is forwarded there too, so a connection can go anywhere a ReqClient is
+    expected.
+
+    A daemon thread sends GetVersion every keepalive_interval seconds to
+    measure the round trip and catch silent drops, and in between watches
+    the idle socket so a hang-up is noticed at once. Once the link is lost it
+    redials with exponential backoff from RECONNECT_BACKOFF to MAX_BACKOFF,
+    and calls each of on_reconnect from that thread when a link is back.
+    Requests made while it is down fail straight away with ConnectionError.
+    """
+
+    RECONNECT_BACKOFF = 0.05
+    MAX_BACKOFF = 5.0
+    # Longest the keepalive thread waits on the socket before re-checking for close()
+    WATCH_INTERVAL = 0.1
+
+    def __init__(self, endpoints, keepalive_interval=0.5):
+        if isinstance(endpoints, dict):
+            endpoints = [endpoints]
+        shared = {key: endpoints[0][key] for key in ('password', 'timeout') if key in endpoints[0]}
+        self.endpoints = [dict(shared, **endpoint) for endpoint in endpoints]
+        self.keepalive_interval = keepalive_interval
+        self.on_reconnect = []
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+        self.thread = None
+
+        self.client = None
+        self.endpoint = None
+        self.state = 'closed'
+        self.error = None
+        self.rtt = None
+        self.lost_at = None
+        self.reconnects = 0
+
+    def __getattr__(self, name):
+        # Only reached for names the connection does not have itself, i.e. ReqClient requests
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.run(lambda client: getattr(client, name)(*args, **kwargs))
+
+    def open(self, retry=False):
+        """Connect to the first endpoint that answers and start the keepalive thread; returns GetVersion
+
+        If nothing answers this raises, unless retry is set: then it returns
+        None and keeps redialling in the background as if the link had dropped.
+        """
+        self.close()
+        self.closed.clear()
+        self.state = 'connecting'
+        try:
+            version = self.attach(*self.dial())
+        except Exception as e:
+            self.error = str(e)
+            if not retry:
+                self.state = 'failed'
+                raise
+            self.state = 'reconnecting'
+            self.lost_at = time.monotonic()
+            print(f"⚠️ OBS not answering ({self.error}) - retrying in the background")
+            version = None
+        self.thread = threading.Thread(target=self.keep_alive, daemon=True)
+        self.thread.start()
+        return version
+
+    def close(self):
+        """Stop the keepalive thread and drop the link; no reconnect follows"""
+        self.closed.set()
+        with self.lock:
+            self.disconnect_client()
+            self.state = 'closed'
+
+    def dial(self):
+        """Open a ReqClient on the first endpoint that answers; returns (client, endpoint, GetVersion)"""
+        error = None
+        for endpoint in self.endpoints:
+            try:
+                client = obs.ReqClient(**endpoint)
+                return client, endpoint, client.get_version()
+            except Exception as e:
+                error = e
+        raise error
+
+    def attach(self, client, endpoint, version):
+        with self.lock:
+            if self.closed.is_set():
+                client.disconnect()
+                return version
+            self.client = client
+            self.endpoint = endpoint
+            self.state = 'connected'
+            self.error = None
+        return version
+
+    def disconnect_client(self):
+        if self.client:
+            try:
+                self.client.disconnect()
+            except:
+                pass
+            self.client = None
+
+    def run(self, function, *args):
+        """Call function(client, *args) on the live client, noting a lost link if it fails"""
+        with self.lock:
+            if self.client is None:
+                raise ConnectionError(f"OBS connection {self.state}")
+            try:
+                return function(self.client, *args)
+            except OBSSDKRequestError:
+                raise
+            except Exception as e:
+                self.lose_link(e)
+                raise
+
+    def lose_link(self, error):
+        """Called with the lock held: drop the dead client so the keepalive thread redials"""
+        self.disconnect_client()
+        if self.closed.is_set():
+            return
+        self.state = 'reconnecting'
+        self.error = str(error) or type(error).__name__
+        self.lost_at = time.monotonic()
+        print(f"⚠️ Lost OBS connection ({self.error}) - reconnecting")
+
+    def probe(self):
+        """One keepalive round trip; skipped while another thread has the socket, which proves it alive"""
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            if self.client is None:
+                return
+            sent = time.monotonic()
+            self.client.get_version()
+            self.rtt = time.monotonic() - sent
+            metrics.obs_keepalive.observe(self.rtt)
+        except Exception as e:
+            self.lose_link(e)
+        finally:
+            self.lock.release()
+
+    def watch(self, timeout):
+        """Wait on the idle socket; a request-only link never has unrequested data, so readable means hung up"""
+        client = self.client
+        try:
+            sock = client.base_client.ws.sock
+            if not select.select([sock], [], [], timeout)[0]:
+                return
+        except (AttributeError, OSError, ValueError):
+            return
+        if not self.lock.acquire(blocking=False):
+            # A request is in flight and its reply just arrived
+            return
+        try:
+            if self.client is client and select.select([sock], [], [], 0)[0]:
+                ended = not sock.recv(1, socket.MSG_PEEK)
+                self.lose_link(ConnectionError("OBS closed the connection" if ended else "unexpected data from OBS"))
+        except OSError as e:
+            self.lose_link(e)
+        finally:
+            self.lock.release()
+
+    def keep_alive(self):
+        backoff = self.RECONNECT_BACKOFF
+        next_probe = time.monotonic() + self.keepalive_interval
+        while not self.closed.is_set():
+            if self.client is not None:
+                remaining = next_probe - time.monotonic()
+                if remaining > 0:
+                    self.watch(min(remaining, self.WATCH_INTERVAL))
+                else:
+                    self.probe()
+                    next_probe = time.monotonic() + self.keepalive_interval
+                continue
+            try:
+                self.attach(*self.dial())
+            except Exception as e:
+                self.error = str(e)
+                self.closed.wait(backoff)
+                backoff = min(backoff * 2, self.MAX_BACKOFF)
+                continue
+            if self.closed.is_set():
+                return
+            backoff = self.RECONNECT_BACKOFF
+            self.reconnects += 1
+            outage = time.monotonic() - self.lost_at
+            metrics.obs_reconnect.observe(outage)
+            print(f"✅ Reconnected to OBS at {self.endpoint['host']}:{self.endpoint['port']} "
+                  f"after {outage:.2f}s")
+            for callback in self.on_reconnect:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"⚠️ OBS reconnect handler failed: {e}")
+
+    def status(self):
+        endpoint = self.endpoint
+        return {
+            'state': self.state,
+            'endpoint': f"{endpoint['host']}:{endpoint['port']}" if endpoint else None,
+            'rtt': self.rtt,
+            'reconnects': self.reconnects,
+            'error': self.error,
+        }
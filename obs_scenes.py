@@ -0,0 +1,300 @@
+import hashlib
+import os
+import re
+import time
+
+from obs_connection import request_error, send_request_batch
+
+EMERGENCY_SCENE = "Emergency_Scene"
+EMERGENCY_SOURCE = "Emergency_Text"
+
+PLAYOUT_PER_SCENE = 'per_scene'
+PLAYOUT_AB = 'ab'
+
+# A/B double buffer: (scene, media input) for each deck
+AB_DECKS = (("Playout_A", "Playout_Media_A"), ("Playout_B", "Playout_Media_B"))
+
+# Each batch holds the shared OBS connection until OBS answers, so keep batches small
+# enough that a cut waiting behind one during an on-air re-sync is not noticeably late
+BATCH_SIZE = 10
+BATCH_TIMEOUT = 5
+
+# Scenes this app created: clip-keyed names, plus the position-numbered ones older versions made
+MANAGED_SCENE = re.compile(r'^Video_([0-9a-f]{8}|\d{3})_')
+
+
+def clip_key(filepath):
+    """Short id for a file that does not depend on where it sits in the playlist"""
+    normalized = os.path.normcase(os.path.abspath(filepath))
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:8]
+
+
+def video_scene_name(filepath):
+    """OBS scene name for a video file; every row that plays the file shares it"""
+    return f"Video_{clip_key(filepath)}_{os.path.splitext(os.path.basename(filepath))[0][:15]}"
+
+
+def video_source_name(filepath):
+    """OBS media input name for a video file"""
+    return f"Media_{clip_key(filepath)}"
+
+
+def managed_source_name(scene_name):
+    """Media input inside a scene this app created, or None if the scene is not one of ours"""
+    match = MANAGED_SCENE.match(scene_name)
+    return f"Media_{match.group(1)}" if match else None
+
+
+def obs_file_path(filepath):
+    """Absolute path with forward slashes, the way ffmpeg_source expects it"""
+    return os.path.abspath(filepath).replace('\\', '/') if filepath else ''
+
+
+def media_input_settings(filepath):
+    """ffmpeg_source settings for playing one local file"""
+    return {
+        'local_file': obs_file_path(filepath),
+        'is_local_file': True,
+        'looping': False,
+        'restart_on_activate': True,
+        'clear_on_media_end': False,
+        'close_when_inactive': False,
+        'hardware_decode': False
+    }
+
+
+def video_scene_requests(filepath):
+    """CreateScene + CreateInput for one video; CreateInput with sceneName also adds the scene item"""
+    scene_name = video_scene_name(filepath)
+    return [
+        ('CreateScene', {'sceneName': scene_name}),
+        ('CreateInput', {
+            'sceneName': scene_name,
+            'inputName': video_source_name(filepath),
+            'inputKind': 'ffmpeg_source',
+            'inputSettings': media_input_settings(filepath),
+            'sceneItemEnabled': True,
+        }),
+    ]
+
+
+def remove_scene_requests(scene_name):
+    """RemoveInput + RemoveScene for a scene this app created"""
+    return [
+        ('RemoveInput', {'inputName': managed_source_name(scene_name)}),
+        ('RemoveScene', {'sceneName': scene_name}),
+    ]
+
+
+def ab_deck_requests(decks=AB_DECKS):
+    """The two fixed scenes used by A/B playout; files are loaded into them while broadcasting"""
+    requests = []
+    for scene_name, source_name in decks:
+        requests.append(('CreateScene', {'sceneName': scene_name}))
+        requests.append(('CreateInput', {
+            'sceneName': scene_name,
+            'inputName': source_name,
+            'inputKind': 'ffmpeg_source',
+            'inputSettings': media_input_settings(None),
+            'sceneItemEnabled': True,
+        }))
+    return requests
+
+
+def emergency_scene_requests():
+    return [
+        ('CreateScene', {'sceneName': EMERGENCY_SCENE}),
+        ('CreateInput', {
+            'sceneName': EMERGENCY_SCENE,
+            'inputName': EMERGENCY_SOURCE,
+            'inputKind': 'text_gdiplus_v2',
+            'inputSettings': {
+                "text": "TECHNICAL DIFFICULTIES\n\nPLEASE STAND BY",
+                "font": {"face": "Arial", "size": 72, "style": "Bold"},
+                "color": 4294967295,
+                "align": "center",
+                "valign": "center"
+            },
+            'sceneItemEnabled': True,
+        }),
+    ]
+
+
+class ProvisionReport:
+    """Outcome of a setup run: what changed in OBS, what failed and how fast it went"""
+
+    def __init__(self):
+        self.created = []
+        self.removed = []
+        self.kept = 0
+        self.failed = []
+        self.warnings = []
+        self.elapsed = 0.0
+
+    @property
+    def scenes_per_second(self):
+        changed = len(self.created) + len(self.removed)
+        return changed / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def existing_scenes(client):
+    """(names of the scenes in OBS, current program scene)"""
+    response = client.get_scene_list()
+    return {scene['sceneName'] for scene in response.scenes}, response.current_program_scene_name
+
+
+def send_scene_batch(client, requests):
+    """send_request_batch, turning a failed batch into one failed result per request"""
+    try:
+        return send_request_batch(client, requests, timeout=BATCH_TIMEOUT) if requests else []
+    except Exception as e:
+        return [{'requestType': 'RequestBatch', 'requestStatus': {'result': False, 'comment': str(e)}}] * len(requests)
+
+
+def pair_errors(results, k):
+    """Errors from the k-th pair of requests in a batch"""
+    errors = [error for error in map(request_error, results[2*k:2*k + 2]) if error]
+    if len(results) < 2*k + 2:
+        errors.append("No response from OBS")
+    return errors
+
+
+def provision_scenes(client, videos, batch_size=BATCH_SIZE, progress=None, mode=PLAYOUT_PER_SCENE):
+    """Bring OBS in line with the playlist, in request batches
+
+    Scene-per-video mode syncs against the scenes already in OBS: scenes are
+    named by clip_key, so only files new to the playlist get a scene and
+    input, scenes for files no longer in it are removed, and the rest are
+    left alone. A/B mode only creates the two decks, whatever the length of
+    the playlist. The emergency scene is created if it is missing.
+    progress(done, total) is called after every batch from the calling thread.
+    """
+    report = ProvisionReport()
+    started = time.monotonic()
+    existing, on_air = existing_scenes(client)
+
+    if mode == PLAYOUT_AB:
+        provision_ab_decks(client, existing, report)
+        if progress:
+            progress(len(videos), len(videos))
+    else:
+        sync_video_scenes(client, videos, existing, on_air, batch_size, progress, report)
+
+    if EMERGENCY_SCENE not in existing:
+        for result in send_scene_batch(client, emergency_scene_requests()):
+            error = request_error(result)
+            if error:
+                report.warnings.append(error)
+                print(f"⚠️ Emergency scene error: {error}")
+
+    report.elapsed = time.monotonic() - started
+    return report
+
+
+def sync_video_scenes(client, videos, existing, on_air, batch_size, progress, report):
+    wanted = {}
+    for video in videos:
+        if video.filepath:
+            wanted.setdefault(video_scene_name(video.filepath), video.filepath)
+    missing = [filepath for scene_name, filepath in wanted.items() if scene_name not in existing]
+    # Never pull the scene that is on air, even if its clip was just deleted
+    orphans = sorted(scene_name for scene_name in existing
+                     if scene_name not in wanted and scene_name != on_air and managed_source_name(scene_name))
+    report.kept = len(wanted) - len(missing)
+    total = len(missing) + len(orphans)
+    print(f"🔄 OBS sync: {len(missing)} to create, {len(orphans)} to remove, {report.kept} unchanged")
+
+    done = 0
+    for first in range(0, len(orphans), batch_size):
+        chunk = orphans[first:first + batch_size]
+        requests = []
+        for scene_name in chunk:
+            requests.extend(remove_scene_requests(scene_name))
+        results = send_scene_batch(client, requests)
+        for k, scene_name in enumerate(chunk):
+            # A missing input is only worth a warning; the scene is what has to go
+            input_result, scene_result = (results[2*k:2*k + 2] + [None, None])[:2]
+            input_error = request_error(input_result) if input_result else None
+            scene_error = request_error(scene_result) if scene_result else "No response from OBS"
+            if input_error:
+                report.warnings.append(input_error)
+            if scene_error:
+                report.failed.append((scene_name, scene_error))
+                print(f"❌ Failed to remove {scene_name}: {scene_error}")
+            else:
+                report.removed.append(scene_name)
+                print(f"🗑 Removed scene {scene_name}")
+        done += len(chunk)
+        if progress:
+            progress(done, total)
+
+    for first in range(0, len(missing), batch_size):
+        chunk = missing[first:first + batch_size]
+        requests = []
+        for filepath in chunk:
+            requests.extend(video_scene_requests(filepath))
+        results = send_scene_batch(client, requests)
+        for k, filepath in enumerate(chunk):
+            scene_name = video_scene_name(filepath)
+            errors = pair_errors(results, k)
+            if errors:
+                report.failed.append((scene_name, "; ".join(errors)))
+                print(f"❌ Failed to create {scene_name}: {'; '.join(errors)}")
+            else:
+                report.created.append(scene_name)
+                print(f"✅ Created scene {scene_name} with input {video_source_name(filepath)}")
+        done += len(chunk)
+        if progress:
+            progress(done, total)
+
+
+def provision_ab_decks(client, existing, report):
+    decks = [deck for deck in AB_DECKS if deck[0] not in existing]
+    results = send_scene_batch(client, ab_deck_requests(decks))
+
+    report.kept = len(AB_DECKS) - len(decks)
+    for k, (scene_name, source_name) in enumerate(decks):
+        errors = pair_errors(results, k)
+        if errors:
+            report.failed.append((scene_name, "; ".join(errors)))
+            print(f"❌ Failed to create {scene_name}: {'; '.join(errors)}")
+        else:
+            report.created.append(scene_name)
+            print(f"✅ Created deck {scene_name} with input {source_name}")
+
+
+class ABPlayout:
+    """Double-buffered playout on two fixed scenes
+
+    The idle deck gets the next file loaded ahead of its slot, the cut goes
+    to that deck, and the deck that just went off air is recycled for the
+    clip after that. OBS only ever holds two media inputs.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.on_air = None
+        self.loaded = [None, None]
+
+    def idle_deck(self):
+        return 0 if self.on_air is None else 1 - self.on_air
+
+    def load(self, deck, filepath):
+        """Point a deck's media input at a file, unless it already holds it"""
+        if self.loaded[deck] == filepath:
+            return
+        self.client.set_input_settings(AB_DECKS[deck][1], {'local_file': obs_file_path(filepath)}, True)
+        self.loaded[deck] = filepath
+
+    def cut_to(self, filepath):
+        """Put a file on air through the idle deck; returns the scene that was cut to"""
+        deck = self.idle_deck()
+        self.load(deck, filepath)
+        scene_name = AB_DECKS[deck][0]
+        self.client.set_current_program_scene(scene_name)
+        self.on_air = deck
+        return scene_name
+
+    def preload(self, filepath):
+        """Load the upcoming file into whichever deck is off air"""
+        self.load(self.idle_deck(), filepath)
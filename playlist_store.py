@@ -0,0 +1,370 @@
+import bisect
+import os
+import sys
+from array import array
+from collections import namedtuple
+
+from obs_scenes import video_scene_name
+from playout_engine import format_duration, time_to_seconds
+from schedule_index import ScheduleIndex, contiguous_runs
+
+
+SECONDS_PER_DAY = 24 * 3600
+
+# One airing of a clip: playlist row index and where it starts and ends in the schedule
+Slot = namedtuple('Slot', 'index start end')
+
+
+class RepeatBlock:
+    """A playlist row that plays the length rows above it again
+
+    Either count more times, or over and over until the clock reaches until
+    (seconds after midnight), cutting the last pass short. The block is never
+    copied out: the row's duration is the extra airtime, and time lookups map
+    back into the block with a modulo.
+    """
+
+    __slots__ = ('length', 'count', 'until')
+
+    def __init__(self, length, count=None, until=None):
+        self.length = length
+        self.count = count
+        self.until = until
+
+    def copy(self):
+        return RepeatBlock(self.length, self.count, self.until)
+
+    def label(self):
+        if self.until is not None:
+            return f"🔁 Repeat {self.length} above until {format_duration(self.until)}"
+        return f"🔁 Repeat {self.length} above ×{self.count}"
+
+    def to_dict(self):
+        return {'length': self.length, 'count': self.count, 'until': self.until}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(int(data['length']), data.get('count'), data.get('until'))
+
+
+class PlaylistEntry:
+    """One playlist row, built on demand from the store's columns; repeat is set for repeat rows"""
+
+    __slots__ = ('filepath', 'filename', 'duration', 'repeat')
+
+    def __init__(self, row, duration):
+        if type(row) is RepeatBlock:
+            self.filepath = None
+            self.filename = row.label()
+            self.repeat = row
+        else:
+            self.filepath = row
+            self.filename = os.path.basename(row)
+            self.repeat = None
+        self.duration = duration
+
+
+class PlaylistView:
+    """Read access shared by the live PlaylistStore and its frozen snapshots
+
+    Subclasses provide paths (file path or RepeatBlock per row), ids (a
+    stable id per row that survives moves) and schedule (the ScheduleIndex).
+    """
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [PlaylistEntry(path, duration)
+                    for path, duration in zip(self.paths[i], self.schedule.durations[i])]
+        return PlaylistEntry(self.paths[i], self.schedule.durations[i])
+
+    def __iter__(self):
+        for path, duration in zip(self.paths, self.schedule.durations):
+            yield PlaylistEntry(path, duration)
+
+    @property
+    def durations(self):
+        return self.schedule.durations
+
+    def filepath(self, i):
+        """File played by row i; None for a repeat row"""
+        row = self.paths[i]
+        return None if type(row) is RepeatBlock else row
+
+    def filename(self, i):
+        row = self.paths[i]
+        return row.label() if type(row) is RepeatBlock else os.path.basename(row)
+
+    def is_repeat(self, i):
+        return type(self.paths[i]) is RepeatBlock
+
+    def duration(self, i):
+        return self.schedule.durations[i]
+
+    def index_of(self, entry_id):
+        """Row that currently holds the entry with this id, or -1 if it was deleted"""
+        try:
+            return self.ids.index(entry_id)
+        except ValueError:
+            return -1
+
+    def slot_at(self, elapsed_seconds):
+        """The airing playing at an offset into the schedule, resolved through repeat rows; None if nothing is"""
+        i = self.schedule.index_at(elapsed_seconds)
+        if i < 0:
+            return None
+        return self.slot_in_row(i, elapsed_seconds)
+
+    def slot_in_row(self, i, elapsed_seconds):
+        starts = self.schedule.starts
+        row = self.paths[i]
+        if type(row) is not RepeatBlock:
+            return Slot(i, starts[i], starts[i + 1])
+        first = i - row.length
+        block_start = starts[first]
+        block_length = starts[i] - block_start
+        passes, offset = divmod(elapsed_seconds - starts[i], block_length)
+        if block_length - offset < 1e-9:
+            # Rounding left us a hair before the end of a pass; it is really the top of the next one
+            passes, offset = passes + 1, 0.0
+        inner = bisect.bisect_right(starts, block_start + offset, first, i) - 1
+        slot = self.slot_in_row(inner, block_start + offset)
+        shift = starts[i] + passes * block_length - block_start
+        return Slot(slot.index, slot.start + shift, min(slot.end + shift, starts[i + 1]))
+
+    def locate_airing(self, previous, slot):
+        """Where an airing from the previous version of the playlist is now; None if it no longer airs
+
+        An airing inside a repeat pass stays in the same pass of the same
+        repeat row, so an edit above it shifts it by the net duration added
+        or removed instead of sending it back to the first pass.
+        """
+        index = self.index_of(previous.ids[slot.index])
+        if index < 0:
+            return None
+        old_starts, starts = previous.schedule.starts, self.schedule.starts
+        row = previous.schedule.index_at(slot.start + 1e-9)
+        if row < 0 or not previous.is_repeat(row):
+            return self.slot_in_row(index, starts[index])
+        repeat = self.index_of(previous.ids[row])
+        if repeat < 0 or not self.is_repeat(repeat):
+            return None
+        old_first = row - previous.paths[row].length
+        first = repeat - self.paths[repeat].length
+        if not first <= index < repeat:
+            return None
+        old_block = old_starts[row] - old_starts[old_first]
+        passes = round((slot.start - old_starts[row] - (old_starts[slot.index] - old_starts[old_first])) / old_block)
+        start = starts[repeat] + passes * (starts[repeat] - starts[first]) + (starts[index] - starts[first])
+        airing = self.slot_at(start + 1e-9)
+        if airing is None or airing.index != index:
+            return None
+        return airing
+
+
+class PlaylistSnapshot(PlaylistView):
+    """One version of the playlist, frozen for the broadcast thread
+
+    Built by PlaylistStore.snapshot() on the thread that edits the store and
+    handed over by plain attribute assignment, so readers never take a lock.
+    Nothing here is modified after construction: paths is a tuple, the
+    columns are copies, and RepeatBlocks are replaced rather than changed.
+    """
+
+    def __init__(self, store):
+        self.version = store.version
+        self.paths = tuple(store.paths)
+        self.ids = store.ids[:]
+        self.schedule = store.schedule.copy()
+        self.start_time = store.start_time
+
+
+class PlaylistStore(PlaylistView):
+    """The playlist as parallel columns instead of one dict per entry
+
+    Paths are interned so repeated clips share one string, and durations live
+    in the ScheduleIndex's packed double array, which is also what time lookups
+    bisect. Every edit goes through a bulk operation that updates all columns
+    together, so they can never drift apart, and bumps version.
+
+    A row in paths is either a file path or a RepeatBlock. Repeat rows keep
+    their duration in step with the block above them after every edit, so a
+    week of a looped day costs one extra row instead of six days of entries.
+    """
+
+    def __init__(self, items=(), start_time=0):
+        self.paths = []
+        self.ids = array('q')
+        self.schedule = ScheduleIndex()
+        self.start_time = start_time
+        self.repeat_rows = 0
+        self.next_id = 0
+        self.version = 0
+        self.frozen = None
+        self.insert(0, items)
+
+    def snapshot(self):
+        """Immutable copy of the current version; reused until the next edit"""
+        if self.frozen is None or self.frozen.version != self.version:
+            self.frozen = PlaylistSnapshot(self)
+        return self.frozen
+
+    def insert(self, position, items):
+        """Insert (filepath, duration) pairs before position"""
+        paths = []
+        durations = []
+        repeats = 0
+        for row, duration in items:
+            if type(row) is RepeatBlock:
+                # Pasted repeat rows must not share state with the rows they were copied from
+                paths.append(row.copy())
+                repeats += 1
+            else:
+                paths.append(sys.intern(row))
+            durations.append(duration)
+        if not paths:
+            return
+        self.paths[position:position] = paths
+        self.ids[position:position] = array('q', range(self.next_id, self.next_id + len(paths)))
+        self.next_id += len(paths)
+        self.schedule.insert(position, durations)
+        self.repeat_rows += repeats
+        self.edited()
+
+    def add_repeat(self, position, length, count=None, until=None):
+        """Insert a row at position that repeats the length rows above it"""
+        self.insert(position, [(RepeatBlock(length, count, until), 0.0)])
+
+    def delete(self, indices):
+        """Remove the entries at the given positions, a contiguous run at a time"""
+        runs = contiguous_runs(indices)
+        for start, stop in reversed(runs):
+            self.repeat_rows -= self.count_repeats(start, stop)
+            del self.paths[start:stop]
+            del self.ids[start:stop]
+        self.schedule.delete(indices)
+        self.edited()
+
+    def delete_range(self, start, stop):
+        """Remove entries start..stop-1"""
+        self.repeat_rows -= self.count_repeats(start, stop)
+        del self.paths[start:stop]
+        del self.ids[start:stop]
+        self.schedule.delete_range(start, stop)
+        self.edited()
+
+    def move_range(self, start, stop, to):
+        """Move entries start..stop-1 so the block begins at position to afterwards"""
+        for column in (self.paths, self.ids):
+            block = column[start:stop]
+            del column[start:stop]
+            column[to:to] = block
+        self.schedule.move_range(start, stop, to)
+        self.edited()
+
+    def swap(self, i, j):
+        self.paths[i], self.paths[j] = self.paths[j], self.paths[i]
+        self.ids[i], self.ids[j] = self.ids[j], self.ids[i]
+        self.schedule.swap(i, j)
+        self.edited()
+
+    def set_duration(self, filepath, duration):
+        """Update every entry of filepath to a new duration; returns the positions changed"""
+        positions = [i for i, path in enumerate(self.paths) if path == filepath]
+        for i in positions:
+            self.schedule.durations[i] = duration
+        if positions:
+            self.schedule.set_duration(positions[0], duration)
+            self.edited()
+        return positions
+
+    def set_start_time(self, start_time):
+        """Clock time in seconds that the schedule starts at; repeat-until rows depend on it"""
+        if start_time != self.start_time:
+            self.start_time = start_time
+            self.edited()
+
+    def clear(self):
+        self.paths.clear()
+        del self.ids[:]
+        self.schedule.clear()
+        self.repeat_rows = 0
+        self.version += 1
+
+    def count_repeats(self, start, stop):
+        if not self.repeat_rows:
+            return 0
+        return sum(1 for row in self.paths[start:stop] if type(row) is RepeatBlock)
+
+    def edited(self):
+        self.version += 1
+        self.update_repeats()
+
+    def update_repeats(self):
+        """Recompute the airtime of every repeat row, top to bottom, so nested blocks see settled values"""
+        if not self.repeat_rows:
+            return
+        starts = self.schedule.starts
+        for i, row in enumerate(self.paths):
+            if type(row) is not RepeatBlock:
+                continue
+            if row.length > i:
+                # Snapshots may hold the old block, so swap in a new one instead of changing it
+                row = self.paths[i] = RepeatBlock(i, row.count, row.until)
+            block_length = starts[i] - starts[i - row.length]
+            if block_length <= 0:
+                duration = 0.0
+            elif row.until is not None:
+                duration = (row.until - self.start_time - starts[i]) % SECONDS_PER_DAY
+            else:
+                duration = block_length * (row.count or 0)
+            if duration != self.schedule.durations[i]:
+                self.schedule.set_duration(i, duration)
+
+    def memory_usage(self):
+        """Approximate bytes held by the columns (string payloads counted once each)"""
+        total = sys.getsizeof(self.paths) + sys.getsizeof(self.ids) + sys.getsizeof(self.schedule.durations)
+        total += sys.getsizeof(self.schedule.starts)
+        total += sum(sys.getsizeof(path) for path in set(self.paths))
+        return total
+
+
+def schedule_document(videos, start_time, playout_mode, start_date=None, timezone=None):
+    """The JSON document Export Playlist writes and the headless scheduler reads
+
+    start_date (YYYY-MM-DD) and timezone are only written for schedules
+    anchored to the wall clock.
+    """
+    start_seconds = time_to_seconds(start_time)
+    starts = videos.schedule.starts
+    entries = []
+    for i, video in enumerate(videos):
+        start = start_seconds + starts[i]
+        if video.repeat:
+            entries.append({
+                'index': i,
+                'repeat': video.repeat.to_dict(),
+                'duration': video.duration,
+                'start_time': start,
+                'start_formatted': format_duration(start),
+                'end_formatted': format_duration(start + video.duration),
+            })
+            continue
+        entries.append({
+            'index': i,
+            'filename': video.filename,
+            'filepath': video.filepath,
+            'duration': video.duration,
+            'start_time': start,
+            'start_formatted': format_duration(start),
+            'end_formatted': format_duration(start + video.duration),
+            'scene_name': video_scene_name(video.filepath)
+        })
+    document = {"videos": entries, "start_time": start_time, "total_duration": videos.schedule.total,
+                "playout_mode": playout_mode}
+    if start_date:
+        document["start_date"] = start_date
+        document["timezone"] = timezone or ''
+    return document
@@ -0,0 +1,633 @@
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import obsws_python as obs
+
+from media_watchdog import STALL_THRESHOLD, WATCHDOG_INTERVAL, MediaWatchdog
+from obs_connection import ObsConnection
+from obs_scenes import (AB_DECKS, EMERGENCY_SCENE, PLAYOUT_AB, PLAYOUT_PER_SCENE, ABPlayout,
+                        video_scene_name, video_source_name)
+from playout_metrics import metrics
+from preroll import PREROLL_LEAD, Preroller
+
+
+def time_to_seconds(time_str):
+    """Convert HH:MM:SS to seconds"""
+    try:
+        h, m, s = map(int, time_str.split(':'))
+        return h * 3600 + m * 60 + s
+    except:
+        return 0
+
+
+def format_duration(seconds):
+    """Convert seconds to HH:MM:SS format"""
+    h = int(seconds // 3600)
+    m = int((seconds % 3600) // 60)
+    s = int(seconds % 60)
+    return f"{h:02d}:{m:02d}:{s:02d}"
+
+
+def format_clock(seconds):
+    """Time of day for a schedule position counted from midnight, with a +Nd prefix past the first day"""
+    days, seconds = divmod(int(seconds), 24 * 3600)
+    clock = format_duration(seconds)
+    return f"+{days}d {clock}" if days else clock
+
+
+def anchor_timestamp(date_str, time_str, timezone=''):
+    """Epoch seconds for a YYYY-MM-DD date and HH:MM:SS time in an IANA timezone (blank = local); raises ValueError"""
+    naive = datetime.strptime(f"{date_str.strip()} {time_str.strip()}", "%Y-%m-%d %H:%M:%S")
+    if not timezone.strip():
+        return naive.timestamp()
+    try:
+        zone = ZoneInfo(timezone.strip())
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"unknown timezone {timezone!r}") from e
+    return naive.replace(tzinfo=zone).timestamp()
+
+
+class PlayoutEngine:
+    """Drives OBS through a playlist: timing, scene switching, skip/jump and emergency
+
+    Shared by the Tk control window and the headless scheduler, so it must
+    never import tkinter. videos is the caller's PlaylistStore, which only the
+    caller's thread touches: after each edit it calls publish_schedule(), and
+    the broadcast thread picks up that immutable snapshot on its next pass,
+    keeping the on-air clip where it is. Timing works on slots (one airing of
+    a clip), so passes through a repeat row cut and restart the clip like any
+    other entry.
+
+    obs_settings is one set of ReqClient settings or a list of fallbacks;
+    the link to OBS is an ObsConnection, and when it comes back after a
+    drop the broadcast thread puts the scheduled clip back on air at the
+    right position.
+    """
+
+    # Deadline timer: OS sleeps end this long before a cut, the rest is a fine-grained wait
+    CUT_SPIN_WINDOW = 0.02
+    MAX_CUT_LEAD = 0.25
+    # Event-driven mode: how long past the planned end to wait for OBS to report the clip ended
+    END_EVENT_GRACE = 5.0
+    # Joining a clip further in than this seeks the media instead of playing it from the top
+    LATE_START_SEEK = 0.5
+    # Anchored broadcasts: wall-clock drift beyond this is folded back into the schedule clock
+    DRIFT_TOLERANCE = 0.005
+    # ...and is re-checked at least this often during long clips
+    DRIFT_CHECK_INTERVAL = 30.0
+
+    def __init__(self, videos, obs_settings):
+        self.videos = videos
+        # Latest published snapshot, and the one the broadcast thread is playing from
+        self.snapshot = videos.snapshot()
+        self.playing = self.snapshot
+        self.obs_settings = obs_settings
+        self.obs_client = None
+        self.event_client = None
+        self.event_switching = False
+        self.resync_needed = False
+        self.broadcasting = False
+        self.broadcast_thread = None
+        self.current_video_index = -1
+        self.current_slot = None
+        self.last_cut_at = 0
+        self.broadcast_start_time = None
+        self.wall_start_time = None
+        self.anchor = None
+        self.drift_corrected = 0.0
+        self.manual_time_offset = 0
+        # The broadcast thread, OBS events, the watchdog and the UI all move the schedule clock
+        self.offset_lock = threading.Lock()
+        self.precise_timing = True
+        self.playout_mode = PLAYOUT_PER_SCENE
+        self.ab_playout = None
+        self.cut_lead = 0.0
+        self.preroll_lead = PREROLL_LEAD
+        self.preroller = None
+        self.watchdog = None
+        self.journal = None
+        self.schedule_changed = threading.Event()
+
+    def connect(self, retry=False):
+        """Open the managed OBS connection; returns OBS's GetVersion response
+
+        With retry an OBS that is not up yet is not an error: this returns
+        None and the connection keeps dialling in the background.
+        """
+        self.disconnect()
+        connection = ObsConnection(self.obs_settings)
+        connection.on_reconnect.append(self.on_obs_reconnected)
+        version_info = connection.open(retry=retry)
+        self.obs_client = connection
+        return version_info
+
+    def disconnect(self):
+        if self.obs_client:
+            self.obs_client.close()
+            self.obs_client = None
+
+    def on_obs_reconnected(self):
+        """Connection thread: the link to OBS is back, so have the broadcast thread re-sync"""
+        if self.broadcasting:
+            self.resync_needed = True
+            self.wake_controller()
+
+    def resync_on_air(self):
+        """Broadcast thread, after a reconnect: forget what OBS was showing so the next pass re-cuts"""
+        self.resync_needed = False
+        if self.ab_playout:
+            # OBS may have restarted with other files in the decks
+            self.ab_playout = ABPlayout(self.obs_client)
+        if self.event_switching:
+            # The event socket went down with the request one
+            self.open_event_client()
+        self.current_slot = None
+        self.current_video_index = -1
+        print("🔄 Re-syncing OBS to the schedule")
+
+    def start(self, start_offset, precise_timing=True, playout_mode=PLAYOUT_PER_SCENE, event_switching=False,
+              anchor=None, preroll_lead=PREROLL_LEAD, watchdog_interval=WATCHDOG_INTERVAL,
+              stall_threshold=STALL_THRESHOLD):
+        """Start the broadcast thread, start_offset seconds into the playlist
+
+        Each clip is warmed up preroll_lead seconds before its cut (0 turns
+        that off); the gap between each cut and its clip playing is always
+        measured.
+
+        The on-air input is sampled every watchdog_interval seconds (0 turns
+        the watchdog off); if it has not advanced for stall_threshold seconds
+        Emergency_Scene goes on air and the broadcast recovers to the next clip.
+
+        With anchor (epoch seconds for the top of the schedule) the position
+        comes from the wall clock instead: a late start joins the right clip
+        part way through, an early one waits, and drift between the wall
+        clock and the monotonic timer is corrected as the broadcast runs.
+        """
+        self.broadcasting = True
+        self.broadcast_start_time = time.monotonic()
+        self.wall_start_time = time.time()
+        self.anchor = anchor
+        self.drift_corrected = 0.0
+        if anchor is not None:
+            start_offset = self.wall_start_time - anchor
+        with self.offset_lock:
+            self.manual_time_offset = start_offset
+        self.current_video_index = -1
+        self.current_slot = None
+        self.publish_schedule()
+        self.playing = self.snapshot
+        self.precise_timing = precise_timing
+        self.playout_mode = playout_mode
+        self.ab_playout = ABPlayout(self.obs_client) if playout_mode == PLAYOUT_AB else None
+        self.cut_lead = 0.0
+        self.preroll_lead = preroll_lead
+        self.preroller = Preroller(self.obs_client).start()
+        self.watchdog = None
+        if watchdog_interval > 0:
+            self.watchdog = MediaWatchdog(self, watchdog_interval, stall_threshold).start()
+        self.schedule_changed.clear()
+        self.resync_needed = False
+        self.event_switching = event_switching
+        if event_switching:
+            self.open_event_client()
+
+        if self.journal:
+            self.journal.broadcast_started({
+                'precise_timing': precise_timing, 'playout_mode': playout_mode, 'event_switching': event_switching,
+                'anchor': anchor, 'preroll_lead': preroll_lead, 'watchdog_interval': watchdog_interval,
+                'stall_threshold': stall_threshold,
+            }, self.get_elapsed())
+
+        self.broadcast_thread = threading.Thread(target=self.broadcast_controller, daemon=True)
+        self.broadcast_thread.start()
+
+    def stop(self):
+        self.broadcasting = False
+        self.wake_controller()
+
+        if self.broadcast_thread:
+            self.broadcast_thread.join(timeout=1)
+        if self.preroller:
+            self.preroller.stop()
+            self.preroller = None
+        if self.watchdog:
+            self.watchdog.stop()
+            self.watchdog = None
+        self.close_event_client()
+        self.current_video_index = -1
+        self.current_slot = None
+        if self.journal:
+            self.journal.broadcast_stopped()
+
+    def get_elapsed(self):
+        """Seconds into the playlist right now, on the monotonic clock"""
+        return (time.monotonic() - self.broadcast_start_time) + self.manual_time_offset
+
+    def shift_schedule(self, seconds):
+        """Move the schedule clock by seconds; safe from any thread"""
+        with self.offset_lock:
+            self.manual_time_offset += seconds
+
+    def move_schedule_to(self, position):
+        """Put the schedule clock at position seconds into the playlist right now; safe from any thread"""
+        with self.offset_lock:
+            self.manual_time_offset = position - (time.monotonic() - self.broadcast_start_time)
+
+    def clock_drift(self):
+        """How far the wall clock has run ahead of the monotonic clock since the broadcast started"""
+        return (time.time() - self.wall_start_time) - (time.monotonic() - self.broadcast_start_time)
+
+    def correct_drift(self):
+        """Anchored broadcasts: move the schedule clock by any new drift so cuts stay on the wall clock"""
+        if self.anchor is None:
+            return
+        drift = self.clock_drift()
+        metrics.clock_drift.observe(drift)
+        step = drift - self.drift_corrected
+        if abs(step) >= self.DRIFT_TOLERANCE:
+            self.shift_schedule(step)
+            self.drift_corrected = drift
+            self.journal_position()
+            print(f"🕰 Clock drift {drift*1000:+.1f} ms - schedule re-aligned to the wall clock")
+
+    def wake_controller(self):
+        """Make the broadcast loop re-read the schedule right away"""
+        self.schedule_changed.set()
+
+    def publish_schedule(self):
+        """Owner's thread: hand the broadcast thread the playlist as it is now"""
+        snapshot = self.videos.snapshot()
+        if snapshot is not self.snapshot:
+            self.snapshot = snapshot
+            self.wake_controller()
+
+    def adopt_snapshot(self):
+        """Broadcast thread: switch to the latest snapshot, re-basing the clock so the on-air clip plays on"""
+        previous, snapshot = self.playing, self.snapshot
+        self.playing = snapshot
+        slot = self.current_slot
+        if slot is None:
+            return
+        airing = snapshot.locate_airing(previous, slot)
+        if airing is None:
+            # The on-air clip (or the repeat pass it was in) was deleted: whatever is scheduled now takes over
+            self.current_slot = None
+            return
+        if abs(airing.start - slot.start) > 1e-6:
+            # The clip moved: pick it up at its new place, as far in as it has already played
+            self.shift_schedule(airing.start - slot.start)
+        self.current_slot = airing
+        self.current_video_index = airing.index
+        self.journal_position()
+
+    def journal_position(self):
+        """Note where the schedule is on the wall clock, so a restart can carry on from here"""
+        if self.journal:
+            self.journal.record_position(self.current_video_index, self.get_elapsed())
+
+    def broadcast_controller(self):
+        """Main broadcast loop with timing control"""
+        if self.precise_timing:
+            self.deadline_controller()
+            return
+
+        warmed_boundary = None
+        while self.broadcasting:
+            try:
+                if self.snapshot is not self.playing:
+                    self.adopt_snapshot()
+                if self.resync_needed:
+                    self.resync_on_air()
+                self.correct_drift()
+                elapsed = self.get_elapsed()
+                slot = self.playing.slot_at(elapsed)
+
+                if self.is_new_airing(slot):
+                    previous = self.current_slot
+                    self.cut_to(slot, elapsed)
+                    if previous is not None and abs(previous.end - slot.start) < 1e-6:
+                        # Only cuts from one clip into the next are due at a time; joins and jumps are not
+                        scheduled = self.broadcast_start_time + slot.start - self.manual_time_offset
+                        metrics.cut_error.observe(self.last_cut_at - scheduled)
+                    self.prepare_next(slot)
+
+                if slot and 0 < slot.end - elapsed <= self.preroll_lead and warmed_boundary != slot.end:
+                    self.warm_up(self.playing.slot_at(slot.end))
+                    warmed_boundary = slot.end
+
+                time.sleep(0.5)
+
+            except Exception as e:
+                print(f"Broadcast controller error: {e}")
+                time.sleep(1)
+
+    def deadline_controller(self):
+        """Broadcast loop that sleeps until the next cut instead of polling"""
+        fired_boundary = warmed_boundary = None
+        while self.broadcasting:
+            try:
+                if self.schedule_changed.is_set():
+                    self.schedule_changed.clear()
+                    fired_boundary = warmed_boundary = None
+                if self.snapshot is not self.playing:
+                    self.adopt_snapshot()
+                if self.resync_needed:
+                    self.resync_on_air()
+                playlist = self.playing
+
+                elapsed = self.schedule_position(fired_boundary)
+                slot = playlist.slot_at(elapsed)
+                if self.is_new_airing(slot):
+                    self.cut_to(slot, elapsed)
+                    self.prepare_next(slot)
+
+                boundary = self.next_boundary(slot, elapsed)
+                if boundary is None:
+                    self.schedule_changed.wait()
+                    continue
+
+                self.correct_drift()
+                deadline = self.deadline_of(boundary)
+                # Only a clip on air can end with an event; the opening cut is always the clock's,
+                # and so is every cut of an anchored broadcast, which belongs to the wall clock
+                event_driven = self.event_client is not None and slot is not None and self.anchor is None
+                if event_driven:
+                    # Media-end events drive the cut; the clock only steps in if none arrives
+                    wake_at = deadline + self.END_EVENT_GRACE
+                else:
+                    wake_at = deadline - self.cut_lead
+                warm_at = self.warm_time(boundary, deadline, warmed_boundary)
+                next_wake = self.next_wake(wake_at, warm_at)
+                if next_wake < wake_at:
+                    # Wake early to pre-roll the next clip or re-check drift, then sleep on to the cut
+                    if self.wait_until(next_wake) and warm_at is not None and time.monotonic() >= warm_at:
+                        self.warm_up(playlist.slot_at(boundary))
+                        warmed_boundary = boundary
+                    continue
+                if not self.wait_until(wake_at):
+                    continue
+                metrics.wake_jitter.observe(time.monotonic() - wake_at)
+
+                if self.snapshot is not playlist:
+                    # Edited while we slept; start over on the new snapshot
+                    continue
+                next_slot = playlist.slot_at(boundary)
+                fired_boundary = boundary
+                if not self.is_new_airing(next_slot):
+                    continue
+
+                if event_driven:
+                    self.cut_to(next_slot)
+                    # Re-base the schedule on the late cut so later clips keep their full length
+                    self.move_schedule_to(boundary)
+                    print(f"⚠️ No media-end event from OBS - clock fallback cut to #{next_slot.index+1}")
+                else:
+                    self.timed_cut(next_slot, deadline)
+                self.prepare_next(next_slot)
+
+            except Exception as e:
+                print(f"Broadcast controller error: {e}")
+                time.sleep(1)
+
+    def schedule_position(self, fired_boundary=None):
+        """Seconds into the playlist now, never before a boundary whose cut has already fired
+
+        A cut fired slightly early must not bounce back to the previous clip.
+        """
+        elapsed = self.get_elapsed()
+        if fired_boundary is not None:
+            elapsed = max(elapsed, fired_boundary)
+        return elapsed
+
+    def next_boundary(self, slot, elapsed):
+        """Schedule position of the next cut after slot, which is on air at elapsed
+
+        None past the end of the playlist: nothing to do until it is edited.
+        """
+        if slot:
+            return slot.end
+        if elapsed < 0 and len(self.playing):
+            return 0.0
+        return None
+
+    def deadline_of(self, boundary):
+        """Monotonic time at which the schedule reaches boundary"""
+        return self.broadcast_start_time + (boundary - self.manual_time_offset)
+
+    def warm_time(self, boundary, deadline, warmed_boundary):
+        """When to pre-roll the clip due at boundary; None if it is already warm or pre-roll is off"""
+        if self.preroll_lead <= 0 or warmed_boundary == boundary:
+            return None
+        return deadline - self.preroll_lead
+
+    def next_wake(self, cut_at, warm_at):
+        """The first of the cut, the pre-roll before it and, when anchored, the next drift check"""
+        wake_at = cut_at if warm_at is None else min(cut_at, warm_at)
+        if self.anchor is not None:
+            wake_at = min(wake_at, time.monotonic() + self.DRIFT_CHECK_INTERVAL)
+        return wake_at
+
+    def timed_cut(self, slot, deadline):
+        """Cut to slot for a boundary due at deadline; aim the next cut earlier or later by half of this one's error"""
+        sent = time.monotonic()
+        self.cut_to(slot)
+        error = (sent + time.monotonic()) / 2 - deadline
+        metrics.cut_error.observe(error)
+        self.cut_lead = min(max(self.cut_lead + error / 2, 0.0), self.MAX_CUT_LEAD)
+        print(f"⏱ Cut to #{slot.index+1} landed {error*1000:+.1f} ms from schedule")
+
+    def wait_until(self, deadline):
+        """Sleep until a monotonic deadline; False if a schedule change or stop woke us first"""
+        while self.broadcasting:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            if remaining > self.CUT_SPIN_WINDOW:
+                if self.schedule_changed.wait(remaining - self.CUT_SPIN_WINDOW):
+                    return False
+            else:
+                time.sleep(min(remaining, 0.001))
+        return False
+
+    def get_video_at_time(self, elapsed_seconds):
+        """Determine which video should be playing at given time"""
+        slot = self.snapshot.slot_at(elapsed_seconds)
+        return slot.index if slot else -1
+
+    def is_new_airing(self, slot):
+        """True if slot is not what is on air: another clip, or the next pass of the same one"""
+        current = self.current_slot
+        if slot is None:
+            return False
+        return current is None or slot.index != current.index or slot.start >= current.end - 1e-6
+
+    def cut_to(self, slot, elapsed=None):
+        """Put a slot on air and make it the current one
+
+        elapsed is where the schedule is right now; when that is part way
+        into the slot (a late start, or the on-air clip was deleted) the
+        media is sought to match instead of starting from the top.
+        """
+        restart = self.current_slot is not None and slot.index == self.current_slot.index
+        sent = time.monotonic()
+        self.switch_to_video(slot.index, restart=restart)
+        self.current_slot = slot
+        self.current_video_index = slot.index
+        self.journal_position()
+        if self.preroller:
+            self.preroller.measure_gap(self.on_air_input_name(), sent, f"#{slot.index+1}")
+        if elapsed is not None and elapsed - slot.start > self.LATE_START_SEEK:
+            self.seek_on_air(elapsed - slot.start)
+
+    def seek_on_air(self, position):
+        """Move the on-air media input to position seconds in"""
+        input_name = self.on_air_input_name()
+        try:
+            sent = time.monotonic()
+            self.obs_client.set_media_input_cursor(input_name, int(position * 1000))
+            metrics.obs_request.observe(time.monotonic() - sent)
+            print(f"⏩ Joined {input_name} at {format_duration(position)}")
+        except Exception as e:
+            print(f"⚠️ Could not seek {input_name}: {e}")
+
+    def switch_to_video(self, video_index, restart=False):
+        """Switch OBS to specific video scene; restart replays it if that scene is already on air"""
+        try:
+            playlist = self.playing
+            if 0 <= video_index < len(playlist):
+                sent = time.monotonic()
+                if self.ab_playout:
+                    # Includes loading the deck if preload did not get to it
+                    scene_name = self.ab_playout.cut_to(playlist.filepath(video_index))
+                else:
+                    filepath = playlist.filepath(video_index)
+                    scene_name = video_scene_name(filepath)
+                    self.obs_client.set_current_program_scene(scene_name)
+                    if restart:
+                        # Same scene back to back: OBS ignores the cut, so play the clip from the top
+                        self.obs_client.trigger_media_input_action(video_source_name(filepath),
+                                                                   'OBS_WEBSOCKET_MEDIA_INPUT_ACTION_RESTART')
+                self.last_cut_at = time.monotonic()
+                metrics.obs_request.observe(self.last_cut_at - sent)
+                print(f"✅ Switched to: {scene_name}")
+        except Exception as e:
+            print(f"❌ Error switching scene: {e}")
+
+    def warm_up(self, slot):
+        """Queue the pre-roll of the clip that airs in slot, on the input it will play from"""
+        if slot is None or not self.preroller:
+            return
+        playlist = self.playing
+        filepath = playlist.filepath(slot.index)
+        if self.ab_playout:
+            # prepare_next has already loaded it into the idle deck
+            input_name = AB_DECKS[self.ab_playout.idle_deck()][1]
+        else:
+            input_name = video_source_name(filepath)
+        self.preroller.warm(filepath, input_name, f"#{slot.index+1} {playlist.filename(slot.index)}")
+
+    def prepare_next(self, slot):
+        """After a cut, get the following video ready (A/B mode loads it into the idle deck)"""
+        if not self.ab_playout:
+            return
+        playlist = self.playing
+        next_slot = playlist.slot_at(slot.end)
+        if next_slot is None:
+            return
+        next_index = next_slot.index
+        try:
+            sent = time.monotonic()
+            self.ab_playout.preload(playlist.filepath(next_index))
+            metrics.obs_request.observe(time.monotonic() - sent)
+            print(f"⏳ Preloaded #{next_index+1} into idle deck")
+        except Exception as e:
+            print(f"❌ Error preloading next video: {e}")
+
+    def open_event_client(self):
+        """Listen for OBS media events next to the request client; wall-clock cuts remain the fallback"""
+        self.close_event_client()
+        try:
+            self.event_client = obs.EventClient(**self.obs_client.endpoint, subs=obs.Subs.MEDIAINPUTS)
+            self.event_client.callback.register(self.on_media_input_playback_ended)
+            print("✅ Listening for OBS media-end events")
+        except Exception as e:
+            self.event_client = None
+            print(f"⚠️ OBS events unavailable, using the clock only: {e}")
+
+    def close_event_client(self):
+        if self.event_client:
+            try:
+                self.event_client.disconnect()
+            except:
+                pass
+            self.event_client = None
+
+    def on_air_input_name(self):
+        """Name of the media input currently on program"""
+        if self.ab_playout:
+            return AB_DECKS[self.ab_playout.on_air][1] if self.ab_playout.on_air is not None else None
+        if self.current_video_index < 0:
+            return None
+        return video_source_name(self.playing.filepath(self.current_video_index))
+
+    def on_media_input_playback_ended(self, data):
+        """OBS event thread: the on-air clip finished, so advance now instead of waiting for the clock"""
+        slot = self.current_slot
+        if not self.broadcasting or slot is None or data.input_name != self.on_air_input_name():
+            return
+        if time.monotonic() - self.last_cut_at < 1.0:
+            # Stale event from the clip we just cut away from
+            return
+        if slot.end >= self.playing.schedule.total:
+            return
+        if self.anchor is not None:
+            # Pulling the schedule forward would put the rest of the day ahead of the wall clock
+            print(f"🎞 {data.input_name} ended {slot.end - self.get_elapsed():.1f}s early - holding until the scheduled cut")
+            return
+        self.move_schedule_to(slot.end)
+        print(f"🎞 {data.input_name} ended - advancing to the next clip")
+        self.wake_controller()
+
+    def skip_to_next(self):
+        """Skip to next video in schedule"""
+        if not self.broadcasting:
+            return
+        elapsed = self.get_elapsed()
+        playlist = self.playing
+        slot = playlist.slot_at(elapsed)
+        if slot and slot.end < playlist.schedule.total:
+            self.move_schedule_to(slot.end)
+            self.journal_position()
+            self.wake_controller()
+
+    def jump_to(self, video_index):
+        """Move the schedule so video_index starts now"""
+        playlist = self.snapshot
+        if not self.broadcasting or not 0 <= video_index < len(playlist):
+            return
+        self.move_schedule_to(playlist.schedule.start_of(video_index))
+        self.journal_position()
+        self.wake_controller()
+
+    def emergency_scene(self):
+        """Switch to emergency scene immediately; raises if OBS refuses"""
+        self.obs_client.set_current_program_scene(EMERGENCY_SCENE)
+        print("🚨 Switched to Emergency Scene")
+
+    def status(self):
+        """Snapshot of the live position for status displays and the control socket"""
+        index = self.current_video_index
+        playlist = self.playing
+        return {
+            'broadcasting': self.broadcasting,
+            'elapsed': self.get_elapsed() if self.broadcasting else None,
+            'current_index': index,
+            'current_file': playlist.filename(index) if 0 <= index < len(playlist) else None,
+            'playout_mode': self.playout_mode,
+            'anchor': self.anchor,
+            'clock_drift': self.clock_drift() if self.broadcasting else None,
+            'obs': self.obs_client.status() if self.obs_client else None,
+            'watchdog': self.watchdog.status() if self.watchdog else None,
+        }
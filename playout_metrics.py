@@ -0,0 +1,218 @@
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Bucket upper bounds in seconds; cut error is signed (negative = early)
+CUT_ERROR_BUCKETS = (-0.1, -0.05, -0.02, -0.01, -0.005, -0.002, 0.0, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1,
+                     0.25, 0.5, 1.0)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+PROBE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and a few adds under a lock"""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.bounds = tuple(buckets)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.count = 0
+            self.sum = 0.0
+            self.min = None
+            self.max = None
+
+    def observe(self, value):
+        k = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[k] += 1
+            self.count += 1
+            self.sum += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside the bucket it falls in"""
+        with self.lock:
+            counts = list(self.counts)
+            total, low, high = self.count, self.min, self.max
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for k, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[k - 1] if k > 0 else low
+                upper = self.bounds[k] if k < len(self.bounds) else high
+                lower, upper = max(lower, low), min(upper, high)
+                return lower + (upper - lower) * ((rank - seen) / count)
+            seen += count
+        return high
+
+    def snapshot(self):
+        with self.lock:
+            count, total, low, high = self.count, self.sum, self.min, self.max
+        return {
+            'count': count,
+            'mean': total / count if count else None,
+            'min': low,
+            'max': high,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+    def prometheus_lines(self, prefix):
+        name = prefix + self.name
+        with self.lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+        lines = [f"# HELP {name} {self.help_text}", f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds, counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {count}')
+        lines.append(f"{name}_sum {total:.9g}")
+        lines.append(f"{name}_count {count}")
+        return lines
+
+
+class PlayoutMetrics:
+    """The scheduler's timing histograms, shared by the GUI, the engine and the probe workers"""
+
+    PREFIX = 'obs_scheduler_'
+
+    def __init__(self):
+        self.cut_error = Histogram('cut_error_seconds', "Actual minus scheduled cut time", CUT_ERROR_BUCKETS)
+        self.obs_request = Histogram('obs_request_seconds', "OBS WebSocket request round trip", LATENCY_BUCKETS)
+        self.wake_jitter = Histogram('controller_wake_jitter_seconds',
+                                     "How late the broadcast controller woke up for a deadline", LATENCY_BUCKETS)
+        self.ffprobe = Histogram('ffprobe_seconds', "ffprobe run time per file", PROBE_BUCKETS)
+        self.header_parse = Histogram('header_parse_seconds', "Container header duration read per file",
+                                      LATENCY_BUCKETS)
+        self.timeline_render = Histogram('timeline_render_seconds', "update_timeline run time", LATENCY_BUCKETS)
+        self.clock_drift = Histogram('clock_drift_seconds',
+                                     "Wall clock minus monotonic clock since an anchored broadcast started",
+                                     CUT_ERROR_BUCKETS)
+        self.obs_keepalive = Histogram('obs_keepalive_seconds', "OBS keepalive GetVersion round trip",
+                                       LATENCY_BUCKETS)
+        self.obs_reconnect = Histogram('obs_reconnect_seconds', "Time from losing the OBS link to having it back",
+                                       PROBE_BUCKETS)
+        self.preroll_read = Histogram('preroll_read_seconds', "Reading the next clip into the page cache before its cut",
+                                      PROBE_BUCKETS)
+        self.transition_gap = Histogram('transition_gap_seconds',
+                                        "From sending a cut to OBS reporting the new clip playing", LATENCY_BUCKETS)
+        self.preflight_check = Histogram('preflight_check_seconds',
+                                         "Pre-flight stream probe and head/tail decode per file", PROBE_BUCKETS)
+        self.watchdog_detection = Histogram('watchdog_detection_seconds',
+                                            "How long on-air playback was stuck before the watchdog failed over",
+                                            PROBE_BUCKETS)
+        self.watchdog_failover = Histogram('watchdog_failover_seconds',
+                                           "Watchdog switch to Emergency_Scene round trip", LATENCY_BUCKETS)
+        self.histograms = (self.cut_error, self.obs_request, self.wake_jitter, self.ffprobe, self.header_parse,
+                           self.timeline_render, self.clock_drift, self.obs_keepalive, self.obs_reconnect,
+                           self.preroll_read, self.transition_gap, self.preflight_check,
+                           self.watchdog_detection, self.watchdog_failover)
+        self.started = time.time()
+
+    def reset(self):
+        for histogram in self.histograms:
+            histogram.reset()
+
+    def snapshot(self):
+        return {
+            'timestamp': time.time(),
+            'uptime_seconds': time.time() - self.started,
+            'histograms': {histogram.name: histogram.snapshot() for histogram in self.histograms},
+        }
+
+    def prometheus_text(self):
+        lines = []
+        for histogram in self.histograms:
+            lines.extend(histogram.prometheus_lines(self.PREFIX))
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Replace path with the current metrics: Prometheus text for .prom, JSON otherwise"""
+        if path.endswith('.prom'):
+            text = self.prometheus_text()
+        else:
+            text = json.dumps(self.snapshot(), indent=2)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+
+metrics = PlayoutMetrics()
+
+
+class MetricsFileWriter:
+    """Rewrite a metrics file every interval seconds on a daemon thread"""
+
+    def __init__(self, path, interval=10.0, registry=None):
+        self.path = path
+        self.interval = interval
+        self.registry = registry or metrics
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        try:
+            self.registry.write_file(self.path)
+        except OSError as e:
+            print(f"⚠️ Could not write metrics to {self.path}: {e}")
+
+    def stop(self):
+        self.stopped.set()
+        self.flush()
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        registry = self.server.registry
+        if self.path in ('/', '/metrics'):
+            body = registry.prometheus_text().encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        elif self.path == '/metrics.json':
+            body = json.dumps(registry.snapshot()).encode('utf-8')
+            content_type = 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, registry=None):
+    """Serve /metrics (Prometheus text) and /metrics.json on localhost; returns the server"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), MetricsRequestHandler)
+    server.daemon_threads = True
+    server.registry = registry or metrics
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
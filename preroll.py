@@ -0,0 +1,124 @@
+"""Warm up the next clip before its cut, and time how long each cut takes to show the new clip
+
+The media inputs only start decoding when their scene goes on program, so
+on a slow disk or with a long-GOP file the first frame can arrive late.
+Before each boundary the Preroller reads the start of the upcoming file
+(and its tail, where a non-faststart MP4 keeps the moov atom) into the OS
+page cache and asks OBS whether the input that will play it is there.
+After each cut it polls GetMediaInputStatus until the new input is playing
+and records that gap. Everything runs on one daemon thread so the broadcast
+thread never waits on the disk or on the polls.
+"""
+import os
+import queue
+import threading
+import time
+
+from playout_metrics import metrics
+
+MEDIA_STATE_PLAYING = 'OBS_MEDIA_STATE_PLAYING'
+
+# Seconds before a cut that the next clip is warmed up
+PREROLL_LEAD = 3.0
+
+# Enough of the file for the container header and the first GOPs of a high-bitrate clip
+PREROLL_HEAD_BYTES = 8 << 20
+PREROLL_TAIL_BYTES = 1 << 20
+READ_CHUNK = 1 << 20
+
+
+def read_ahead(filepath, head_bytes=PREROLL_HEAD_BYTES, tail_bytes=PREROLL_TAIL_BYTES):
+    """Read the start and end of a file so they are in the page cache; returns the bytes read"""
+    read = 0
+    with open(filepath, 'rb', buffering=0) as f:
+        while read < head_bytes:
+            chunk = f.read(min(READ_CHUNK, head_bytes - read))
+            if not chunk:
+                return read
+            read += len(chunk)
+        size = os.fstat(f.fileno()).st_size
+        if size > read:
+            f.seek(max(read, size - tail_bytes))
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                read += len(chunk)
+    return read
+
+
+class Preroller:
+    """Background warm-up and transition-gap measurement for one broadcast
+
+    client is the engine's ObsConnection (or any ReqClient). warm() and
+    measure_gap() only queue work, so they are safe to call from the
+    broadcast thread right before or after a cut.
+    """
+
+    # Gaps are timed to within a frame or so; polling faster would crowd the cuts off the shared connection
+    GAP_POLL_INTERVAL = 0.05
+    GAP_TIMEOUT = 2.0
+
+    def __init__(self, client):
+        self.client = client
+        self.tasks = queue.Queue()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.tasks.put(None)
+
+    def warm(self, filepath, input_name, label):
+        self.tasks.put((self.warm_up, filepath, input_name, label))
+
+    def measure_gap(self, input_name, cut_at, label):
+        self.tasks.put((self.wait_for_playing, input_name, cut_at, label))
+
+    def run(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            try:
+                task[0](*task[1:])
+            except Exception as e:
+                print(f"⚠️ Pre-roll error: {e}")
+
+    def warm_up(self, filepath, input_name, label):
+        """Page in the file and check its input exists in OBS"""
+        started = time.monotonic()
+        try:
+            read = read_ahead(filepath)
+        except OSError as e:
+            print(f"⚠️ {label} will not play - cannot read {filepath}: {e}")
+            return
+        elapsed = time.monotonic() - started
+        metrics.preroll_read.observe(elapsed)
+        try:
+            self.client.get_media_input_status(input_name)
+        except Exception as e:
+            print(f"⚠️ {label} not ready in OBS ({input_name}): {e}")
+            return
+        print(f"🔥 Warmed up {label}: {read / (1 << 20):.1f} MB in {elapsed*1000:.0f} ms")
+
+    def wait_for_playing(self, input_name, cut_at, label):
+        """Poll the on-air input until it reports playing; the wait is the gap viewers saw"""
+        while True:
+            try:
+                state = self.client.get_media_input_status(input_name).media_state
+            except Exception as e:
+                print(f"⚠️ Could not time the cut to {label}: {e}")
+                return
+            gap = time.monotonic() - cut_at
+            if state == MEDIA_STATE_PLAYING:
+                metrics.transition_gap.observe(gap)
+                print(f"🎬 {label} playing {gap*1000:.0f} ms after the cut")
+                return
+            if gap > self.GAP_TIMEOUT:
+                print(f"⚠️ {label} still {state} {gap:.1f}s after the cut")
+                return
+            time.sleep(self.GAP_POLL_INTERVAL)
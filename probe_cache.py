@@ -0,0 +1,106 @@
+import json
+import os
+import sqlite3
+import threading
+
+from app_paths import get_config_dir
+
+
+class ProbeCache:
+    """On-disk ffprobe results keyed by absolute path, file size and mtime
+
+    A cached entry is only trusted while the file on disk still has the same
+    size and modification time; anything else evicts it so the file gets
+    probed again.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(get_config_dir(), 'probe_cache.sqlite3')
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS probes ('
+            'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, '
+            'duration REAL NOT NULL, metadata TEXT)'
+        )
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def cache_path(filepath):
+        return os.path.normcase(os.path.abspath(filepath))
+
+    def get(self, filepath):
+        """Return the cached (duration, metadata) for an unchanged file, else None"""
+        path = self.cache_path(filepath)
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT size, mtime_ns, duration, metadata FROM probes WHERE path = ?', (path,)
+            ).fetchone()
+            if row is not None and (st is None or row[0] != st.st_size or row[1] != st.st_mtime_ns):
+                self.conn.execute('DELETE FROM probes WHERE path = ?', (path,))
+                self.conn.commit()
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        duration, metadata = row[2], row[3]
+        return duration, json.loads(metadata) if metadata else {}
+
+    def put(self, filepath, duration, metadata=None):
+        """Remember a successful probe for the file as it is on disk right now"""
+        path = self.cache_path(filepath)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO probes (path, size, mtime_ns, duration, metadata) VALUES (?, ?, ?, ?, ?)',
+                (path, st.st_size, st.st_mtime_ns, duration, json.dumps(metadata or {}))
+            )
+            self.conn.commit()
+
+    def discard(self, filepath):
+        """Evict the entry for a file that changed or disappeared"""
+        with self.lock:
+            cursor = self.conn.execute('DELETE FROM probes WHERE path = ?', (self.cache_path(filepath),))
+            self.conn.commit()
+            self.evictions += cursor.rowcount
+
+    def prune(self):
+        """Evict entries whose files no longer exist; returns how many were removed"""
+        with self.lock:
+            paths = [row[0] for row in self.conn.execute('SELECT path FROM probes')]
+        gone = [(path,) for path in paths if not os.path.exists(path)]
+        if gone:
+            with self.lock:
+                self.conn.executemany('DELETE FROM probes WHERE path = ?', gone)
+                self.conn.commit()
+                self.evictions += len(gone)
+        return len(gone)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def open_probe_cache(db_path=None):
+    """Open the probe cache, or return None if the config folder is not writable"""
+    try:
+        return ProbeCache(db_path)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ Probe cache disabled: {e}")
+        return None
@@ -0,0 +1,103 @@
+import bisect
+from array import array
+from itertools import accumulate, islice
+
+
+class ScheduleIndex:
+    """Cumulative start offsets for the playlist, so time lookups are a binary search
+
+    starts[i] is where entry i begins, measured from the top of the schedule,
+    and starts[-1] is the total length. Edits only recompute the offsets from
+    the first entry they touch. Both columns are packed double arrays, so a
+    100k-entry schedule costs under 2 MB.
+    """
+
+    def __init__(self, durations=()):
+        self.durations = array('d', durations)
+        self.starts = array('d', [0.0])
+        self._recompute_from(0)
+
+    def __len__(self):
+        return len(self.durations)
+
+    def copy(self):
+        clone = ScheduleIndex.__new__(ScheduleIndex)
+        clone.durations = self.durations[:]
+        clone.starts = self.starts[:]
+        return clone
+
+    @property
+    def total(self):
+        return self.starts[-1]
+
+    def _recompute_from(self, i):
+        del self.starts[i + 1:]
+        self.starts.extend(islice(accumulate(self.durations[i:], initial=self.starts[i]), 1, None))
+
+    def _recompute_range(self, first, last):
+        # Only valid when the total length of first..last is unchanged
+        for k in range(first, last + 1):
+            self.starts[k + 1] = self.starts[k] + self.durations[k]
+
+    def insert(self, i, durations):
+        """Insert entries before position i"""
+        self.durations[i:i] = array('d', durations)
+        self._recompute_from(i)
+
+    def delete(self, indices):
+        """Remove the entries at the given positions"""
+        runs = contiguous_runs(indices)
+        if not runs:
+            return
+        for start, stop in reversed(runs):
+            del self.durations[start:stop]
+        self._recompute_from(runs[0][0])
+
+    def delete_range(self, start, stop):
+        """Remove entries start..stop-1"""
+        del self.durations[start:stop]
+        self._recompute_from(start)
+
+    def move_range(self, start, stop, to):
+        """Move entries start..stop-1 so the block begins at position to afterwards"""
+        block = self.durations[start:stop]
+        del self.durations[start:stop]
+        self.durations[to:to] = block
+        self._recompute_range(min(start, to), max(stop, to + len(block)) - 1)
+
+    def swap(self, i, j):
+        """Exchange two entries; only the offsets between them move"""
+        self.durations[i], self.durations[j] = self.durations[j], self.durations[i]
+        self._recompute_range(min(i, j), max(i, j))
+
+    def set_duration(self, i, duration):
+        """Change one entry's length; every later start shifts by the difference"""
+        self.durations[i] = duration
+        self._recompute_from(i)
+
+    def clear(self):
+        del self.durations[:]
+        del self.starts[1:]
+
+    def start_of(self, i):
+        return self.starts[i]
+
+    def end_of(self, i):
+        return self.starts[i + 1]
+
+    def index_at(self, elapsed_seconds):
+        """Entry playing at the given offset into the schedule, or -1 past either end"""
+        if not self.durations or elapsed_seconds < 0 or elapsed_seconds >= self.starts[-1]:
+            return -1
+        return bisect.bisect_right(self.starts, elapsed_seconds) - 1
+
+
+def contiguous_runs(indices):
+    """Group positions into sorted (start, stop) runs of consecutive indices"""
+    runs = []
+    for i in sorted(set(indices)):
+        if runs and runs[-1][1] == i:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1])
+    return [tuple(run) for run in runs]
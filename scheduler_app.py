@@ -1,33 +1,76 @@
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+from tkinter import ttk, filedialog, messagebox, simpledialog
 import json
 import os
-import subprocess
-import sys
 from pathlib import Path
 import time
 import threading
 from datetime import datetime, timedelta
 from tkinterdnd2 import DND_FILES, TkinterDnD
-import obsws_python as obs
+from media_probe import ProbeJob, get_video_duration
+from media_check import PreflightJob, describe, playlist_risks, preflight_risks
+from watch_folder import VIDEO_EXTENSIONS, FolderWatcher, scan_videos
+from probe_cache import open_probe_cache
+from playlist_store import PlaylistStore, schedule_document
+from schedule_index import contiguous_runs
+from timeline_view import TimelineView
+from obs_connection import parse_endpoints
+from obs_scenes import PLAYOUT_AB, PLAYOUT_PER_SCENE, provision_scenes
+from playout_engine import PlayoutEngine, anchor_timestamp, format_clock, format_duration, time_to_seconds
+from playout_metrics import MetricsFileWriter, metrics
+from preroll import PREROLL_LEAD
+from media_watchdog import STALL_THRESHOLD, WATCHDOG_INTERVAL
+from app_paths import get_config_dir
+from broadcast_journal import open_broadcast_journal
+
+PLAYOUT_MODES = {"Scene per video": PLAYOUT_PER_SCENE, "A/B double buffer": PLAYOUT_AB}
 
 class PlaylistScheduler:
-    def __init__(self, root):
+    def __init__(self, root, journal=True):
         self.root = root
         self.root.title("OBS Playlist Scheduler v1.2 - Live Broadcast Automation")
         self.root.geometry("1400x800")
         
-        self.videos = []
+        # Playlist edits and playout events are journaled so a crash or reboot picks up where it left off
+        self.journal = open_broadcast_journal() if journal else None
+        self.videos = self.journal.playlist if self.journal else PlaylistStore()
+        self.schedule = self.videos.schedule
+        self.indicator_index = -1
+        self.timeline_start = 0
         self.clipboard_data = []
-        self.broadcasting = False
-        self.broadcast_thread = None
-        self.obs_client = None
-        self.current_video_index = -1
-        self.broadcast_start_time = None
-        self.manual_time_offset = 0
+        self.obs_settings = {
+            'address': '127.0.0.1:4455',     # v5 default port; add ", host:port" for fallback machines
+            'password': 'Abcd!234',          # Add your actual OBS password
+        }
+        self.load_obs_settings()
+        self.engine = PlayoutEngine(self.videos, parse_endpoints(self.obs_settings['address'],
+                                                                 self.obs_settings['password']))
+        self.engine.journal = self.journal
+        self.resume = self.journal.resume_point() if self.journal else None
+        self.connect_result = None
+        self.provision_thread = None
+        self.provision_progress = (0, 0)
+        self.provision_report = None
+        self.provision_error = None
+        self.probe_job = None
+        self.probe_requests = []
+        self.preflight_job = None
+        self.preflight_reports = {}
+        self.watchdog_failovers = 0
+        self.folder_watcher = None
+        self.probe_cache = open_probe_cache()
+        if self.probe_cache:
+            threading.Thread(target=self.probe_cache.prune, daemon=True).start()
+        self.metrics_writer = None
+        try:
+            self.metrics_writer = MetricsFileWriter(os.path.join(get_config_dir(), 'playout_metrics.json')).start()
+        except OSError as e:
+            print(f"⚠️ Playout metrics file disabled: {e}")
         
         self.setup_ui()
         self.setup_drag_drop()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.restore_from_journal()
         
     def setup_ui(self):
         # Main frame
@@ -47,7 +90,13 @@ class PlaylistScheduler:
         # File operations
         ttk.Label(left_panel, text="📁 File Management", font=('Arial', 9, 'bold')).grid(row=0, column=0, pady=(0,5), sticky=tk.W)
         ttk.Button(left_panel, text="Add Videos", command=self.add_videos).grid(row=1, column=0, pady=2, sticky=(tk.W, tk.E))
-        ttk.Button(left_panel, text="Add Folder", command=self.add_folder).grid(row=2, column=0, pady=2, sticky=(tk.W, tk.E))
+        folder_frame = ttk.Frame(left_panel)
+        folder_frame.grid(row=2, column=0, pady=2, sticky=(tk.W, tk.E))
+        folder_frame.columnconfigure(0, weight=1)
+        folder_frame.columnconfigure(1, weight=1)
+        ttk.Button(folder_frame, text="Add Folder", command=self.add_folder).grid(row=0, column=0, padx=(0,2), sticky=(tk.W, tk.E))
+        self.watch_btn = ttk.Button(folder_frame, text="👁 Watch Folder", command=self.toggle_watch_folder)
+        self.watch_btn.grid(row=0, column=1, padx=(2,0), sticky=(tk.W, tk.E))
         
         ttk.Separator(left_panel, orient='horizontal').grid(row=3, column=0, sticky=(tk.W, tk.E), pady=5)
         
@@ -63,6 +112,27 @@ class PlaylistScheduler:
         self.start_time_entry = ttk.Entry(time_frame, textvariable=self.start_time_var, width=10)
         self.start_time_entry.grid(row=0, column=1, sticky=tk.W)
         
+        self.precise_timing_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(time_frame, text="Precise cuts (deadline timer)", variable=self.precise_timing_var).grid(row=1, column=0, columnspan=2, sticky=tk.W)
+        
+        self.event_switching_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(time_frame, text="Advance on OBS media-end events", variable=self.event_switching_var).grid(row=2, column=0, columnspan=2, sticky=tk.W)
+        
+        self.anchor_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(time_frame, text="Anchor to wall clock (late start joins mid-clip)", variable=self.anchor_var).grid(row=3, column=0, columnspan=2, sticky=tk.W)
+        ttk.Label(time_frame, text="Date:").grid(row=4, column=0, padx=(0,5), sticky=tk.W)
+        self.start_date_var = tk.StringVar(value=datetime.now().strftime("%Y-%m-%d"))
+        ttk.Entry(time_frame, textvariable=self.start_date_var, width=12).grid(row=4, column=1, sticky=tk.W)
+        ttk.Label(time_frame, text="Timezone:").grid(row=5, column=0, padx=(0,5), sticky=tk.W)
+        self.timezone_var = tk.StringVar(value="")
+        ttk.Entry(time_frame, textvariable=self.timezone_var, width=20).grid(row=5, column=1, sticky=tk.W)
+        ttk.Label(time_frame, text="Pre-roll (s):").grid(row=6, column=0, padx=(0,5), sticky=tk.W)
+        self.preroll_var = tk.DoubleVar(value=PREROLL_LEAD)
+        ttk.Spinbox(time_frame, textvariable=self.preroll_var, from_=0, to=30, increment=0.5, width=6).grid(row=6, column=1, sticky=tk.W)
+        ttk.Label(time_frame, text="Stall failover (s):").grid(row=7, column=0, padx=(0,5), sticky=tk.W)
+        self.stall_threshold_var = tk.DoubleVar(value=STALL_THRESHOLD)
+        ttk.Spinbox(time_frame, textvariable=self.stall_threshold_var, from_=0, to=60, increment=1, width=6).grid(row=7, column=1, sticky=tk.W)
+        
         ttk.Button(left_panel, text="⏰ Set Current Time", command=self.set_current_time).grid(row=6, column=0, pady=2, sticky=(tk.W, tk.E))
         
         ttk.Separator(left_panel, orient='horizontal').grid(row=7, column=0, sticky=(tk.W, tk.E), pady=5)
@@ -71,48 +141,83 @@ class PlaylistScheduler:
         ttk.Label(left_panel, text="✏️ Playlist Editing", font=('Arial', 9, 'bold')).grid(row=8, column=0, pady=(0,5), sticky=tk.W)
         ttk.Button(left_panel, text="Move Up", command=self.move_up).grid(row=9, column=0, pady=1, sticky=(tk.W, tk.E))
         ttk.Button(left_panel, text="Move Down", command=self.move_down).grid(row=10, column=0, pady=1, sticky=(tk.W, tk.E))
-        ttk.Button(left_panel, text="Delete Selected", command=self.delete_selected).grid(row=11, column=0, pady=1, sticky=(tk.W, tk.E))
-        ttk.Button(left_panel, text="Clear All", command=self.clear_all).grid(row=12, column=0, pady=1, sticky=(tk.W, tk.E))
+        delete_frame = ttk.Frame(left_panel)
+        delete_frame.grid(row=11, column=0, pady=1, sticky=(tk.W, tk.E))
+        delete_frame.columnconfigure(0, weight=1)
+        delete_frame.columnconfigure(1, weight=1)
+        ttk.Button(delete_frame, text="Delete Selected", command=self.delete_selected).grid(row=0, column=0, padx=(0,2), sticky=(tk.W, tk.E))
+        ttk.Button(delete_frame, text="Clear All", command=self.clear_all).grid(row=0, column=1, padx=(2,0), sticky=(tk.W, tk.E))
+        
+        block_frame = ttk.Frame(left_panel)
+        block_frame.grid(row=12, column=0, pady=1, sticky=(tk.W, tk.E))
+        for column in range(3):
+            block_frame.columnconfigure(column, weight=1)
+        ttk.Button(block_frame, text="Copy", command=self.copy_selected).grid(row=0, column=0, padx=(0,2), sticky=(tk.W, tk.E))
+        ttk.Button(block_frame, text="Paste", command=self.paste_block).grid(row=0, column=1, padx=2, sticky=(tk.W, tk.E))
+        ttk.Button(block_frame, text="🔁 Repeat", command=self.repeat_block).grid(row=0, column=2, padx=(2,0), sticky=(tk.W, tk.E))
         
         ttk.Separator(left_panel, orient='horizontal').grid(row=13, column=0, sticky=(tk.W, tk.E), pady=5)
         
         # OBS Connection
         ttk.Label(left_panel, text="🔗 OBS Connection", font=('Arial', 9, 'bold')).grid(row=14, column=0, pady=(0,5), sticky=tk.W)
         
-        self.connect_btn = ttk.Button(left_panel, text="Connect to OBS", command=self.connect_obs)
-        self.connect_btn.grid(row=15, column=0, pady=2, sticky=(tk.W, tk.E))
+        obs_frame = ttk.Frame(left_panel)
+        obs_frame.grid(row=15, column=0, sticky=(tk.W, tk.E))
+        obs_frame.columnconfigure(1, weight=1)
+        ttk.Label(obs_frame, text="Address:").grid(row=0, column=0, padx=(0,5), sticky=tk.W)
+        self.obs_address_var = tk.StringVar(value=self.obs_settings['address'])
+        ttk.Entry(obs_frame, textvariable=self.obs_address_var, width=18).grid(row=0, column=1, sticky=(tk.W, tk.E))
+        ttk.Label(obs_frame, text="Password:").grid(row=1, column=0, padx=(0,5), pady=(2,0), sticky=tk.W)
+        self.obs_password_var = tk.StringVar(value=self.obs_settings['password'])
+        ttk.Entry(obs_frame, textvariable=self.obs_password_var, show='*', width=18).grid(row=1, column=1, pady=(2,0), sticky=(tk.W, tk.E))
+        self.connect_btn = ttk.Button(obs_frame, text="Connect to OBS", command=self.connect_obs)
+        self.connect_btn.grid(row=2, column=0, columnspan=2, pady=2, sticky=(tk.W, tk.E))
         
         self.connection_status = ttk.Label(left_panel, text="● Disconnected", foreground="red", font=('Arial', 8))
         self.connection_status.grid(row=16, column=0, sticky=tk.W)
         
-        self.setup_btn = ttk.Button(left_panel, text="🎬 Setup OBS Scenes", command=self.setup_obs_scenes)
-        self.setup_btn.grid(row=17, column=0, pady=2, sticky=(tk.W, tk.E))
+        mode_frame = ttk.Frame(left_panel)
+        mode_frame.grid(row=17, column=0, sticky=(tk.W, tk.E), pady=2)
+        mode_frame.columnconfigure(1, weight=1)
+        ttk.Label(mode_frame, text="Playout:").grid(row=0, column=0, padx=(0,5))
+        self.playout_mode_var = tk.StringVar(value="Scene per video")
+        ttk.Combobox(mode_frame, textvariable=self.playout_mode_var, values=list(PLAYOUT_MODES),
+                     state='readonly', width=18).grid(row=0, column=1, sticky=(tk.W, tk.E))
+        
+        setup_frame = ttk.Frame(left_panel)
+        setup_frame.grid(row=18, column=0, pady=2, sticky=(tk.W, tk.E))
+        setup_frame.columnconfigure(0, weight=1)
+        setup_frame.columnconfigure(1, weight=1)
+        self.setup_btn = ttk.Button(setup_frame, text="🎬 Setup OBS Scenes", command=self.setup_obs_scenes)
+        self.setup_btn.grid(row=0, column=0, padx=(0,2), sticky=(tk.W, tk.E))
+        self.preflight_btn = ttk.Button(setup_frame, text="🩺 Pre-flight Check", command=self.run_preflight)
+        self.preflight_btn.grid(row=0, column=1, padx=(2,0), sticky=(tk.W, tk.E))
         self.setup_btn.configure(state='disabled')
         
-        ttk.Separator(left_panel, orient='horizontal').grid(row=18, column=0, sticky=(tk.W, tk.E), pady=5)
+        ttk.Separator(left_panel, orient='horizontal').grid(row=19, column=0, sticky=(tk.W, tk.E), pady=5)
         
         # Live broadcast controls
-        ttk.Label(left_panel, text="🔴 Live Broadcast", font=('Arial', 9, 'bold')).grid(row=19, column=0, pady=(0,5), sticky=tk.W)
+        ttk.Label(left_panel, text="🔴 Live Broadcast", font=('Arial', 9, 'bold')).grid(row=20, column=0, pady=(0,5), sticky=tk.W)
         
         self.start_btn = ttk.Button(left_panel, text="▶ Start Broadcasting", command=self.start_broadcast)
-        self.start_btn.grid(row=20, column=0, pady=2, sticky=(tk.W, tk.E))
+        self.start_btn.grid(row=21, column=0, pady=2, sticky=(tk.W, tk.E))
         self.start_btn.configure(state='disabled')
         
         self.stop_btn = ttk.Button(left_panel, text="⏹ Stop Broadcasting", command=self.stop_broadcast)
-        self.stop_btn.grid(row=21, column=0, pady=2, sticky=(tk.W, tk.E))
+        self.stop_btn.grid(row=22, column=0, pady=2, sticky=(tk.W, tk.E))
         self.stop_btn.configure(state='disabled')
         
         self.skip_btn = ttk.Button(left_panel, text="⏭ Skip to Next", command=self.skip_to_next)
-        self.skip_btn.grid(row=22, column=0, pady=1, sticky=(tk.W, tk.E))
+        self.skip_btn.grid(row=23, column=0, pady=1, sticky=(tk.W, tk.E))
         self.skip_btn.configure(state='disabled')
         
         self.emergency_btn = ttk.Button(left_panel, text="🚨 Emergency Scene", command=self.emergency_scene)
-        self.emergency_btn.grid(row=23, column=0, pady=1, sticky=(tk.W, tk.E))
+        self.emergency_btn.grid(row=24, column=0, pady=1, sticky=(tk.W, tk.E))
         self.emergency_btn.configure(state='disabled')
         
-        ttk.Separator(left_panel, orient='horizontal').grid(row=24, column=0, sticky=(tk.W, tk.E), pady=5)
+        ttk.Separator(left_panel, orient='horizontal').grid(row=25, column=0, sticky=(tk.W, tk.E), pady=5)
         
-        ttk.Button(left_panel, text="💾 Export Playlist", command=self.export_playlist).grid(row=25, column=0, pady=5, sticky=(tk.W, tk.E))
+        ttk.Button(left_panel, text="💾 Export Playlist", command=self.export_playlist).grid(row=26, column=0, pady=5, sticky=(tk.W, tk.E))
         
         left_panel.columnconfigure(0, weight=1)
         
@@ -154,6 +259,8 @@ class PlaylistScheduler:
         self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
         
+        self.timeline = TimelineView(self.tree, scrollbar, count=lambda: len(self.videos), row=self.timeline_row)
+        
         right_panel.columnconfigure(0, weight=1)
         right_panel.rowconfigure(1, weight=1)
         
@@ -164,34 +271,50 @@ class PlaylistScheduler:
         self.context_menu.add_command(label="Move Up", command=self.move_up)
         self.context_menu.add_command(label="Move Down", command=self.move_down)
         self.context_menu.add_separator()
+        self.context_menu.add_command(label="Copy", command=self.copy_selected)
+        self.context_menu.add_command(label="Paste After", command=self.paste_block)
+        self.context_menu.add_command(label="Repeat Block...", command=self.repeat_block)
+        self.context_menu.add_separator()
         self.context_menu.add_command(label="Delete", command=self.delete_selected)
         
         self.tree.bind("<Button-3>", self.show_context_menu)
         self.tree.bind("<Double-1>", self.on_double_click)
+        self.tree.bind("<Control-c>", lambda event: self.copy_selected())
+        self.tree.bind("<Control-v>", lambda event: self.paste_block())
         
         # Status bar
+        bottom_frame = ttk.Frame(main_frame)
+        bottom_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10,0))
+        bottom_frame.columnconfigure(0, weight=1)
+        
         self.status_var = tk.StringVar()
         self.status_var.set("Ready - Set start time and connect to OBS for live automation")
-        status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
-        status_bar.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10,0))
+        status_bar = ttk.Label(bottom_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
+        status_bar.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        
+        # Background job progress (hidden while idle)
+        self.progress = ttk.Progressbar(bottom_frame, orient=tk.HORIZONTAL, length=200, mode='determinate')
+        self.progress.grid(row=0, column=1, padx=(5,0))
+        self.progress.grid_remove()
+        self.cancel_btn = ttk.Button(bottom_frame, text="Cancel", command=self.cancel_probing)
+        self.cancel_btn.grid(row=0, column=2, padx=(5,0))
+        self.cancel_btn.grid_remove()
         
         # Start UI update loop
         self.update_ui_loop()
     
     def set_current_time(self):
         """Set start time to current system time"""
-        current_time = datetime.now().strftime("%H:%M:%S")
+        now = datetime.now()
+        current_time = now.strftime("%H:%M:%S")
         self.start_time_var.set(current_time)
+        self.start_date_var.set(now.strftime("%Y-%m-%d"))
         self.update_timeline()
         self.status_var.set(f"Schedule start time set to {current_time}")
     
     def time_to_seconds(self, time_str):
         """Convert HH:MM:SS to seconds"""
-        try:
-            h, m, s = map(int, time_str.split(':'))
-            return h * 3600 + m * 60 + s
-        except:
-            return 0
+        return time_to_seconds(time_str)
     
     def setup_drag_drop(self):
         """Setup drag and drop functionality"""
@@ -205,64 +328,117 @@ class PlaylistScheduler:
     
     def update_ui_loop(self):
         """Update live status every second"""
-        if self.broadcasting:
-            current_time = time.time()
-            if self.broadcast_start_time:
-                elapsed = (current_time - self.broadcast_start_time) + self.manual_time_offset
+        if self.engine.broadcasting:
+            if self.engine.broadcast_start_time:
+                elapsed = self.engine.get_elapsed()
                 elapsed_str = self.format_duration(elapsed)
                 self.time_label.configure(text=f"Elapsed: {elapsed_str}")
                 self.update_current_video_indicator(elapsed)
         else:
             self.time_label.configure(text="")
+        self.update_connection_status()
+        self.update_watchdog_status()
+        if self.journal and self.journal.needs_compaction():
+            self.journal.compact()
         
         self.root.after(1000, self.update_ui_loop)
     
+    def load_obs_settings(self):
+        """Pick up the OBS address and password saved by the last successful connect"""
+        try:
+            with open(os.path.join(get_config_dir(), 'obs_connection.json'), encoding='utf-8') as f:
+                saved = json.load(f)
+            self.obs_settings.update({key: str(saved[key]) for key in self.obs_settings if key in saved})
+        except (OSError, ValueError, TypeError):
+            pass
+    
+    def save_obs_settings(self):
+        try:
+            with open(os.path.join(get_config_dir(), 'obs_connection.json'), 'w', encoding='utf-8') as f:
+                json.dump(self.obs_settings, f, indent=2)
+        except OSError as e:
+            print(f"⚠️ Could not save OBS settings: {e}")
+    
+    def update_connection_status(self):
+        """Show the managed connection's state; it reconnects on its own thread"""
+        connection = self.engine.obs_client
+        if not connection:
+            return
+        status = connection.status()
+        if status['state'] == 'connected':
+            rtt = f" · {status['rtt']*1000:.0f} ms" if status['rtt'] is not None else ""
+            self.connection_status.configure(text=f"● Connected to {status['endpoint']}{rtt}", foreground="green")
+        elif status['state'] == 'reconnecting':
+            self.connection_status.configure(text=f"● Reconnecting... ({status['error']})", foreground="orange")
+    
+    def update_watchdog_status(self):
+        """Report a failover the watchdog made on its own thread"""
+        watchdog = self.engine.watchdog
+        if watchdog and watchdog.failovers != self.watchdog_failovers:
+            self.watchdog_failovers = watchdog.failovers
+            event = watchdog.last_event
+            result = f"failover failed: {event['error']}" if event['error'] else "switched to Emergency Scene"
+            self.status_var.set(f"🐕 Watchdog: {event['input']} stuck for {event['stalled']:.1f}s - {result}")
+    
     def connect_obs(self):
-        """Connect to OBS WebSocket v5 server with correct settings"""
+        """Connect to OBS WebSocket v5 in the background so the window stays responsive"""
         try:
-            if self.obs_client:
-                try:
-                    self.obs_client.disconnect()
-                except:
-                    pass
-            
-            # FIXED: Connect to v5 defaults (port 4455 with password)
-            self.obs_client = obs.ReqClient(
-                host='127.0.0.1', 
-                port=4455,                    # Changed from 4444
-                password='Abcd!234', # Add your actual OBS password
-                timeout=3
-            )
-            
-            # Test connection with v5 method name
-            version_info = self.obs_client.get_version()
-            
-            self.connection_status.configure(text="● Connected", foreground="green")
-            self.connect_btn.configure(text="Disconnect", command=self.disconnect_obs)
-            self.setup_btn.configure(state='normal')
-            
-            self.status_var.set(f"Connected to OBS {version_info.obs_version}")
-            
+            endpoints = parse_endpoints(self.obs_address_var.get(), self.obs_password_var.get())
+        except ValueError as e:
+            messagebox.showerror("Connection Failed", f"{e}\n\nUse host:port, with more separated by commas.")
+            return
+        self.obs_settings = {'address': self.obs_address_var.get().strip(), 'password': self.obs_password_var.get()}
+        self.engine.obs_settings = endpoints
+        
+        self.connect_btn.configure(state='disabled')
+        self.connection_status.configure(text="● Connecting...", foreground="orange")
+        self.connect_result = None
+        threading.Thread(target=self.run_connect, daemon=True).start()
+        self.root.after(50, self.poll_connect)
+    
+    def run_connect(self):
+        try:
+            # Resuming after a restart: OBS may still be starting up, so keep dialling instead of failing
+            self.connect_result = (self.engine.connect(retry=self.resume is not None), None)
         except Exception as e:
+            self.connect_result = (None, e)
+    
+    def poll_connect(self):
+        if self.connect_result is None:
+            self.root.after(50, self.poll_connect)
+            return
+        version_info, error = self.connect_result
+        self.connect_btn.configure(state='normal')
+        if error is not None:
             messagebox.showerror("Connection Failed", 
-                f"Could not connect to OBS WebSocket v5:\n\n{str(e)}\n\n" +
+                f"Could not connect to OBS WebSocket v5:\n\n{str(error)}\n\n" +
                 "Please verify:\n" +
                 "1. OBS is running\n" +
                 "2. Tools → WebSocket Server Settings → Enable WebSocket server\n" +
                 "3. Port is set to 4455 (v5 default)\n" +
-                "4. Copy the password from OBS and update the code")
+                "4. The password matches the one shown in OBS")
             self.disconnect_obs()
+            return
+        
+        self.save_obs_settings()
+        self.update_connection_status()
+        self.connect_btn.configure(text="Disconnect", command=self.disconnect_obs)
+        self.setup_btn.configure(state='normal')
+        if self.journal and self.journal.scenes and self.videos:
+            # Scenes are named by file, so the ones set up before the restart are still in OBS
+            self.start_btn.configure(state='normal')
+        
+        if version_info is not None:
+            self.status_var.set(f"Connected to OBS {version_info.obs_version}")
+        if self.resume:
+            self.resume_broadcast()
+        
     def disconnect_obs(self):
         """Disconnect from OBS WebSocket"""
-        if hasattr(self, 'broadcasting') and self.broadcasting:
+        if self.engine.broadcasting:
             self.stop_broadcast()
         
-        if self.obs_client:
-            try:
-                self.obs_client.disconnect()
-            except:
-                pass
-            self.obs_client = None
+        self.engine.disconnect()
         
         self.connection_status.configure(text="● Disconnected", foreground="red")
         self.connect_btn.configure(text="Connect to OBS", command=self.connect_obs)
@@ -272,121 +448,198 @@ class PlaylistScheduler:
         self.status_var.set("Disconnected from OBS")
     
     def setup_obs_scenes(self):
-        """FIXED: Create OBS scenes using v5 API correctly"""
-        if not self.obs_client or not self.videos:
+        """Create OBS scenes in the background using WebSocket v5 request batches"""
+        if not self.engine.obs_client or not self.videos:
             messagebox.showwarning("Setup Error", "Connect to OBS and add videos first.")
             return
+        if self.provision_thread and self.provision_thread.is_alive():
+            return
         
+        videos = list(self.videos)
+        self.provision_progress = (0, len(videos))
+        self.provision_report = None
+        self.provision_error = None
+        self.setup_btn.configure(state='disabled')
+        self.start_btn.configure(state='disabled')
+        self.progress.configure(maximum=len(videos), value=0)
+        self.progress.grid()
+        self.status_var.set(f"Setting up OBS scenes... 0/{len(videos)}")
+        
+        mode = PLAYOUT_MODES[self.playout_mode_var.get()]
+        self.provision_mode = mode
+        self.provision_thread = threading.Thread(target=self.run_provisioning, args=(videos, mode), daemon=True)
+        self.provision_thread.start()
+        self.root.after(100, self.poll_provisioning)
+    
+    def run_provisioning(self, videos, mode):
+        """Worker thread: send the scene batches to OBS"""
         try:
-            success_count = 0
-            failed_count = 0
-            
-            for i, video in enumerate(self.videos):
-                scene_name = f"Video_{i+1:03d}_{os.path.splitext(video['filename'])[0][:15]}"
-                source_name = f"Media_{i+1:03d}"
-                
-                try:
-                    # Step 1: Create scene
-                    self.obs_client.create_scene(scene_name)
-                    print(f"✅ Created scene: {scene_name}")
-                    
-                    # Step 2: Prepare file path
-                    file_path = os.path.abspath(video['filepath']).replace('\\', '/')
-                    
-                    input_settings = {
-                        'local_file': file_path,
-                        'is_local_file': True,
-                        'looping': False,
-                        'restart_on_activate': True,
-                        'clear_on_media_end': False,
-                        'close_when_inactive': False,
-                        'hardware_decode': False
-                    }
-                    
-                    # FIXED: CreateInput with sceneName creates AND attaches input
-                    self.obs_client.create_input(
-                        scene_name=scene_name,        # KEY FIX: Provide target scene
-                        input_name=source_name,
-                        input_kind='ffmpeg_source',
-                        input_settings=input_settings,
-                        scene_item_enabled=True       # Ensure scene item starts enabled
-                    )
-                    print(f"✅ Created and attached input: {source_name} to scene: {scene_name}")
-                    
-                    # NOTE: CreateSceneItem is NOT needed when sceneName is provided to CreateInput
-                    
-                    success_count += 1
-                    
-                except Exception as e:
-                    print(f"❌ Failed to create {scene_name}: {e}")
-                    failed_count += 1
-            
-            # Create emergency scene
-            try:
-                self.obs_client.create_scene("Emergency_Scene")
-                self.obs_client.create_input(
-                    scene_name="Emergency_Scene",
-                    input_name="Emergency_Text",
-                    input_kind="text_gdiplus_v2",
-                    input_settings={
-                        "text": "TECHNICAL DIFFICULTIES\n\nPLEASE STAND BY",
-                        "font": {"face": "Arial", "size": 72, "style": "Bold"},
-                        "color": 4294967295,
-                        "align": "center",
-                        "valign": "center"
-                    },
-                    scene_item_enabled=True
-                )
-                print("✅ Emergency scene created")
-            except Exception as e:
-                print(f"⚠️ Emergency scene error: {e}")
-            
-            # Report results
-            if success_count > 0:
-                self.start_btn.configure(state='normal')
-                msg = f"🎉 SUCCESS!\n\n✅ {success_count} scenes created with working sources!"
-                if failed_count > 0:
-                    msg += f"\n❌ {failed_count} scenes failed"
-                msg += f"\n\n📺 Sources should now appear in OBS scenes!"
-                messagebox.showinfo("Setup Complete", msg)
-                self.status_var.set(f"OBS setup: {success_count} working, {failed_count} failed")
-            else:
-                messagebox.showerror("Setup Failed", "❌ No working scenes created.")
-                
+            self.provision_report = provision_scenes(self.engine.obs_client, videos, progress=self.on_provision_progress,
+                                                     mode=mode)
         except Exception as e:
-            messagebox.showerror("Setup Error", f"Critical error:\n{str(e)}")
+            print(f"❌ Setup error: {e}")
+            self.provision_error = e
+    
+    def on_provision_progress(self, done, total):
+        self.provision_progress = (done, total)
+    
+    def poll_provisioning(self):
+        """Show batch progress and report once the worker thread is done"""
+        done, total = self.provision_progress
+        if self.provision_thread.is_alive():
+            self.progress.grid()
+            self.progress.configure(maximum=max(total, 1), value=done)
+            self.status_var.set(f"Setting up OBS scenes... {done}/{total}")
+            self.root.after(100, self.poll_provisioning)
+            return
+        
+        self.progress.grid_remove()
+        if self.engine.obs_client:
+            self.setup_btn.configure(state='normal')
+        
+        report = self.provision_report
+        if report is None:
+            messagebox.showerror("Setup Error", f"Critical error:\n{self.provision_error}")
+            return
+        
+        created_count = len(report.created)
+        removed_count = len(report.removed)
+        failed_count = len(report.failed)
+        rate = f"{created_count + removed_count} changes in {report.elapsed:.1f}s ({report.scenes_per_second:.0f} scenes/s)"
+        print(f"📊 OBS setup throughput: {rate}")
+        
+        if created_count + report.kept > 0:
+            self.start_btn.configure(state='normal')
+            if self.journal:
+                self.journal.scenes_ready(self.provision_mode)
+            msg = (f"🎉 SUCCESS!\n\n✅ {created_count} scenes created, {removed_count} removed, "
+                   f"{report.kept} already up to date\n⚡ {rate}")
+            if failed_count > 0:
+                msg += f"\n❌ {failed_count} scenes failed:"
+                for scene_name, error in report.failed[:10]:
+                    msg += f"\n   • {scene_name}: {error}"
+                if failed_count > 10:
+                    msg += f"\n   ...and {failed_count - 10} more (see console)"
+            msg += f"\n\n📺 Sources should now appear in OBS scenes!"
+            messagebox.showinfo("Setup Complete", msg)
+            self.status_var.set(f"OBS sync: {created_count} created, {removed_count} removed, "
+                                f"{report.kept} unchanged, {failed_count} failed | {rate}")
+        else:
+            details = "\n".join(f"• {scene_name}: {error}" for scene_name, error in report.failed[:10])
+            messagebox.showerror("Setup Failed", f"❌ No working scenes created.\n\n{details}")
 
     
     def start_broadcast(self):
         """Start live broadcasting with custom start time"""
-        if not self.obs_client or not self.videos:
+        if not self.engine.obs_client or not self.videos:
             messagebox.showwarning("Broadcast Error", "Connect to OBS and setup scenes first.")
             return
+        self.resume = None
+        
+        try:
+            preroll_lead = max(self.preroll_var.get(), 0.0)
+        except tk.TclError:
+            messagebox.showerror("Broadcast Error", "Pre-roll must be a number of seconds (0 turns it off).")
+            return
+        try:
+            stall_threshold = max(self.stall_threshold_var.get(), 0.0)
+        except tk.TclError:
+            messagebox.showerror("Broadcast Error", "Stall failover must be a number of seconds (0 turns it off).")
+            return
         
-        self.broadcasting = True
-        self.broadcast_start_time = time.time()
-        start_seconds = self.time_to_seconds(self.start_time_var.get())
-        self.manual_time_offset = start_seconds
-        self.current_video_index = -1
+        flagged = playlist_risks(self.videos, self.preflight_reports)
+        if flagged and not messagebox.askyesno(
+                "Pre-flight Warning",
+                f"⚠️ {len(flagged)} videos failed the pre-flight check (marked ⚠ in the timeline), "
+                f"first #{flagged[0][0] + 1} {flagged[0][1]}:\n{'; '.join(flagged[0][2])}\n\nStart broadcasting anyway?"):
+            return
         
-        self.broadcast_thread = threading.Thread(target=self.broadcast_controller, daemon=True)
-        self.broadcast_thread.start()
+        anchor = None
+        if self.anchor_var.get():
+            try:
+                anchor = anchor_timestamp(self.start_date_var.get(), self.start_time_var.get(), self.timezone_var.get())
+            except ValueError as e:
+                messagebox.showerror("Broadcast Error", f"Invalid start date, time or timezone:\n{e}")
+                return
         
-        # Update UI
+        self.engine.start(self.time_to_seconds(self.start_time_var.get()),
+                          precise_timing=self.precise_timing_var.get(),
+                          playout_mode=PLAYOUT_MODES[self.playout_mode_var.get()],
+                          event_switching=self.event_switching_var.get(),
+                          anchor=anchor,
+                          preroll_lead=preroll_lead,
+                          watchdog_interval=WATCHDOG_INTERVAL if stall_threshold > 0 else 0,
+                          stall_threshold=stall_threshold)
+        self.show_broadcasting()
+        if anchor is not None:
+            self.status_var.set(f"🔴 Live broadcast anchored to {self.start_date_var.get()} {self.start_time_var.get()} "
+                                f"{self.timezone_var.get() or 'local time'}")
+        else:
+            self.status_var.set(f"🔴 Live broadcast started from {self.start_time_var.get()}")
+    
+    def show_broadcasting(self):
+        self.watchdog_failovers = 0
         self.start_btn.configure(state='disabled')
         self.stop_btn.configure(state='normal')
         self.skip_btn.configure(state='normal')
         self.emergency_btn.configure(state='normal')
-        
         self.live_status_label.configure(text="🔴 BROADCASTING LIVE", foreground="red")
-        self.status_var.set(f"🔴 Live broadcast started from {self.start_time_var.get()}")
+    
+    def restore_from_journal(self):
+        """Show the playlist and settings replayed from the journal, and reconnect if a broadcast was cut off"""
+        if not self.videos:
+            return
+        self.start_time_var.set(format_duration(self.videos.start_time))
+        self.update_timeline()
+        self.status_var.set(f"Restored {len(self.videos)} videos from the broadcast journal")
+        print(f"📒 Restored {len(self.videos)} videos from the broadcast journal")
+        if not self.resume:
+            return
+        settings = self.resume[1]
+        for label, mode in PLAYOUT_MODES.items():
+            if mode == settings['playout_mode']:
+                self.playout_mode_var.set(label)
+        self.precise_timing_var.set(settings['precise_timing'])
+        self.event_switching_var.set(settings['event_switching'])
+        self.anchor_var.set(settings['anchor'] is not None)
+        self.preroll_var.set(settings['preroll_lead'])
+        self.stall_threshold_var.set(settings['stall_threshold'] if settings['watchdog_interval'] > 0 else 0)
+        self.status_var.set("Broadcast was interrupted - reconnecting to OBS to resume it")
+        self.root.after(500, self.connect_obs)
+    
+    def resume_broadcast(self):
+        """Carry on the interrupted broadcast at the position the wall clock says it has reached"""
+        start_offset, settings = self.journal.resume_point() or self.resume
+        self.resume = None
+        self.engine.start(start_offset, **settings)
+        self.show_broadcasting()
+        slot = self.videos.slot_at(start_offset)
+        where = f"#{slot.index + 1} {self.videos.filename(slot.index)}" if slot else "the end of the playlist"
+        self.status_var.set(f"🔴 Live broadcast resumed at {format_clock(self.timeline_start + start_offset)} ({where})")
+        print(f"📒 Resumed the interrupted broadcast {format_duration(start_offset)} in, at {where}")
+    
+    def on_close(self):
+        """Make the journal durable before exiting; a live broadcast only resumes next start if the operator says so"""
+        if self.engine.broadcasting:
+            answer = messagebox.askyesnocancel(
+                "Broadcast Live",
+                "The broadcast is still live. Stop it before closing?\n\n"
+                "Yes - stop the broadcast\n"
+                "No - leave it to resume automatically the next time the scheduler starts",
+                icon='warning')
+            if answer is None:
+                return
+            if answer:
+                self.engine.stop()
+        if self.journal:
+            self.journal.close()
+        if self.metrics_writer:
+            self.metrics_writer.stop()
+        self.root.destroy()
     
     def stop_broadcast(self):
         """Stop live broadcasting"""
-        self.broadcasting = False
-        
-        if self.broadcast_thread:
-            self.broadcast_thread.join(timeout=1)
+        self.engine.stop()
         
         # Update UI
         self.start_btn.configure(state='normal')
@@ -395,118 +648,48 @@ class PlaylistScheduler:
         self.emergency_btn.configure(state='disabled')
         
         self.live_status_label.configure(text="Broadcast Stopped", foreground="black")
-        self.current_video_index = -1
+        self.indicator_index = -1
         self.update_timeline()
         self.status_var.set("Broadcast stopped")
     
-    def broadcast_controller(self):
-        """Main broadcast loop with timing control"""
-        while self.broadcasting:
-            try:
-                current_time = time.time()
-                elapsed = (current_time - self.broadcast_start_time) + self.manual_time_offset
-                target_index = self.get_video_at_time(elapsed)
-                
-                if target_index != self.current_video_index and target_index >= 0:
-                    self.switch_to_video(target_index)
-                    self.current_video_index = target_index
-                
-                time.sleep(0.5)
-                
-            except Exception as e:
-                print(f"Broadcast controller error: {e}")
-                time.sleep(1)
-    
-    def get_video_at_time(self, elapsed_seconds):
-        """Determine which video should be playing at given time"""
-        current_time = 0
-        for i, video in enumerate(self.videos):
-            video_end = current_time + video['duration']
-            if current_time <= elapsed_seconds < video_end:
-                return i
-            current_time = video_end
-        return -1
-    
-    def switch_to_video(self, video_index):
-        """Switch OBS to specific video scene"""
-        try:
-            if 0 <= video_index < len(self.videos):
-                scene_name = f"Video_{video_index+1:03d}_{os.path.splitext(self.videos[video_index]['filename'])[0][:15]}"
-                self.obs_client.set_current_program_scene(scene_name)
-                print(f"✅ Switched to: {scene_name}")
-        except Exception as e:
-            print(f"❌ Error switching scene: {e}")
-    
     def skip_to_next(self):
         """Skip to next video in schedule"""
-        if not self.broadcasting:
-            return
-        current_time = time.time()
-        elapsed = (current_time - self.broadcast_start_time) + self.manual_time_offset
-        next_index = self.get_video_at_time(elapsed) + 1
-        if next_index < len(self.videos):
-            target_time = sum(video['duration'] for video in self.videos[:next_index])
-            adjustment = target_time - elapsed
-            self.manual_time_offset += adjustment
+        self.engine.skip_to_next()
     
     def emergency_scene(self):
         """Switch to emergency scene immediately"""
         try:
-            self.obs_client.set_current_program_scene("Emergency_Scene")
+            self.engine.emergency_scene()
             self.status_var.set("🚨 Switched to Emergency Scene")
         except Exception as e:
             messagebox.showerror("Error", f"Emergency scene failed: {e}")
     
     def jump_to_video(self):
         """Jump to selected video"""
-        selection = self.tree.selection()
-        if not selection or not self.broadcasting:
-            return
-        video_index = self.tree.index(selection[0])
-        target_time = sum(video['duration'] for video in self.videos[:video_index])
-        current_time = time.time()
-        elapsed = (current_time - self.broadcast_start_time) + self.manual_time_offset
-        adjustment = target_time - elapsed
-        self.manual_time_offset += adjustment
+        selection = self.get_selected_indices()
+        if selection:
+            self.engine.jump_to(selection[0])
     
     def update_current_video_indicator(self, elapsed_seconds):
         """Update visual indicator of currently playing video"""
-        current_index = self.get_video_at_time(elapsed_seconds)
-        for child in self.tree.get_children():
-            self.tree.set(child, 'status', '')
-        if 0 <= current_index < len(self.tree.get_children()):
-            current_item = self.tree.get_children()[current_index]
-            self.tree.set(current_item, 'status', '▶')
+        current_index = self.engine.get_video_at_time(elapsed_seconds)
+        if current_index != self.indicator_index:
+            previous_index = self.indicator_index
+            self.indicator_index = current_index
+            self.timeline.refresh_rows([previous_index, current_index])
+        if current_index >= 0:
             if current_index < len(self.videos):
-                current_video = self.videos[current_index]
-                filename = current_video['filename'][:30] + "..." if len(current_video['filename']) > 30 else current_video['filename']
+                filename = self.videos.filename(current_index)
+                filename = filename[:30] + "..." if len(filename) > 30 else filename
                 self.live_status_label.configure(text=f"🔴 NOW: {filename}")
     
     def get_video_duration(self, filepath):
-        """Get video duration using ffprobe"""
-        try:
-            if getattr(sys, 'frozen', False):
-                ffprobe_path = os.path.join(sys._MEIPASS, 'ffprobe.exe')
-            else:
-                ffprobe_path = 'ffprobe'
-            
-            cmd = [ffprobe_path, '-v', 'quiet', '-print_format', 'json', '-show_format', filepath]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode == 0:
-                data = json.loads(result.stdout)
-                return float(data['format']['duration'])
-            else:
-                return max(os.path.getsize(filepath) / (1024 * 1024 * 2), 30)
-        except:
-            return 60
+        """Get video duration, skipping ffprobe for files already in the probe cache"""
+        return get_video_duration(filepath, cache=self.probe_cache)
     
     def format_duration(self, seconds):
         """Convert seconds to HH:MM:SS format"""
-        h = int(seconds // 3600)
-        m = int((seconds % 3600) // 60)
-        s = int(seconds % 60)
-        return f"{h:02d}:{m:02d}:{s:02d}"
+        return format_duration(seconds)
     
     def add_videos(self):
         filetypes = [("Video files", "*.mp4 *.avi *.mov *.mkv *.wmv *.flv *.webm"), ("All files", "*.*")]
@@ -517,61 +700,206 @@ class PlaylistScheduler:
     def add_folder(self):
         folder = filedialog.askdirectory(title="Select video folder")
         if folder:
-            extensions = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm'}
-            files = [os.path.join(folder, f) for f in os.listdir(folder) 
-                    if Path(f).suffix.lower() in extensions]
+            files = scan_videos(folder)
             if files:
-                files.sort()
                 self.process_files(files)
     
+    def toggle_watch_folder(self):
+        """Start or stop adding videos that appear anywhere under a folder"""
+        if self.folder_watcher:
+            self.folder_watcher.stop()
+            self.folder_watcher = None
+            self.watch_btn.configure(text="👁 Watch Folder")
+            self.status_var.set("Stopped watching folder")
+            return
+        folder = filedialog.askdirectory(title="Select folder to watch")
+        if not folder:
+            return
+        # Files the playlist already has (Add Folder, or brought back by the journal) are not added again
+        imported = [self.videos.filepath(i) for i in range(len(self.videos)) if not self.videos.is_repeat(i)]
+        self.folder_watcher = FolderWatcher(folder, prober=self.get_video_duration, imported=imported).start()
+        self.watch_btn.configure(text="⏹ Stop Watching")
+        self.status_var.set(f"Watching {folder} for new videos")
+        print(f"👁 Watching folder: {folder}")
+        self.root.after(1000, self.poll_watch_folder, self.folder_watcher)
+    
+    def poll_watch_folder(self, watcher):
+        """Queue newly settled files for probing and apply re-probed durations of changed ones"""
+        if watcher is not self.folder_watcher:
+            return
+        new_files = []
+        changed = False
+        while not watcher.events.empty():
+            kind, path, duration = watcher.events.get_nowait()
+            if kind == 'new':
+                new_files.append(path)
+            elif duration and self.videos.set_duration(path, duration):
+                print(f"🔄 Updated duration: {os.path.basename(path)} ({self.format_duration(duration)})")
+                changed = True
+        if new_files:
+            print(f"👁 {len(new_files)} new videos in watched folder")
+            self.process_files(new_files)
+        if changed:
+            self.update_timeline()
+        self.root.after(1000, self.poll_watch_folder, watcher)
+    
     def process_files(self, files, insert_at=None):
-        self.status_var.set("Processing videos...")
-        self.root.update()
-        
-        new_videos = []
-        for filepath in files:
-            filename = os.path.basename(filepath)
-            duration = self.get_video_duration(filepath)
-            new_videos.append({'filepath': filepath, 'filename': filename, 'duration': duration})
-        
-        if insert_at is not None:
-            for i, video in enumerate(new_videos):
-                self.videos.insert(insert_at + i, video)
+        """Queue files for background probing; they join the playlist as results arrive"""
+        self.probe_requests.append((list(files), insert_at))
+        if self.probe_job is None:
+            self.start_next_probe_job()
+    
+    def start_next_probe_job(self):
+        """Start probing the next queued batch of files on the worker pool"""
+        if not self.probe_requests:
+            return
+        files, insert_at = self.probe_requests.pop(0)
+        
+        self.probe_job = ProbeJob(files, prober=self.get_video_duration)
+        self.probe_insert_at = insert_at
+        self.probe_added = 0
+        self.probe_cache_hits = self.probe_cache.hits if self.probe_cache else 0
+        
+        self.progress.configure(maximum=len(files), value=0)
+        self.progress.grid()
+        self.cancel_btn.grid()
+        self.status_var.set(f"Processing videos... 0/{len(files)}")
+        
+        self.probe_job.start()
+        self.root.after(50, self.poll_probe_job, self.probe_job)
+    
+    def poll_probe_job(self, job):
+        """Move finished probes into the playlist, keeping the requested order"""
+        if job is not self.probe_job:
+            return
+        
+        ready = job.take_ready()
+        if ready:
+            if self.probe_insert_at is not None:
+                position = self.probe_insert_at + self.probe_added
+            else:
+                position = len(self.videos)
+            self.videos.insert(position, ready)
+            self.timeline.rows_inserted(position, len(ready))
+            self.probe_added += len(ready)
+            self.update_timeline()
+        
+        if job.finished:
+            self.finish_probe_job()
+            return
+        
+        self.progress.configure(value=job.done_count)
+        self.status_var.set(f"Processing videos... {job.done_count}/{len(job.files)}")
+        self.root.after(50, self.poll_probe_job, job)
+    
+    def finish_probe_job(self):
+        """Report the finished batch and move on to the next queued one"""
+        job = self.probe_job
+        self.probe_job = None
+        self.progress.grid_remove()
+        self.cancel_btn.grid_remove()
+        
+        cache_note = ""
+        if self.probe_cache:
+            cache_note = f" ({self.probe_cache.hits - self.probe_cache_hits} from cache)"
+        if job.cancelled:
+            self.status_var.set(f"Cancelled - added {self.probe_added} of {len(job.files)} videos{cache_note}")
         else:
-            self.videos.extend(new_videos)
+            self.status_var.set(f"Added {self.probe_added} videos{cache_note}")
+        self.start_next_probe_job()
+    
+    def cancel_probing(self):
+        """Stop probing; videos already added stay in the playlist"""
+        self.probe_requests.clear()
+        if self.probe_job:
+            self.probe_job.cancel()
+            self.finish_probe_job()
+    
+    def run_preflight(self):
+        """Probe and test-decode every scheduled file on the worker pool"""
+        if self.preflight_job or not self.videos:
+            return
+        if self.probe_job:
+            messagebox.showinfo("Pre-flight Check", "Wait for the videos being added to finish processing.")
+            return
+        files = [self.videos.filepath(i) for i in range(len(self.videos)) if not self.videos.is_repeat(i)]
+        self.preflight_job = PreflightJob(files, cache=self.probe_cache)
+        self.preflight_started = time.monotonic()
+        self.preflight_btn.configure(state='disabled')
+        self.progress.configure(maximum=len(self.preflight_job.files), value=0)
+        self.progress.grid()
+        self.status_var.set(f"Pre-flight check... 0/{len(self.preflight_job.files)}")
+        self.preflight_job.start()
+        self.root.after(100, self.poll_preflight)
+    
+    def poll_preflight(self):
+        """Collect finished checks and mark risky rows as they come in"""
+        job = self.preflight_job
+        if job.take_ready():
+            self.preflight_reports.update(job.reports)
+            self.timeline.refresh()
+        if not job.finished:
+            self.progress.configure(value=job.done_count)
+            self.status_var.set(f"Pre-flight check... {job.done_count}/{len(job.files)}")
+            self.root.after(100, self.poll_preflight)
+            return
         
-        self.update_timeline()
-        self.status_var.set(f"Added {len(files)} videos")
+        self.preflight_job = None
+        self.preflight_btn.configure(state='normal')
+        self.progress.grid_remove()
+        elapsed = time.monotonic() - self.preflight_started
+        if any(report is None for report in job.reports.values()):
+            self.status_var.set("Pre-flight check needs ffprobe")
+            messagebox.showwarning("Pre-flight Check", "ffprobe was not found, so the files could not be checked.")
+            return
+        
+        flagged = playlist_risks(self.videos, self.preflight_reports)
+        for i, filename, risks in flagged:
+            report = self.preflight_reports[self.videos.filepath(i)]
+            print(f"⚠️ #{i + 1} {filename} ({describe(report)}): {'; '.join(risks)}")
+        summary = f"{len(job.files)} files checked in {elapsed:.1f}s, {len(flagged)} risky videos"
+        self.status_var.set(f"🩺 Pre-flight: {summary}")
+        if flagged:
+            details = "\n".join(f"• #{i + 1} {filename}: {'; '.join(risks)}" for i, filename, risks in flagged[:10])
+            if len(flagged) > 10:
+                details += f"\n...and {len(flagged) - 10} more (see console)"
+            messagebox.showwarning("Pre-flight Check", f"⚠️ {summary}\n\n{details}")
+        else:
+            messagebox.showinfo("Pre-flight Check", f"✅ {summary}")
     
     def update_timeline(self):
         """Update timeline with custom start time"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        start_seconds = self.time_to_seconds(self.start_time_var.get())
-        current_time = start_seconds
-        
-        for i, video in enumerate(self.videos):
-            start_time = self.format_duration(current_time)
-            end_time = self.format_duration(current_time + video['duration'])
-            duration_str = self.format_duration(video['duration'])
-            
-            status = '▶' if i == self.current_video_index else ''
-            
-            self.tree.insert('', 'end', values=(status, video['filename'], duration_str, start_time, end_time))
-            current_time += video['duration']
+        started = time.perf_counter()
+        self.timeline_start = self.time_to_seconds(self.start_time_var.get())
+        self.videos.set_start_time(self.timeline_start)
+        self.timeline.refresh()
+        # The broadcast thread only ever sees whole snapshots of the playlist
+        self.engine.publish_schedule()
         
-        total_duration = current_time - start_seconds
-        total_str = self.format_duration(total_duration)
-        end_time_str = self.format_duration(current_time)
+        total_str = self.format_duration(self.schedule.total)
+        end_time_str = format_clock(self.timeline_start + self.schedule.total)
         self.status_var.set(f"Schedule: {self.start_time_var.get()} to {end_time_str} | Duration: {total_str} ({len(self.videos)} videos)")
+        metrics.timeline_render.observe(time.perf_counter() - started)
+    
+    def timeline_row(self, i):
+        """Treeview values for playlist entry i"""
+        if i == self.indicator_index:
+            status = '▶'
+        elif self.videos.is_repeat(i):
+            status = ''
+        else:
+            report = self.preflight_reports.get(self.videos.filepath(i))
+            status = '⚠' if preflight_risks(report, self.videos.duration(i)) else ''
+        return (status, self.videos.filename(i), self.format_duration(self.videos.duration(i)),
+                format_clock(self.timeline_start + self.schedule.start_of(i)),
+                format_clock(self.timeline_start + self.schedule.end_of(i)))
     
     def on_drop(self, event):
         files = self.root.tk.splitlist(event.data)
         video_files = []
         for file in files:
             path = file.strip('{}')
-            if os.path.isfile(path) and Path(path).suffix.lower() in {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm'}:
+            if os.path.isfile(path) and Path(path).suffix.lower() in VIDEO_EXTENSIONS:
                 video_files.append(path)
         if video_files: 
             self.process_files(video_files)
@@ -583,30 +911,35 @@ class PlaylistScheduler:
             self.context_menu.grab_release()
     
     def on_double_click(self, event):
-        selection = self.tree.selection()
+        selection = self.get_selected_indices()
         if selection:
-            index = self.tree.index(selection[0])
+            index = selection[0]
             video = self.videos[index]
-            info = f"File: {video['filename']}\nPath: {video['filepath']}\nDuration: {self.format_duration(video['duration'])}"
+            if video.repeat:
+                messagebox.showinfo("Repeat Block", f"{video.filename}\nAdds: {self.format_duration(video.duration)}")
+                return
+            info = f"File: {video.filename}\nPath: {video.filepath}\nDuration: {self.format_duration(video.duration)}"
             messagebox.showinfo("Video Info", info)
     
     def get_selected_indices(self):
-        return [self.tree.index(item) for item in self.tree.selection()]
+        return self.timeline.selected_indices()
     
     def move_up(self):
         indices = self.get_selected_indices()
         if not indices or indices[0] == 0: 
             return
-        for i in indices:
-            self.videos[i-1], self.videos[i] = self.videos[i], self.videos[i-1]
+        for start, stop in contiguous_runs(indices):
+            self.videos.move_range(start, stop, start - 1)
+        self.timeline.select([i-1 for i in indices])
         self.update_timeline()
     
     def move_down(self):
         indices = self.get_selected_indices()
         if not indices or indices[-1] == len(self.videos) - 1: 
             return
-        for i in reversed(indices):
-            self.videos[i+1], self.videos[i] = self.videos[i], self.videos[i+1]
+        for start, stop in reversed(contiguous_runs(indices)):
+            self.videos.move_range(start, stop, start + 1)
+        self.timeline.select([i+1 for i in indices])
         self.update_timeline()
     
     def delete_selected(self):
@@ -614,13 +947,63 @@ class PlaylistScheduler:
         if not indices: 
             return
         if messagebox.askyesno("Confirm", f"Delete {len(indices)} videos?"):
-            for i in reversed(indices): 
-                del self.videos[i]
+            self.videos.delete(indices)
+            self.timeline.rows_deleted(indices)
             self.update_timeline()
     
+    def copy_selected(self):
+        """Copy the selected rows, repeat rows included, for Paste"""
+        indices = self.get_selected_indices()
+        if not indices:
+            return
+        self.clipboard_data = [(self.videos.paths[i], self.videos.duration(i)) for i in indices]
+        self.status_var.set(f"Copied {len(indices)} rows")
+    
+    def paste_block(self):
+        """Insert the copied rows after the selection, or at the end of the playlist"""
+        if not self.clipboard_data:
+            return
+        indices = self.get_selected_indices()
+        position = indices[-1] + 1 if indices else len(self.videos)
+        self.videos.insert(position, self.clipboard_data)
+        self.timeline.rows_inserted(position, len(self.clipboard_data))
+        self.timeline.select(range(position, position + len(self.clipboard_data)))
+        self.update_timeline()
+    
+    def repeat_block(self):
+        """Loop the selected rows a number of times or until a clock time, without copying them"""
+        indices = self.get_selected_indices()
+        runs = contiguous_runs(indices)
+        if len(runs) != 1:
+            messagebox.showwarning("Repeat Block", "Select one continuous block of rows to repeat.")
+            return
+        start, stop = runs[0]
+        answer = simpledialog.askstring("Repeat Block",
+                                        f"Repeat these {stop - start} rows how many more times (e.g. 6),\n"
+                                        "or until what time (HH:MM:SS)?", parent=self.root)
+        if not answer:
+            return
+        answer = answer.strip().lstrip('xX×')
+        try:
+            if ':' in answer:
+                parts = answer.split(':')
+                if len(parts) == 2:
+                    answer += ':00'
+                until = self.time_to_seconds(answer)
+                self.videos.add_repeat(stop, stop - start, until=until)
+            else:
+                self.videos.add_repeat(stop, stop - start, count=int(answer))
+        except ValueError:
+            messagebox.showerror("Repeat Block", f"Not a count or a time: {answer}")
+            return
+        self.timeline.rows_inserted(stop, 1)
+        self.timeline.select([stop])
+        self.update_timeline()
+    
     def clear_all(self):
         if self.videos and messagebox.askyesno("Clear All", "Clear entire playlist?"):
             self.videos.clear()
+            self.timeline.select([])
             self.update_timeline()
     
     def export_playlist(self):
@@ -629,21 +1012,11 @@ class PlaylistScheduler:
         filepath = filedialog.asksaveasfilename(title="Export schedule", defaultextension=".json", 
                                               filetypes=[("Schedule", "*.json"), ("All", "*.*")])
         if filepath:
-            start_seconds = self.time_to_seconds(self.start_time_var.get())
-            schedule = {"videos": [], "start_time": self.start_time_var.get(), "total_duration": sum(v['duration'] for v in self.videos)}
-            current_time = start_seconds
-            for i, video in enumerate(self.videos):
-                schedule["videos"].append({
-                    'index': i,
-                    'filename': video['filename'],
-                    'filepath': video['filepath'],
-                    'duration': video['duration'],
-                    'start_time': current_time,
-                    'start_formatted': self.format_duration(current_time),
-                    'end_formatted': self.format_duration(current_time + video['duration']),
-                    'scene_name': f"Video_{i+1:03d}_{os.path.splitext(video['filename'])[0][:15]}"
-                })
-                current_time += video['duration']
+            anchored = self.anchor_var.get()
+            schedule = schedule_document(self.videos, self.start_time_var.get(),
+                                         PLAYOUT_MODES[self.playout_mode_var.get()],
+                                         start_date=self.start_date_var.get() if anchored else None,
+                                         timezone=self.timezone_var.get() if anchored else None)
             
             with open(filepath, 'w', encoding='utf-8') as f:
                 json.dump(schedule, f, indent=2)
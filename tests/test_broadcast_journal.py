@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from broadcast_journal import BroadcastJournal
+from playlist_store import RepeatBlock
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'broadcast_journal.jsonl')
+
+
+def reopen(path, **kwargs):
+    journal = BroadcastJournal(path, **kwargs)
+    journal.open()
+    return journal
+
+
+def edit(playlist):
+    playlist.insert(0, [('a.mp4', 10.0), ('b.mp4', 20.0), ('c.mp4', 30.0)])
+    playlist.add_repeat(3, 2, count=2)
+    playlist.insert(4, [('d.mp4', 5.0)])
+    playlist.swap(0, 1)
+    playlist.move_range(4, 5, 0)
+    playlist.set_duration('a.mp4', 12.5)
+    playlist.delete([2])
+    playlist.set_start_time(3600)
+
+
+def rows(playlist):
+    return [(row.to_dict() if type(row) is RepeatBlock else row, playlist.duration(i))
+            for i, row in enumerate(playlist.paths)]
+
+
+def test_edits_and_position_survive_a_restart(path):
+    journal = reopen(path)
+    edit(journal.playlist)
+    expected = rows(journal.playlist)
+    journal.broadcast_started({'precise_timing': True, 'anchor': None}, 0.0)
+    journal.record_position(1, 100.0)
+    journal.close()
+
+    journal = reopen(path)
+    assert rows(journal.playlist) == expected
+    assert journal.playlist.start_time == 3600
+    start_offset, settings = journal.resume_point()
+    assert start_offset == pytest.approx(100.0, abs=1.0)
+    assert settings == {'precise_timing': True, 'anchor': None}
+    journal.close()
+
+
+def test_compaction_keeps_the_state_in_one_snapshot(path):
+    journal = reopen(path, compact_after=5)
+    edit(journal.playlist)
+    journal.record_position(0, 42.0)
+    journal.sync()
+    assert journal.needs_compaction()
+    expected = rows(journal.playlist)
+    journal.compact()
+    journal.close()
+
+    with open(path) as f:
+        lines = f.readlines()
+    assert [json.loads(line)['op'] for line in lines] == ['snapshot']
+
+    journal = reopen(path)
+    assert rows(journal.playlist) == expected
+    journal.close()
+
+
+def test_a_record_cut_short_by_a_crash_is_dropped(path):
+    journal = reopen(path)
+    edit(journal.playlist)
+    expected = rows(journal.playlist)
+    journal.broadcast_started({'anchor': 1000.0}, 0.0)
+    journal.record_position(2, 60.0)
+    journal.close()
+    with open(path, 'ab') as f:
+        f.write(b'{"op":"insert","position":0,"rows":[{"filepath":"x.mp4","dur')
+
+    journal = reopen(path)
+    assert rows(journal.playlist) == expected
+    start_offset, settings = journal.resume_point()
+    assert start_offset == pytest.approx(60.0, abs=1.0)
+    # The anchor moves with the last recorded position, so the schedule stays where it was on the wall clock
+    assert settings['anchor'] == pytest.approx(journal.position['wall'] - 60.0)
+    journal.close()
+
+
+def test_a_clean_stop_leaves_nothing_to_resume(path):
+    journal = reopen(path)
+    journal.playlist.insert(0, [('a.mp4', 10.0)])
+    journal.broadcast_started({}, 0.0)
+    journal.broadcast_stopped()
+    journal.close()
+
+    journal = reopen(path)
+    assert journal.resume_point() is None
+    journal.close()
+
+
+def test_empty_edits_are_not_journaled(path):
+    journal = reopen(path)
+    journal.playlist.insert(0, [('a.mp4', 10.0)])
+    journal.sync()
+    journal.playlist.insert(1, [])
+    journal.playlist.delete([])
+    journal.playlist.delete_range(1, 1)
+    assert journal.pending == []
+    journal.close()
@@ -0,0 +1,115 @@
+import struct
+
+import pytest
+
+import media_probe
+from container_duration import read_duration
+
+
+def box(box_type, payload=b''):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def mvhd(timescale, length, version=0):
+    if version == 1:
+        return box(b'mvhd', bytes([1, 0, 0, 0]) + struct.pack('>QQIQ', 0, 0, timescale, length))
+    return box(b'mvhd', bytes(4) + struct.pack('>IIII', 0, 0, timescale, length))
+
+
+def ebml(element_id, payload, unknown_size=False):
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big')
+    size = b'\x01\xff\xff\xff\xff\xff\xff\xff' if unknown_size else (0x01 << 56 | len(payload)).to_bytes(8, 'big')
+    return id_bytes + size + payload
+
+
+def mkv_info(duration_ms):
+    return ebml(0x1549A966, ebml(0x2AD7B1, (1000000).to_bytes(3, 'big')) + ebml(0x4489, struct.pack('>d', duration_ms)))
+
+
+def amf_string(text):
+    return struct.pack('>H', len(text)) + text.encode()
+
+
+def flv(duration):
+    script = (b'\x02' + amf_string('onMetaData') + b'\x08' + struct.pack('>I', 1)
+              + amf_string('duration') + b'\x00' + struct.pack('>d', duration) + b'\x00\x00\x09')
+    tag = bytes([18]) + len(script).to_bytes(3, 'big') + bytes(7) + script
+    return b'FLV\x01\x05' + struct.pack('>I', 9) + bytes(4) + tag + struct.pack('>I', len(tag))
+
+
+@pytest.fixture
+def write(tmp_path):
+    def write(name, data):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return str(path)
+    return write
+
+
+def test_mp4_duration_from_mvhd(write):
+    path = write('clip.mp4', box(b'ftyp', b'isom\0\0\0\0') + box(b'moov', mvhd(1000, 95500)) + box(b'mdat', bytes(64)))
+    assert read_duration(path) == (95.5, 'mp4')
+
+
+def test_mp4_moov_after_mdat_and_64_bit_mvhd(write):
+    mdat = struct.pack('>I4sQ', 1, b'mdat', 16 + 4096) + bytes(4096)
+    path = write('clip.mov', box(b'ftyp', b'qt  ') + mdat + box(b'moov', mvhd(600, 600 * 3600, version=1)))
+    assert read_duration(path) == (3600.0, 'mp4')
+
+
+def test_fragmented_mp4_duration_from_mehd(write):
+    mehd = box(b'mehd', bytes(4) + struct.pack('>I', 25 * 90))
+    path = write('frag.mp4', box(b'ftyp', b'iso6') + box(b'moov', mvhd(25, 0) + box(b'mvex', mehd)))
+    assert read_duration(path) == (90.0, 'mp4')
+
+
+def test_matroska_duration_from_info(write):
+    segment = ebml(0x18538067, mkv_info(42000.0), unknown_size=True)
+    path = write('clip.mkv', ebml(0x1A45DFA3, b'') + segment)
+    assert read_duration(path) == (42.0, 'matroska')
+
+
+def test_matroska_info_after_the_clusters_found_through_seek_head(write):
+    cluster = ebml(0x1F43B675, bytes(32))
+    seek_head_size = len(ebml(0x114D9B74, ebml(0x4DBB, ebml(0x53AB, b'\x15\x49\xa9\x66') + ebml(0x53AC, b'\0\0'))))
+    seek = ebml(0x4DBB, ebml(0x53AB, b'\x15\x49\xa9\x66') + ebml(0x53AC, (seek_head_size + len(cluster)).to_bytes(2, 'big')))
+    body = ebml(0x114D9B74, seek) + cluster + mkv_info(7500.0)
+    path = write('late.webm', ebml(0x1A45DFA3, b'') + ebml(0x18538067, body))
+    assert read_duration(path) == (7.5, 'matroska')
+
+
+def test_flv_duration_from_on_metadata(write):
+    path = write('clip.flv', flv(12.25))
+    assert read_duration(path) == (12.25, 'flv')
+
+
+def test_truncated_mp4_is_not_trusted(write):
+    data = box(b'ftyp', b'isom\0\0\0\0') + box(b'moov', mvhd(1000, 95500))
+    path = write('cut.mp4', data[:-10])
+    assert read_duration(path) is None
+
+
+def test_mp4_without_a_duration_is_not_trusted(write):
+    path = write('empty.mp4', box(b'ftyp', b'isom\0\0\0\0') + box(b'moov', mvhd(1000, 0)))
+    assert read_duration(path) is None
+
+
+def test_unknown_container_is_left_to_ffprobe(write):
+    path = write('clip.avi', b'RIFF' + struct.pack('<I', 4096) + b'AVI LIST' + bytes(64))
+    assert read_duration(path) is None
+
+
+def test_get_video_duration_falls_back_to_ffprobe(write, monkeypatch):
+    probed = []
+
+    def probe_media(filepath):
+        probed.append(filepath)
+        return 61.0, {'format_name': 'avi'}
+
+    monkeypatch.setattr(media_probe, 'probe_media', probe_media)
+    avi = write('clip.avi', b'RIFF' + struct.pack('<I', 4096) + b'AVI LIST' + bytes(64))
+    mp4 = write('clip.mp4', box(b'ftyp', b'isom\0\0\0\0') + box(b'moov', mvhd(1000, 95500)))
+
+    assert media_probe.get_video_duration(mp4) == 95.5
+    assert media_probe.get_video_duration(avi) == 61.0
+    assert probed == [avi]
@@ -0,0 +1,29 @@
+import time
+
+from media_probe import ProbeJob
+
+
+def wait_for(job, timeout=5.0):
+    ready = []
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        ready += job.take_ready()
+        time.sleep(0.01)
+    return ready + job.take_ready()
+
+
+def test_probe_job_survives_a_failing_prober():
+    def prober(filepath):
+        if filepath == 'bad.mp4':
+            raise OSError("device not ready")
+        return 10.0
+
+    job = ProbeJob(['a.mp4', 'bad.mp4', 'c.mp4'], prober=prober, max_workers=2)
+    job.start()
+    ready = wait_for(job)
+
+    assert job.finished
+    assert job.done_count == 3
+    assert [filepath for filepath, _ in ready] == ['a.mp4', 'bad.mp4', 'c.mp4']
+    # The unreadable file gets the same size-based guess get_video_duration() falls back to
+    assert dict(ready)['bad.mp4'] == 60
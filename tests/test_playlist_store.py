@@ -0,0 +1,62 @@
+import pytest
+
+from playlist_store import PlaylistStore, Slot
+
+
+def block_of_three(**repeat):
+    videos = PlaylistStore([('a.mp4', 10.0), ('b.mp4', 20.0), ('c.mp4', 30.0)])
+    videos.add_repeat(3, 3, **repeat)
+    return videos
+
+
+def test_repeat_row_duration_is_the_extra_airtime():
+    videos = block_of_three(count=4)
+    assert videos.duration(3) == 240.0
+    assert videos.schedule.total == 300.0
+
+
+@pytest.mark.parametrize('passes', range(5))
+@pytest.mark.parametrize('index, offset', [(0, 0.0), (0, 9.5), (1, 10.0), (1, 25.0), (2, 59.9)])
+def test_slot_at_maps_every_pass_back_into_the_block(passes, index, offset):
+    videos = block_of_three(count=4)
+    slot = videos.slot_at(passes * 60.0 + offset)
+    start = passes * 60.0 + (0.0, 10.0, 30.0)[index]
+    assert slot == Slot(index, start, start + (10.0, 20.0, 30.0)[index])
+
+
+def test_pass_boundary_lost_to_rounding_is_the_next_pass():
+    videos = PlaylistStore([('a.mp4', 0.1), ('b.mp4', 0.2)])
+    videos.add_repeat(2, 2, count=3)
+    # 0.1 + 0.2 is not exactly 0.3, so the divmod can land a hair before the end of a pass
+    end_of_second_pass = videos.schedule.start_of(2) + (videos.schedule.start_of(2) - videos.schedule.start_of(0))
+    slot = videos.slot_at(end_of_second_pass)
+    assert slot.index == 0
+    assert slot.start == pytest.approx(0.6)
+
+
+def test_until_cuts_the_last_pass_short():
+    videos = PlaylistStore([('a.mp4', 10.0), ('b.mp4', 20.0), ('c.mp4', 30.0)], start_time=3600)
+    videos.add_repeat(3, 3, until=3600 + 200)
+    assert videos.duration(3) == 140.0
+    # The fourth pass starts at 180 and is cut off at 200, part way into b.mp4
+    assert videos.slot_at(185.0) == Slot(0, 180.0, 190.0)
+    assert videos.slot_at(195.0) == Slot(1, 190.0, 200.0)
+    assert videos.slot_at(200.0) is None
+
+
+def test_rows_after_the_repeat_follow_the_last_pass():
+    videos = block_of_three(count=1)
+    videos.insert(4, [('d.mp4', 5.0)])
+    assert videos.slot_at(121.0) == Slot(4, 120.0, 125.0)
+
+
+def test_nested_repeat_blocks():
+    videos = PlaylistStore([('a.mp4', 10.0), ('b.mp4', 10.0)])
+    videos.add_repeat(2, 1, count=1)
+    # a, b, b again; then the whole of that three more times, the inner repeat included
+    videos.add_repeat(3, 3, count=3)
+    assert videos.schedule.total == 120.0
+    assert videos.slot_at(95.0) == Slot(0, 90.0, 100.0)
+    assert videos.slot_at(105.0) == Slot(1, 100.0, 110.0)
+    assert videos.slot_at(115.0) == Slot(1, 110.0, 120.0)
+
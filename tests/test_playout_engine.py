@@ -0,0 +1,107 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from obs_scenes import video_source_name
+from playlist_store import PlaylistStore
+from playout_engine import PlayoutEngine
+
+
+def on_air_engine(videos, elapsed):
+    """An engine mid-broadcast at elapsed, without an OBS connection"""
+    engine = PlayoutEngine(videos, {})
+    engine.broadcast_start_time = time.monotonic()
+    engine.manual_time_offset = elapsed
+    engine.current_slot = engine.playing.slot_at(elapsed)
+    engine.current_video_index = engine.current_slot.index
+    return engine
+
+
+def test_edit_above_a_repeat_pass_keeps_the_pass():
+    videos = PlaylistStore([('a.mp4', 10.0), ('b.mp4', 10.0), ('c.mp4', 10.0)])
+    videos.add_repeat(3, 3, count=10)
+    # 245s in: pass 8 of the block (the first pass plus seven repeats), 5s into a.mp4
+    engine = on_air_engine(videos, 245.0)
+    assert engine.current_slot == (0, 240.0, 250.0)
+
+    videos.insert(0, [('ident.mp4', 5.0)])
+    engine.publish_schedule()
+    engine.adopt_snapshot()
+
+    assert engine.current_slot == (1, 245.0, 255.0)
+    assert engine.current_video_index == 1
+    assert engine.get_elapsed() == pytest.approx(250.0, abs=0.1)
+
+
+def test_edit_inside_the_repeated_block_keeps_the_pass():
+    videos = PlaylistStore([('a.mp4', 10.0), ('b.mp4', 10.0), ('c.mp4', 10.0)])
+    videos.add_repeat(3, 3, count=10)
+    engine = on_air_engine(videos, 255.0)
+    assert engine.current_slot == (1, 250.0, 260.0)
+
+    # Deleting a.mp4 shortens every pass to 20s; b.mp4 in the same pass now starts at 20 + 7 * 20
+    videos.delete([0])
+    engine.publish_schedule()
+    engine.adopt_snapshot()
+
+    assert engine.current_slot == (0, 160.0, 170.0)
+    assert engine.get_elapsed() == pytest.approx(165.0, abs=0.1)
+
+
+def test_deleting_the_repeat_row_ends_the_pass():
+    videos = PlaylistStore([('a.mp4', 10.0), ('b.mp4', 10.0)])
+    videos.add_repeat(2, 2, count=5)
+    engine = on_air_engine(videos, 45.0)
+
+    videos.delete([2])
+    engine.publish_schedule()
+    engine.adopt_snapshot()
+
+    assert engine.current_slot is None
+    assert engine.get_elapsed() == pytest.approx(45.0, abs=0.1)
+
+
+def test_edit_above_a_plain_clip_shifts_it():
+    videos = PlaylistStore([('a.mp4', 10.0), ('b.mp4', 10.0)])
+    engine = on_air_engine(videos, 15.0)
+
+    videos.delete([0])
+    engine.publish_schedule()
+    engine.adopt_snapshot()
+
+    assert engine.current_slot == (0, 0.0, 10.0)
+    assert engine.get_elapsed() == pytest.approx(5.0, abs=0.1)
+
+
+def test_schedule_shifts_from_many_threads_all_land():
+    engine = on_air_engine(PlaylistStore([('a.mp4', 10.0)]), 0.0)
+
+    def shift():
+        for _ in range(10000):
+            engine.shift_schedule(0.25)
+
+    threads = [threading.Thread(target=shift) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert engine.manual_time_offset == 10000.0
+
+
+def test_an_early_media_end_moves_a_free_running_schedule_only():
+    videos = PlaylistStore([('a.mp4', 10.0), ('b.mp4', 10.0)])
+    ended = SimpleNamespace(input_name=video_source_name('a.mp4'))
+
+    engine = on_air_engine(videos, 6.0)
+    engine.broadcasting = True
+    engine.on_media_input_playback_ended(ended)
+    assert engine.get_elapsed() == pytest.approx(10.0, abs=0.1)
+
+    engine = on_air_engine(videos, 6.0)
+    engine.broadcasting = True
+    engine.anchor = time.time() - 6.0
+    engine.on_media_input_playback_ended(ended)
+    assert engine.get_elapsed() == pytest.approx(6.0, abs=0.1)
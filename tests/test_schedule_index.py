@@ -0,0 +1,87 @@
+import random
+from itertools import accumulate
+
+import pytest
+
+from schedule_index import ScheduleIndex, contiguous_runs
+
+
+def expected_starts(durations):
+    return [0.0, *accumulate(durations)]
+
+
+def test_starts_are_prefix_sums():
+    schedule = ScheduleIndex([10.0, 20.5, 5.0])
+    assert list(schedule.starts) == [0.0, 10.0, 30.5, 35.5]
+    assert schedule.total == 35.5
+    assert (schedule.start_of(1), schedule.end_of(1)) == (10.0, 30.5)
+
+
+def test_index_at_boundaries():
+    schedule = ScheduleIndex([10.0, 20.0])
+    assert schedule.index_at(0.0) == 0
+    assert schedule.index_at(9.999) == 0
+    assert schedule.index_at(10.0) == 1
+    assert schedule.index_at(29.999) == 1
+    assert schedule.index_at(30.0) == -1
+    assert schedule.index_at(-0.001) == -1
+    assert ScheduleIndex().index_at(0.0) == -1
+
+
+def test_zero_length_entries_are_never_on_air():
+    schedule = ScheduleIndex([10.0, 0.0, 5.0])
+    assert schedule.index_at(10.0) == 2
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_edits_keep_the_prefix_sums(seed):
+    rng = random.Random(seed)
+    reference = [float(rng.randint(1, 600)) for _ in range(50)]
+    schedule = ScheduleIndex(reference)
+    for _ in range(200):
+        op = rng.choice(['insert', 'delete', 'delete_range', 'move_range', 'swap', 'set_duration'])
+        n = len(reference)
+        if op == 'insert' or n < 4:
+            i = rng.randint(0, n)
+            durations = [float(rng.randint(1, 600)) for _ in range(rng.randint(1, 3))]
+            schedule.insert(i, durations)
+            reference[i:i] = durations
+        elif op == 'delete':
+            indices = rng.sample(range(n), rng.randint(1, 3))
+            schedule.delete(indices)
+            reference = [d for k, d in enumerate(reference) if k not in indices]
+        elif op == 'delete_range':
+            start = rng.randrange(n)
+            stop = min(n, start + rng.randint(1, 3))
+            schedule.delete_range(start, stop)
+            del reference[start:stop]
+        elif op == 'move_range':
+            start = rng.randrange(n - 1)
+            stop = min(n, start + rng.randint(1, 3))
+            to = rng.randint(0, n - (stop - start))
+            schedule.move_range(start, stop, to)
+            block = reference[start:stop]
+            del reference[start:stop]
+            reference[to:to] = block
+        elif op == 'swap':
+            i, j = rng.sample(range(n), 2)
+            schedule.swap(i, j)
+            reference[i], reference[j] = reference[j], reference[i]
+        else:
+            i = rng.randrange(n)
+            reference[i] = float(rng.randint(0, 600))
+            schedule.set_duration(i, reference[i])
+        assert list(schedule.durations) == reference
+        assert list(schedule.starts) == expected_starts(reference)
+
+
+def test_copy_is_independent():
+    schedule = ScheduleIndex([1.0, 2.0])
+    clone = schedule.copy()
+    schedule.insert(0, [5.0])
+    assert list(clone.starts) == [0.0, 1.0, 3.0]
+
+
+def test_contiguous_runs():
+    assert contiguous_runs([5, 1, 2, 3, 7, 6, 2]) == [(1, 4), (5, 8)]
+    assert contiguous_runs([]) == []
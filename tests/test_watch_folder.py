@@ -0,0 +1,69 @@
+import os
+import time
+
+from watch_folder import FolderWatcher
+
+
+def write(path, data=b'x' * 100, age=0.0):
+    path.write_bytes(data)
+    if age:
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+    return str(path)
+
+
+def drain(watcher):
+    events = []
+    while not watcher.events.empty():
+        events.append(watcher.events.get_nowait())
+    return events
+
+
+def test_files_already_settled_are_new_on_the_first_poll(tmp_path):
+    clip = write(tmp_path / 'clip.mp4', age=60)
+    write(tmp_path / 'notes.txt', age=60)
+    watcher = FolderWatcher(tmp_path, settle=0.2)
+    watcher.poll(full=True, initial=True)
+    assert drain(watcher) == [('new', clip, None)]
+
+
+def test_a_file_being_written_waits_for_the_settle_time(tmp_path):
+    watcher = FolderWatcher(tmp_path, settle=0.2)
+    watcher.poll(full=True, initial=True)
+    clip = write(tmp_path / 'incoming.mp4')
+    watcher.poll()
+    assert drain(watcher) == []
+
+    # Still growing: the settle clock starts again
+    time.sleep(0.1)
+    write(tmp_path / 'incoming.mp4', b'x' * 200)
+    time.sleep(0.15)
+    watcher.poll()
+    assert drain(watcher) == []
+
+    time.sleep(0.25)
+    watcher.poll()
+    assert drain(watcher) == [('new', clip, None)]
+    watcher.poll(full=True)
+    assert drain(watcher) == []
+
+
+def test_files_already_in_the_playlist_are_not_imported_again(tmp_path):
+    old = write(tmp_path / 'old.mp4', age=60)
+    (tmp_path / 'sub').mkdir()
+    nested = write(tmp_path / 'sub' / 'nested.mp4', age=60)
+    fresh = write(tmp_path / 'fresh.mp4', age=60)
+    watcher = FolderWatcher(tmp_path, settle=0.2, imported=[old, nested])
+    watcher.poll(full=True, initial=True)
+    assert drain(watcher) == [('new', fresh, None)]
+
+
+def test_an_imported_file_rewritten_in_place_is_changed_not_new(tmp_path):
+    clip = write(tmp_path / 'clip.mp4', age=60)
+    watcher = FolderWatcher(tmp_path, prober=lambda path: 42.0, settle=0.2, imported=[clip])
+    watcher.poll(full=True, initial=True)
+    write(tmp_path / 'clip.mp4', b'y' * 500)
+    watcher.poll(full=True)
+    time.sleep(0.25)
+    watcher.poll(full=True)
+    assert drain(watcher) == [('changed', clip, 42.0)]
@@ -0,0 +1,198 @@
+import bisect
+
+
+class TimelineView:
+    """Treeview front end for the playlist that only rewrites rows whose text changed
+
+    Up to FULL_RENDER_LIMIT entries every playlist row lives in the Treeview.
+    Past that the tree only holds the rows that fit on screen and the scrollbar
+    pages a window over the playlist, so an edit costs the same however long
+    the schedule is. Tree rows are positional: row k always shows playlist
+    entry first + k, and selection is tracked by playlist index.
+    """
+
+    FULL_RENDER_LIMIT = 1000
+    HEADING_HEIGHT = 25
+    DEFAULT_ROW_HEIGHT = 20
+
+    def __init__(self, tree, scrollbar, count, row):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.count = count
+        self.row = row
+        self.first = 0
+        self.items = []
+        self.values = []
+        self.positions = {}
+        self.selected = set()
+        self.virtual = None
+
+        self.tree.bind('<<TreeviewSelect>>', self.on_select, add='+')
+        self.tree.bind('<Configure>', self.on_configure, add='+')
+        self.tree.bind('<MouseWheel>', self.on_mousewheel, add='+')
+        self.tree.bind('<Button-4>', lambda event: self.on_wheel_units(-3), add='+')
+        self.tree.bind('<Button-5>', lambda event: self.on_wheel_units(3), add='+')
+        self.tree.bind('<Up>', lambda event: self.on_arrow(-1), add='+')
+        self.tree.bind('<Down>', lambda event: self.on_arrow(1), add='+')
+
+    # --- layout -------------------------------------------------------
+
+    def visible_rows(self):
+        """How many rows fit in the tree right now"""
+        row_height = self.tree.tk.call('ttk::style', 'lookup', 'Treeview', '-rowheight') or self.DEFAULT_ROW_HEIGHT
+        try:
+            row_height = int(row_height)
+        except (TypeError, ValueError):
+            row_height = self.DEFAULT_ROW_HEIGHT
+        fits = (self.tree.winfo_height() - self.HEADING_HEIGHT) // max(row_height, 1)
+        return max(int(self.tree.cget('height')), fits)
+
+    def set_virtual(self, virtual):
+        if virtual == self.virtual:
+            return
+        self.virtual = virtual
+        if virtual:
+            self.tree.configure(yscrollcommand=lambda *args: None)
+            self.scrollbar.configure(command=self.on_scroll)
+        else:
+            self.first = 0
+            self.tree.configure(yscrollcommand=self.scrollbar.set)
+            self.scrollbar.configure(command=self.tree.yview)
+
+    # --- rendering ----------------------------------------------------
+
+    def refresh(self):
+        """Bring the tree in line with the playlist, touching only rows that differ"""
+        total = self.count()
+        self.set_virtual(total > self.FULL_RENDER_LIMIT)
+
+        if self.virtual:
+            size = min(total, self.visible_rows())
+            self.first = max(0, min(self.first, total - size))
+        else:
+            size = total
+
+        while len(self.items) < size:
+            item = self.tree.insert('', 'end', values=())
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+            self.values.append(None)
+        while len(self.items) > size:
+            item = self.items.pop()
+            self.values.pop()
+            del self.positions[item]
+            self.tree.delete(item)
+
+        for k in range(size):
+            self.render_row(k)
+
+        if self.virtual:
+            self.scrollbar.set(self.first / total, (self.first + size) / total)
+        self.apply_selection()
+
+    def refresh_rows(self, indices):
+        """Re-render specific playlist rows if they are in view"""
+        for index in indices:
+            k = index - self.first
+            if 0 <= k < len(self.items):
+                self.render_row(k)
+
+    def render_row(self, k):
+        values = self.row(self.first + k)
+        if values != self.values[k]:
+            self.tree.item(self.items[k], values=values)
+            self.values[k] = values
+
+    # --- scrolling ----------------------------------------------------
+
+    def scroll_to(self, first):
+        if first != self.first:
+            self.first = first
+            self.refresh()
+
+    def see(self, index):
+        """Scroll so a playlist row is on screen"""
+        if not self.virtual:
+            if 0 <= index < len(self.items):
+                self.tree.see(self.items[index])
+            return
+        size = len(self.items)
+        if index < self.first:
+            self.scroll_to(index)
+        elif index >= self.first + size:
+            self.scroll_to(index - size + 1)
+
+    def on_scroll(self, *args):
+        total = self.count()
+        size = len(self.items)
+        if args[0] == 'moveto':
+            first = int(float(args[1]) * total)
+        else:
+            step = int(args[1]) * (size if args[2] == 'pages' else 1)
+            first = self.first + step
+        self.scroll_to(max(0, min(first, total - size)))
+
+    def on_mousewheel(self, event):
+        if not self.virtual:
+            return None
+        return self.on_wheel_units(-3 if event.delta > 0 else 3)
+
+    def on_wheel_units(self, units):
+        if not self.virtual:
+            return None
+        self.on_scroll('scroll', units, 'units')
+        return 'break'
+
+    def on_arrow(self, step):
+        """Keyboard navigation past the edge of the rendered window"""
+        if not self.virtual:
+            return None
+        focus = self.tree.focus()
+        if focus not in self.positions:
+            return None
+        index = self.first + self.positions[focus] + step
+        if not 0 <= index < self.count():
+            return 'break'
+        k = index - self.first
+        if 0 <= k < len(self.items):
+            return None
+        self.see(index)
+        self.select([index])
+        self.tree.focus(self.items[index - self.first])
+        return 'break'
+
+    def on_configure(self, event):
+        if self.virtual and self.visible_rows() != len(self.items):
+            self.refresh()
+
+    # --- selection ----------------------------------------------------
+
+    def on_select(self, event):
+        in_view = set(range(self.first, self.first + len(self.items)))
+        self.selected -= in_view
+        self.selected.update(self.first + self.positions[item] for item in self.tree.selection()
+                             if item in self.positions)
+
+    def apply_selection(self):
+        wanted = [self.items[index - self.first] for index in self.selected
+                  if 0 <= index - self.first < len(self.items)]
+        if set(wanted) != set(self.tree.selection()):
+            self.tree.selection_set(wanted)
+
+    def selected_indices(self):
+        return sorted(self.selected)
+
+    def select(self, indices):
+        self.selected = set(indices)
+        self.apply_selection()
+
+    def rows_inserted(self, position, count):
+        """Keep the selection on the same entries after rows are inserted"""
+        self.selected = {index + count if index >= position else index for index in self.selected}
+
+    def rows_deleted(self, indices):
+        """Keep the selection on the same entries after rows are removed"""
+        removed = sorted(indices)
+        gone = set(removed)
+        self.selected = {index - bisect.bisect_left(removed, index)
+                         for index in self.selected if index not in gone}
@@ -0,0 +1,166 @@
+import os
+import queue
+import threading
+import time
+
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm'}
+
+
+def is_video_file(path):
+    return os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+
+
+def scan_directory(directory):
+    """One directory level: ({video path: (size, mtime_ns)}, [subdirectories])"""
+    files = {}
+    subdirs = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file() and is_video_file(entry.name):
+                        # On Windows scandir already carries the stat data, so this costs no extra call
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, subdirs
+
+
+def scan_videos(root):
+    """Every video file under root, recursively, in a stable sorted order"""
+    found = []
+    pending = [root]
+    while pending:
+        files, subdirs = scan_directory(pending.pop())
+        found.extend(files)
+        pending.extend(subdirs)
+    return sorted(found)
+
+
+class FolderWatcher:
+    """Poll a folder tree and report video files once they have finished being written
+
+    Each poll only re-lists directories whose mtime changed, since adding,
+    removing or renaming a file is what bumps it. Every full_scan_every polls
+    the whole tree is listed again to catch files rewritten in place. A file
+    is reported once its size and mtime have held still for settle seconds.
+    Results arrive on self.events as ('new', path, None) or ('changed', path,
+    duration) from a daemon thread; changed files are re-probed with prober
+    on that thread, and the UI drains the queue on its own schedule.
+    Paths in imported are already in the playlist: the first poll only
+    records them, so later they can only come back as 'changed'.
+    """
+
+    def __init__(self, root, prober=None, interval=2.0, settle=5.0, full_scan_every=30, imported=()):
+        self.root = os.path.abspath(root)
+        self.prober = prober
+        self.imported = {os.path.normcase(os.path.abspath(path)) for path in imported}
+        self.interval = interval
+        self.settle = settle
+        self.full_scan_every = full_scan_every
+        self.events = queue.Queue()
+        self.stopped = threading.Event()
+        self.thread = None
+
+        self.dir_mtimes = {}
+        self.dir_files = {}
+        self.known = {}
+        self.pending = {}
+        self.polls = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        # Files that were already there count as new, so starting a watch also imports the folder
+        self.poll(full=True, initial=True)
+        while not self.stopped.wait(self.interval):
+            try:
+                self.poll(full=self.polls % self.full_scan_every == 0)
+            except Exception as e:
+                print(f"⚠️ Watch folder error: {e}")
+
+    def poll(self, full=False, initial=False):
+        """One pass over the tree; queues settled files and returns how many directories were listed"""
+        self.polls += 1
+        now = time.time()
+        listed = 0
+        seen_dirs = set()
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            seen_dirs.add(directory)
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            if full or self.dir_mtimes.get(directory) != mtime:
+                files, subdirs = scan_directory(directory)
+                listed += 1
+                self.dir_mtimes[directory] = mtime
+                previous_files = self.dir_files.get(directory, ({}, []))[0]
+                for path in previous_files.keys() - files.keys():
+                    self.known.pop(path, None)
+                    self.pending.pop(path, None)
+                self.dir_files[directory] = (files, subdirs)
+                for path, signature in files.items():
+                    if self.known.get(path) != signature:
+                        self.note_change(path, signature, now, initial)
+            stack.extend(self.dir_files[directory][1])
+
+        # Directories that disappeared since the last pass
+        for directory in set(self.dir_files) - seen_dirs:
+            for path in self.dir_files.pop(directory)[0]:
+                self.known.pop(path, None)
+                self.pending.pop(path, None)
+            self.dir_mtimes.pop(directory, None)
+
+        self.check_pending(now)
+        return listed
+
+    def note_change(self, path, signature, now, initial):
+        previous = self.pending.get(path)
+        if previous and previous[0] == signature:
+            return
+        if initial and os.path.normcase(path) in self.imported:
+            self.known[path] = signature
+            return
+        # Files untouched for longer than the settle time when first seen are ready straight away
+        if initial and now - signature[1] / 1e9 >= self.settle:
+            self.known[path] = signature
+            self.events.put(('new', path, None))
+            return
+        self.pending[path] = (signature, now)
+
+    def check_pending(self, now):
+        """Re-stat files that were still changing and release the ones that held still"""
+        ready = []
+        for path, (signature, since) in list(self.pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.pending[path]
+                continue
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != signature:
+                self.pending[path] = (current, now)
+            elif now - since >= self.settle:
+                ready.append(path)
+        for path in sorted(ready):
+            signature = self.pending.pop(path)[0]
+            changed = path in self.known
+            self.known[path] = signature
+            if changed and self.prober:
+                self.events.put(('changed', path, self.prober(path)))
+            elif not changed:
+                self.events.put(('new', path, None))